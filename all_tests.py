@@ -4,7 +4,11 @@
 # import all the lovely files
 import unittest
 from test import fasta_reader_tests, gene_part_tests, xrna_tests, gene_tests, translator_tests, gff_reader_tests,\
-    sequence_tests, filter_manager_tests, filters_tests, stats_manager_tests, seq_helper_tests, cds_tests, exon_tests
+    sequence_tests, filter_manager_tests, filters_tests, stats_manager_tests, seq_helper_tests, cds_tests, exon_tests,\
+    stop_codon_index_tests, sequence_cache_tests, transcript_metrics_tests, filter_expression_tests,\
+    filter_report_tests, stats_accumulator_tests, gff_stats_reader_tests,\
+    length_distribution_tests, assembly_stats_tests, annotation_reader_tests,\
+    feature_registry_tests, profiler_tests, progress_tests, controller_tests
 
 # get suites from test modules
 suite1 = fasta_reader_tests.suite()
@@ -20,6 +24,20 @@ suite14 = stats_manager_tests.suite()
 suite15 = seq_helper_tests.suite()
 suite16 = cds_tests.suite()
 suite17 = exon_tests.suite()
+suite18 = stop_codon_index_tests.suite()
+suite19 = sequence_cache_tests.suite()
+suite20 = transcript_metrics_tests.suite()
+suite21 = filter_expression_tests.suite()
+suite22 = filter_report_tests.suite()
+suite23 = stats_accumulator_tests.suite()
+suite24 = gff_stats_reader_tests.suite()
+suite25 = length_distribution_tests.suite()
+suite26 = assembly_stats_tests.suite()
+suite27 = annotation_reader_tests.suite()
+suite28 = feature_registry_tests.suite()
+suite29 = profiler_tests.suite()
+suite30 = progress_tests.suite()
+suite31 = controller_tests.suite()
 
 # collect suites in a TestSuite object
 suite = unittest.TestSuite()
@@ -36,6 +54,20 @@ suite.addTest(suite14)
 suite.addTest(suite15)
 suite.addTest(suite16)
 suite.addTest(suite17)
+suite.addTest(suite18)
+suite.addTest(suite19)
+suite.addTest(suite20)
+suite.addTest(suite21)
+suite.addTest(suite22)
+suite.addTest(suite23)
+suite.addTest(suite24)
+suite.addTest(suite25)
+suite.addTest(suite26)
+suite.addTest(suite27)
+suite.addTest(suite28)
+suite.addTest(suite29)
+suite.addTest(suite30)
+suite.addTest(suite31)
 
 # run suite
 unittest.TextTestRunner(verbosity=2).run(suite)
@@ -24,6 +24,7 @@ def main():
     parser.add_argument('-o', '--out')
     parser.add_argument('--fix_start_stop', action='store_true')
     parser.add_argument('--fix_terminal_ns', action='store_true')
+    parser.add_argument('--remove_internal_stops', action='store_true')
     parser.add_argument('-rcs', '--remove_cds_shorter_than')
     parser.add_argument('-rcl', '--remove_cds_longer_than')
     parser.add_argument('-res', '--remove_exons_shorter_than')
@@ -40,6 +41,21 @@ def main():
     parser.add_argument('-fil', '--flag_introns_longer_than')
     parser.add_argument('-fgs', '--flag_genes_shorter_than')
     parser.add_argument('-fgl', '--flag_genes_longer_than')
+    parser.add_argument('--filter', action='append')
+    parser.add_argument('--mode', dest='filter_mode', choices=['remove', 'flag', 'list'], default='remove')
+    parser.add_argument('--stats_processes', type=int, default=1)
+    parser.add_argument('--stats_only', '--stats-only', action='store_true',
+                        help="write genome.stats from one pass over the gff, without loading the genome; memory "
+                             "does not grow with the genome except for a set of every gene and mRNA ID, used to "
+                             "find duplicates")
+    parser.add_argument('--per_seq_stats', action='store_true')
+    parser.add_argument('--profile', action='store_true',
+                        help="write the time, CPU time, peak memory, memory growth and page faults of each stage "
+                             "to genome.profile.json and stderr")
+    parser.add_argument('--progress', nargs='?', const='text', choices=['text', 'json'])
+    parser.add_argument('--outputs', help="comma-separated outputs to write, from fasta, gff, tbl, proteins, "
+                                          "mrna, cds, removed, stats and report; all but cds by default")
+    parser.add_argument('--report_format', choices=['tsv', 'json'], default='tsv')
     parser.add_argument('-ses', '--skip_empty_scaffolds', action='store_true')
     args = parser.parse_args()
     controller = Controller()
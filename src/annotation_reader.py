@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+
+class AnnotationReader(object):
+    """Reads a tab-separated annotation file (id, key, value) a line at a time, yielding batches of rows.
+
+    Consecutive rows with the same id are grouped, and a repeated key and
+    value within a group (e.g. the same Dbxref or GO term listed twice) is
+    only kept once. A batch always ends at the end of a group, so an id's
+    rows are applied together. Blank lines and lines starting with '#' are
+    skipped, as are lines without exactly three columns; each is counted.
+
+    Args:
+        batch_size: the number of rows after which a batch is yielded
+    """
+
+    def __init__(self, batch_size=10000):
+        self.batch_size = batch_size
+        self.rows = 0
+        self.comments = 0
+        self.bad_rows = 0
+        self.duplicates = 0
+
+    def read(self, io_buffer):
+        """Yields lists of [id, key, value] rows."""
+        batch = []
+        group_id = None
+        group_values = set()
+        for line in io_buffer:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('#'):
+                self.comments += 1
+                continue
+            splitline = stripped.split('\t')
+            if len(splitline) != 3:
+                self.bad_rows += 1
+                continue
+            feature_id, key, value = splitline
+            if feature_id != group_id:
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+                group_id = feature_id
+                group_values = set()
+            if (key, value) in group_values:
+                self.duplicates += 1
+                continue
+            group_values.add((key, value))
+            batch.append(splitline)
+            self.rows += 1
+        if batch:
+            yield batch
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import re
+
+# A gap is any run of Ns
+GAP = re.compile('[Nn]+')
+
+
+def nx_stats(lengths, fractions):
+    """Returns a list of (Nx, Lx) pairs, one per fraction of the total length, e.g. 0.5 for N50/L50.
+
+    Nx is the length of the sequence at which the longest sequences first
+    add up to at least that fraction of the total, and Lx is how many
+    sequences that takes; both are 0 if there are no sequences.
+    """
+    total = sum(lengths)
+    result = [(0, 0)] * len(fractions)
+    remaining = sorted(enumerate(fractions), key=lambda pair: pair[1])
+    running = 0
+    for count, length in enumerate(sorted(lengths, reverse=True), 1):
+        running += length
+        while remaining and running >= remaining[0][1] * total:
+            result[remaining.pop(0)[0]] = (length, count)
+        if not remaining:
+            break
+    return result
+
+
+class AssemblyStats(object):
+    """Scaffold and contig contiguity, gaps and GC content for a set of sequences.
+
+    Only lengths and counts are kept; contigs are the stretches of a
+    scaffold between runs of Ns. Sequences added with add_length have no
+    bases to scan, so only the scaffold stats are reported for them.
+    """
+
+    def __init__(self):
+        self.scaffold_lengths = []
+        self.contig_lengths = []
+        self.gaps = 0
+        self.gap_length = 0
+        self.gc = 0
+        self.acgt = 0
+        self.scanned = False
+
+    def add_length(self, length):
+        if length:
+            self.scaffold_lengths.append(length)
+
+    def add_sequence(self, bases):
+        """Adds a scaffold, finding its gaps with one regex scan and counting bases with str.count."""
+        if not bases:
+            return
+        self.scanned = True
+        self.scaffold_lengths.append(len(bases))
+        position = 0
+        for gap in GAP.finditer(bases):
+            if gap.start() > position:
+                self.contig_lengths.append(gap.start() - position)
+            self.gaps += 1
+            self.gap_length += gap.end() - gap.start()
+            position = gap.end()
+        if len(bases) > position:
+            self.contig_lengths.append(len(bases) - position)
+        gc = bases.count('G') + bases.count('C') + bases.count('g') + bases.count('c')
+        self.gc += gc
+        self.acgt += gc + bases.count('A') + bases.count('T') + bases.count('a') + bases.count('t')
+
+    def merge(self, other):
+        """Adds the sequences counted by another AssemblyStats, e.g. one filled in a worker process."""
+        self.scaffold_lengths.extend(other.scaffold_lengths)
+        self.contig_lengths.extend(other.contig_lengths)
+        self.gaps += other.gaps
+        self.gap_length += other.gap_length
+        self.gc += other.gc
+        self.acgt += other.acgt
+        self.scanned = self.scanned or other.scanned
+
+    def stats(self):
+        """Returns a list of (name, value) pairs, in the order they should be reported."""
+        result = [("Number of scaffolds", len(self.scaffold_lengths))]
+        (n50, l50), (n90, l90) = nx_stats(self.scaffold_lengths, [0.5, 0.9])
+        result.extend([("Scaffold N50", n50), ("Scaffold L50", l50), ("Scaffold N90", n90)])
+        if not self.scanned:
+            return result
+        result.append(("Number of contigs", len(self.contig_lengths)))
+        (n50, l50), (n90, l90) = nx_stats(self.contig_lengths, [0.5, 0.9])
+        result.extend([("Contig N50", n50), ("Contig L50", l50), ("Contig N90", n90)])
+        result.extend([("Number of gaps", self.gaps), ("Total gap length", self.gap_length)])
+        gc_content = round(100.0 * self.gc / self.acgt, 1) if self.acgt else 0
+        result.append(("GC content (%)", gc_content))
+        return result
+
+
+def sequence_assembly(bases):
+    """Returns an AssemblyStats for a single sequence's bases."""
+    assembly = AssemblyStats()
+    assembly.add_sequence(bases)
+    return assembly
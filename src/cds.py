@@ -95,12 +95,12 @@ class CDS(GenePart):
             a string of nucleotides (or an empty string if strand is invalid or 
             CDS has no indices)
         """
-        seq = ''
-        for i in xrange(len(self.indices)):
-            index_pair = self.indices[i]
+        subseqs = []
+        for index_pair in self.indices:
             subseq = seq_object.get_subseq(index_pair[0], index_pair[1])
             if subseq:
-                seq += subseq
+                subseqs.append(subseq)
+        seq = ''.join(subseqs)
         if strand == '-':
             seq = translate.reverse_complement(seq)
         return seq
@@ -4,21 +4,42 @@
 
 import os
 import sys
-from src.fasta_reader import FastaReader
+from src.annotation_reader import AnnotationReader
+from src.fasta_reader import FastaReader, read_fasta_index, read_sequence_lengths
+from src.feature_registry import FeatureRegistry
 from src.gff_reader import GFFReader
+from src.gff_stats_reader import GFFStatsReader
+from src.filter_expression import FilterExpression, FilterExpressionError
 from src.filter_manager import FilterManager
+from src.filter_report import FilterReport
+from src.profiler import Profiler
+from src.progress import ProgressReporter
 from src.stats_manager import StatsManager
+from src.sequence import annotate_features
+from src.sequence_cache import SequenceCache
 
+# Outputs written a sequence at a time, by --outputs name, in the order they're written
+SEQUENCE_OUTPUTS = [("fasta", "genome.fasta"), ("gff", "genome.gff"), ("tbl", "genome.tbl"),
+                    ("proteins", "genome.proteins.fasta"), ("mrna", "genome.mrna.fasta"),
+                    ("cds", "genome.cds.fasta")]
+OUTPUTS = [name for name, filename in SEQUENCE_OUTPUTS] + ["removed", "stats", "report"]
+# Everything but the CDS fasta, which was added later
+DEFAULT_OUTPUTS = [name for name in OUTPUTS if name != "cds"]
 
-def read_annotation_file(io_buffer):
-    annos = []
-    for line in io_buffer:
-        splitline = line.strip().split('\t')
-        if len(splitline) != 3:
-            return []
-        else:
-            annos.append(splitline)
-    return annos
+
+def parse_outputs(text):
+    """Returns the list of output names in a comma-separated --outputs value, or DEFAULT_OUTPUTS if it's empty.
+
+    Raises:
+        ValueError: if a name isn't one of OUTPUTS
+    """
+    if not text:
+        return DEFAULT_OUTPUTS
+    outputs = [name.strip() for name in text.split(",") if name.strip()]
+    for name in outputs:
+        if name not in OUTPUTS:
+            raise ValueError("Unknown output '" + name + "'; choose from " + ", ".join(OUTPUTS))
+    return outputs
 
 
 def read_bed_file(io_buffer):
@@ -43,18 +64,46 @@ class Controller(object):
     def __init__(self):
         self.seqs = []
         self.removed_features = []
+        self.registry = FeatureRegistry()
         self.filter_mgr = FilterManager()
+        self.filter_report = FilterReport()
         self.stats_mgr = StatsManager()
+        self.sequence_cache = SequenceCache()
+        self.profiler = Profiler()
+        self.progress = ProgressReporter()
 
     def execute(self, args):
         """At a minimum, write a fasta, gff and tbl to output directory. Optionally do more."""
+        # Check filter expressions before doing any work
+        for expression in args.filter or []:
+            try:
+                FilterExpression(expression)
+            except FilterExpressionError as error:
+                sys.stderr.write(str(error) + ". No genome was loaded.\n")
+                sys.exit()
+        try:
+            outputs = parse_outputs(args.outputs)
+        except ValueError as error:
+            sys.stderr.write(str(error) + ". No genome was loaded.\n")
+            sys.exit()
+        if args.profile:
+            self.profiler.enable()
+        if args.progress:
+            self.progress = ProgressReporter(args.progress)
+
+        if args.stats_only:
+            self.write_stats_only(args)
+            return
+
         # Verify and read fasta file
         fastapath = args.fasta
         if not os.path.isfile(fastapath):
             sys.stderr.write("Failed to find " + fastapath + ". No genome was loaded.\n")
             sys.exit()
         sys.stderr.write("Reading fasta...\n")
+        self.profiler.begin("read_fasta")
         self.read_fasta(fastapath)
+        self.profiler.count("bytes", os.path.getsize(fastapath))
         sys.stderr.write("Done.\n")
 
         # Create output directory
@@ -71,151 +120,251 @@ class Controller(object):
             sys.stderr.write("Failed to find " + gffpath + ". No genome was loaded.")
             return
         sys.stderr.write("Reading gff...\n")
+        self.profiler.begin("read_gff")
         self.read_gff(gffpath, out_dir)
+        self.profiler.count("bytes", os.path.getsize(gffpath))
         sys.stderr.write("Done.\n")
 
         # Calculate stats before genome is modified
-        sys.stderr.write("Calculating stats on original genome\n")
-        for seq in self.seqs:
-            self.stats_mgr.update_ref(seq.stats())
+        if "stats" in outputs:
+            sys.stderr.write("Calculating stats on original genome\n")
+            self.profiler.begin("ref_stats")
+            if args.stats_processes > 1:
+                self.stats_mgr.update_ref_parallel(self.seqs, args.stats_processes)
+            else:
+                for seq in self.progress.items("ref_stats", self.seqs, "scaffolds"):
+                    self.stats_mgr.update_ref_from_seq(seq)
 
         # Optional annotation step
         if args.anno:
             anno_filename = args.anno
+            self.profiler.begin("annotate")
             self.annotate_from_file(anno_filename)
 
         # Optional step to trim sequences, subsequences or features
         if args.trim:
             trim_filename = args.trim
+            self.profiler.begin("trim")
             self.trim_from_file(trim_filename)
 
         # Optional step to create start and stop codons
         if args.fix_start_stop:
             sys.stderr.write("Creating start and stop codons...\n")
+            self.profiler.begin("fix_start_stop")
             self.fix_start_stop_codons()
 
         # Optional step to fix terminal Ns
         if args.fix_terminal_ns:
             sys.stderr.write("Fixing terminal Ns...\n")
+            self.profiler.begin("fix_terminal_ns")
             self.fix_terminal_ns()
 
+        # Optional step to remove mRNAs with internal stop codons
+        if args.remove_internal_stops:
+            sys.stderr.write("Removing mRNAs with internal stops...\n")
+            self.profiler.begin("remove_internal_stops")
+            self.remove_internal_stops()
+
         # Optional filtering steps
+        # All requested filters are applied together in one pass per sequence
+        filter_specs = []
         # Remove
         if args.remove_cds_shorter_than:
             min_length = args.remove_cds_shorter_than
             sys.stderr.write("Removing CDS shorter than %s...\n" % min_length)
-            self.apply_filter("cds_shorter_than", min_length, "REMOVE")
+            filter_specs.append(["cds_shorter_than", min_length, "REMOVE"])
         if args.remove_cds_longer_than:
             max_length = args.remove_cds_longer_than
             sys.stderr.write("Removing CDS longer than %s...\n" % max_length)
-            self.apply_filter("cds_longer_than", max_length, "REMOVE")
+            filter_specs.append(["cds_longer_than", max_length, "REMOVE"])
         if args.remove_exons_shorter_than:
             min_length = args.remove_exons_shorter_than
             sys.stderr.write("Removing exons shorter than %s...\n" % min_length)
-            self.apply_filter("exon_shorter_than", min_length, "REMOVE")
+            filter_specs.append(["exon_shorter_than", min_length, "REMOVE"])
         if args.remove_exons_longer_than:
             max_length = args.remove_exons_longer_than
             sys.stderr.write("Removing exons longer than %s...\n" % max_length)
-            self.apply_filter("exon_longer_than", max_length, "REMOVE")
+            filter_specs.append(["exon_longer_than", max_length, "REMOVE"])
         if args.remove_introns_shorter_than:
             min_length = args.remove_introns_shorter_than
             sys.stderr.write("Removing exons shorter than %s...\n" % min_length)
-            self.apply_filter("intron_shorter_than", min_length, "REMOVE")
+            filter_specs.append(["intron_shorter_than", min_length, "REMOVE"])
         if args.remove_introns_longer_than:
             max_length = args.remove_introns_longer_than
             sys.stderr.write("Removing exons longer than %s...\n" % max_length)
-            self.apply_filter("intron_longer_than", max_length, "REMOVE")
+            filter_specs.append(["intron_longer_than", max_length, "REMOVE"])
         if args.remove_genes_shorter_than:
             min_length = args.remove_genes_shorter_than
             sys.stderr.write("Removing genes shorter than %s...\n" % min_length)
-            self.apply_filter("gene_shorter_than", min_length, "REMOVE")
+            filter_specs.append(["gene_shorter_than", min_length, "REMOVE"])
         if args.remove_genes_longer_than:
             max_length = args.remove_genes_longer_than
             sys.stderr.write("Removing genes longer than %s...\n" % max_length)
-            self.apply_filter("gene_longer_than", max_length, "REMOVE")
+            filter_specs.append(["gene_longer_than", max_length, "REMOVE"])
         # Flag
         if args.flag_cds_shorter_than:
             min_length = args.flag_cds_shorter_than
             sys.stderr.write("Flagging CDS shorter than %s...\n" % min_length)
-            self.apply_filter("cds_shorter_than", min_length, "FLAG")
+            filter_specs.append(["cds_shorter_than", min_length, "FLAG"])
         if args.flag_cds_longer_than:
             max_length = args.flag_cds_longer_than
             sys.stderr.write("Flagging CDS longer than %s...\n" % max_length)
-            self.apply_filter("cds_longer_than", max_length, "FLAG")
+            filter_specs.append(["cds_longer_than", max_length, "FLAG"])
         if args.flag_exons_shorter_than:
             min_length = args.flag_exons_shorter_than
             sys.stderr.write("Flagging exons shorter than %s...\n" % min_length)
-            self.apply_filter("exon_shorter_than", min_length, "FLAG")
+            filter_specs.append(["exon_shorter_than", min_length, "FLAG"])
         if args.flag_exons_longer_than:
             max_length = args.flag_exons_longer_than
             sys.stderr.write("Flagging exons longer than %s...\n" % max_length)
-            self.apply_filter("exon_longer_than", max_length, "FLAG")
+            filter_specs.append(["exon_longer_than", max_length, "FLAG"])
         if args.flag_introns_shorter_than:
             min_length = args.flag_introns_shorter_than
             sys.stderr.write("Flagging exons shorter than %s...\n" % min_length)
-            self.apply_filter("intron_shorter_than", min_length, "FLAG")
+            filter_specs.append(["intron_shorter_than", min_length, "FLAG"])
         if args.flag_introns_longer_than:
             max_length = args.flag_introns_longer_than
             sys.stderr.write("Flagging exons longer than %s...\n" % max_length)
-            self.apply_filter("intron_longer_than", max_length, "FLAG")
+            filter_specs.append(["intron_longer_than", max_length, "FLAG"])
         if args.flag_genes_shorter_than:
             min_length = args.flag_genes_shorter_than
             sys.stderr.write("Flagging genes shorter than %s...\n" % min_length)
-            self.apply_filter("gene_shorter_than", min_length, "FLAG")
+            filter_specs.append(["gene_shorter_than", min_length, "FLAG"])
         if args.flag_genes_longer_than:
             max_length = args.flag_genes_longer_than
             sys.stderr.write("Flagging genes longer than %s...\n" % max_length)
-            self.apply_filter("gene_longer_than", max_length, "FLAG")
-
-        # Write fasta, gff and tbl file to output folder
-        # Open files
-        fasta = open(out_dir + '/genome.fasta', 'w')
-        gff = open(out_dir + '/genome.gff', 'w')
-        tbl = open(out_dir + '/genome.tbl', 'w')
-        proteins = open(out_dir + '/genome.proteins.fasta', 'w')
-        mrna = open(out_dir + '/genome.mrna.fasta', 'w')
-        removed = open(out_dir + '/genome.removed.gff', 'w')
-        stats_file = open(out_dir + '/genome.stats', 'w')
+            filter_specs.append(["gene_longer_than", max_length, "FLAG"])
+        # Expressions, all in the same mode
+        for expression in args.filter or []:
+            sys.stderr.write("Applying filter '%s' (%s)...\n" % (expression, args.filter_mode))
+            filter_specs.append(["expression", expression, args.filter_mode.upper()])
+        if filter_specs:
+            self.profiler.begin("filters")
+            self.apply_filters(filter_specs)
 
         # Calculate stats on modified genome
-        sys.stderr.write("Calculating stats on modified genome\n")
-        for seq in self.seqs:
-            self.stats_mgr.update_alt(seq.stats())
+        if "stats" in outputs:
+            sys.stderr.write("Calculating stats on modified genome\n")
+            self.profiler.begin("alt_stats")
+            if args.per_seq_stats:
+                self.stats_mgr.record_per_seq()
+            if args.stats_processes > 1:
+                self.stats_mgr.update_alt_parallel(self.seqs, args.stats_processes)
+            else:
+                # Sequences with only removals since then are updated from the reference stats
+                for seq in self.progress.items("alt_stats", self.seqs, "scaffolds"):
+                    self.stats_mgr.update_alt_from_seq(seq)
 
-        # Write stats file
-        sys.stderr.write("Writing stats file to " + out_dir + "/ ...\n")
-        for line in self.stats_mgr.summary():
-            stats_file.write(line)
+            # Write stats file
+            self.profiler.begin("write_stats")
+            self.write_stats(out_dir)
 
-        # Write fasta, gff, tbl, protein fasta
+        # Write the requested fasta, gff, tbl, protein, mRNA and CDS files;
+        # nothing is built for outputs that weren't asked for
         sys.stderr.write("Writing gff, tbl and fasta to " + out_dir + "/ ...\n")
-        gff.write("##gff-version 3\n")
-        for seq in self.seqs:
+        self.profiler.begin("write_output")
+        files = [(name, open(out_dir + '/' + filename, 'w')) for name, filename in SEQUENCE_OUTPUTS
+                 if name in outputs]
+        if "gff" in outputs:
+            dict(files)["gff"].write("##gff-version 3\n")
+        for seq in self.progress.items("write_output", self.seqs, "scaffolds"):
             if seq.is_empty():
                 continue
-            fasta.write(seq.to_fasta())
-            gff.write(seq.to_gff())
-            if not args.skip_empty_scaffolds or len(seq.genes) > 0:
-                # Possibly skip empty sequences
-                tbl.write(seq.to_tbl())
-            proteins.write(seq.to_protein_fasta())
-            mrna.write(seq.to_mrna_fasta())
+            for name, output in files:
+                if name == "tbl" and args.skip_empty_scaffolds and not seq.genes:
+                    # Possibly skip empty sequences
+                    continue
+                output.write(self.sequence_output(seq, name))
 
         # Write removed.gff
-        for feature in self.removed_features:
-            removed.write(feature.to_gff())
+        if "removed" in outputs:
+            with open(out_dir + '/genome.removed.gff', 'w') as removed:
+                for feature in self.removed_features:
+                    removed.write(feature.to_gff())
+            self.profiler.count("bytes", os.path.getsize(removed.name))
+
+        # Write one report of every removed, flagged or listed feature, if there were any
+        if "report" in outputs and self.filter_report.rows:
+            self.write_filter_report(out_dir, args.report_format)
 
         # Close files
-        gff.close()
-        tbl.close()
-        fasta.close()
-        proteins.close()
-        removed.close()
-        stats_file.close()
-
-    def add_annotations_from_list(self, anno_list):
+        for name, output in files:
+            output.close()
+            self.profiler.count("bytes", os.path.getsize(output.name))
+
+        self.write_profile(out_dir)
+
+    @staticmethod
+    def sequence_output(seq, name):
+        """Returns a sequence's entries in one of SEQUENCE_OUTPUTS."""
+        if name == "fasta":
+            return seq.to_fasta()
+        elif name == "gff":
+            return seq.to_gff()
+        elif name == "tbl":
+            return seq.to_tbl()
+        elif name == "proteins":
+            return seq.to_protein_fasta()
+        elif name == "mrna":
+            return seq.to_mrna_fasta()
+        return seq.to_cds_fasta()
+
+    def write_stats_only(self, args):
+        """Writes genome.stats straight from the gff, without loading the genome.
+
+        Sequence lengths come from the fasta's .fai index if there is one,
+        otherwise from reading the fasta a line at a time.
+        """
+        fastapath = args.fasta
+        if not os.path.isfile(fastapath):
+            sys.stderr.write("Failed to find " + fastapath + ". No genome was loaded.\n")
+            sys.exit()
+        gffpath = args.gff
+        if not os.path.isfile(gffpath):
+            sys.stderr.write("Failed to find " + gffpath + ". No genome was loaded.")
+            return
+        out_dir = "gag_output"
+        if args.out:
+            out_dir = args.out
+        os.system('mkdir ' + out_dir)
+
+        self.profiler.begin("read_lengths")
+        if os.path.isfile(fastapath + ".fai"):
+            sys.stderr.write("Reading sequence lengths from " + fastapath + ".fai...\n")
+            lengths = read_fasta_index(open(fastapath + ".fai", 'r'))
+        else:
+            sys.stderr.write("Reading sequence lengths...\n")
+            lengths = read_sequence_lengths(self.progress.lines("read_lengths", open(fastapath, 'r')))
+            self.profiler.count("bytes", os.path.getsize(fastapath))
+        self.profiler.count("sequences", len(lengths))
+        sys.stderr.write("Calculating stats from gff...\n")
+        self.profiler.begin("gff_stats")
+        self.profiler.count("bytes", os.path.getsize(gffpath))
+        if args.per_seq_stats:
+            self.stats_mgr.record_per_seq()
+        gff_lines = self.progress.lines("gff_stats", open(gffpath, 'rb'))
+        for header, stats, distributions in GFFStatsReader(lengths).read(gff_lines):
+            self.stats_mgr.update_ref(stats)
+            self.stats_mgr.update_alt(stats)
+            self.stats_mgr.update_ref_lengths(distributions)
+            self.stats_mgr.update_alt_lengths(distributions)
+            self.stats_mgr.add_per_seq(header, stats)
+        # Without the bases, only scaffold stats can be given
+        for length in lengths.values():
+            self.stats_mgr.ref_assembly.add_length(length)
+            self.stats_mgr.alt_assembly.add_length(length)
+
+        self.profiler.begin("write_stats")
+        self.write_stats(out_dir)
+        self.write_profile(out_dir)
+
+    def index_features(self):
+        """Returns dicts of the genome's genes and of its mRNAs, each a list of features by identifier."""
+        genes_by_id = {}
+        mrnas_by_id = {}
         for seq in self.seqs:
-            seq.add_annotations_from_list(anno_list)
+            seq.index_features(genes_by_id, mrnas_by_id)
+        return genes_by_id, mrnas_by_id
 
     def trim_from_file(self, filename):
         if not os.path.isfile(filename):
@@ -232,14 +381,33 @@ class Controller(object):
         if not os.path.isfile(filename):
             sys.stderr.write("Error: " + filename + " is not a file. Nothing annotated.\n")
             return
-        annos = read_annotation_file(open(filename, 'rb'))
-        if not annos:
+        sys.stderr.write("Adding annotations to genome ...\n")
+        genes_by_id, mrnas_by_id = self.index_features()
+        reader = AnnotationReader()
+        unmatched = []
+        seen_unmatched = set()
+        with open(filename, 'rb') as anno_file:
+            for batch in reader.read(anno_file):
+                for feature_id in annotate_features(batch, genes_by_id, mrnas_by_id):
+                    if feature_id not in seen_unmatched:
+                        seen_unmatched.add(feature_id)
+                        unmatched.append(feature_id)
+        self.profiler.count("rows", reader.rows)
+        if reader.bad_rows:
+            sys.stderr.write("Warning: skipped " + str(reader.bad_rows) + " lines in " + filename +
+                             " without exactly three tab-separated columns.\n")
+        if reader.duplicates:
+            sys.stderr.write("Skipped " + str(reader.duplicates) + " repeated annotations.\n")
+        if not reader.rows:
             sys.stderr.write("Failed to read annotations from " + filename + "; no annotations added.\n")
             return
-        else:
-            sys.stderr.write("Adding annotations to genome ...\n")
-            self.add_annotations_from_list(annos)
-            sys.stderr.write("...done\n")
+        if unmatched:
+            sys.stderr.write("Warning: " + str(len(unmatched)) + " ids in " + filename +
+                             " matched no gene or mRNA: " + ", ".join(unmatched[:10]))
+            if len(unmatched) > 10:
+                sys.stderr.write(", ...")
+            sys.stderr.write("\n")
+        sys.stderr.write("...done\n")
 
     def trim_from_list(self, trimlist):
         for seq in self.seqs:
@@ -249,7 +417,7 @@ class Controller(object):
             to_trim_this_seq = sorted(to_trim_this_seq, key=lambda _entry: _entry[2], reverse=True)
             for entry in to_trim_this_seq:
                 removed_genes = seq.trim_region(entry[1], entry[2])
-                self.removed_features.extend(removed_genes)
+                self.add_removed_features(removed_genes)
                 sys.stderr.write("Trimmed " + entry[0] + " from ")
                 sys.stderr.write(str(entry[1]) + " to " + str(entry[2]) + "\n")
             self.remove_empty_features(seq)
@@ -259,12 +427,31 @@ class Controller(object):
 
     def apply_filter(self, filter_name, val, filter_mode):
         for seq in self.seqs:
-            self.filter_mgr.apply_filter(filter_name, val, filter_mode, seq)
+            # Features the filter removes aren't written out as removed, but they must not be found again
+            self.registry.remove(self.filter_mgr.apply_filter(filter_name, val, filter_mode, seq))
             self.remove_empty_features(seq)
 
+    def apply_filters(self, filter_specs):
+        """Applies a list of [filter_name, val, filter_mode] filters in a single pass per sequence."""
+        seqs = self.progress.items("filters", self.seqs, "scaffolds")
+        removed, filtered = self.filter_mgr.apply_filters(filter_specs, seqs, self.filter_report)
+        self.add_removed_features(removed)
+        # Features the filters remove aren't written out as removed, but they must not be found again
+        self.registry.remove(filtered)
+
     def fix_terminal_ns(self):
         for seq in self.seqs:
+            genes = list(seq.genes)
             seq.remove_terminal_ns()
+            # Genes in trimmed Ns are dropped without being reported as removed
+            if len(seq.genes) < len(genes):
+                remaining = set(id(gene) for gene in seq.genes)
+                self.registry.remove([gene for gene in genes if id(gene) not in remaining])
+            self.remove_empty_features(seq)
+
+    def remove_internal_stops(self):
+        for seq in self.seqs:
+            self.add_removed_features(seq.remove_mrnas_with_internal_stops(self.filter_report))
             self.remove_empty_features(seq)
 
     def fix_start_stop_codons(self):
@@ -275,7 +462,12 @@ class Controller(object):
 
     def read_fasta(self, line):
         reader = FastaReader()
-        self.seqs = reader.read(open(line, 'r'))
+        self.seqs = reader.read(self.progress.lines("read_fasta", open(line, 'r')))
+        for seq in self.seqs:
+            seq.cache = self.sequence_cache
+            self.registry.add_sequence(seq)
+            self.profiler.count("bases", len(seq.bases))
+        self.profiler.count("sequences", len(self.seqs))
 
     def read_gff(self, line, prefix):
         # Takes prefix b/c reader returns comments, invalids, ignored
@@ -283,9 +475,12 @@ class Controller(object):
         # That's kind of messy
         gffreader = GFFReader()
         reader = open(line, 'rb')
-        genes, comments, invalids, ignored = gffreader.read_file(reader)
+        genes, comments, invalids, ignored = gffreader.read_file(self.progress.lines("read_gff", reader))
         for gene in genes:
             self.add_gene(gene)
+        self.profiler.count("lines", gffreader.line_count)
+        self.profiler.count("genes", len(genes))
+        self.profiler.count("mrnas", len(gffreader.mrnas))
         # Write comments, invalid lines and ignored features
         with open(prefix + "/genome.comments.gff", 'w') as comments_file:
             for comment in comments:
@@ -301,8 +496,58 @@ class Controller(object):
 
     def remove_empty_features(self, seq):
         """Removes any empty mRNAs or genes from a seq and adds them to self.removed_features."""
-        self.removed_features.extend(seq.remove_empty_mrnas())
-        self.removed_features.extend(seq.remove_empty_genes())
+        self.add_removed_features(seq.remove_empty_mrnas(self.filter_report))
+        self.add_removed_features(seq.remove_empty_genes(self.filter_report))
+
+    def add_removed_features(self, features):
+        """Adds features taken off the genome to self.removed_features and drops them from the registry."""
+        self.removed_features.extend(features)
+        self.registry.remove(features)
+        self.profiler.count("features_removed", len(features))
+
+    def write_stats(self, out_dir):
+        """Writes genome.stats, followed by coverage, assembly stats and length distributions, and genome.lengths.json.
+
+        Also writes genome.stats.per_seq.tsv if per-sequence stats were recorded.
+        """
+        sys.stderr.write("Writing stats file to " + out_dir + "/ ...\n")
+        with open(out_dir + '/genome.stats', 'w') as stats_file:
+            for line in self.stats_mgr.summary():
+                stats_file.write(line)
+            stats_file.write("\n")
+            stats_file.write(self.stats_mgr.coverage_summary())
+            stats_file.write("\n")
+            stats_file.write(self.stats_mgr.assembly_summary())
+            stats_file.write("\n")
+            stats_file.write(self.stats_mgr.length_summary())
+        with open(out_dir + '/genome.lengths.json', 'w') as lengths_file:
+            self.stats_mgr.write_lengths_json(lengths_file)
+        if self.stats_mgr.per_seq_stats is not None:
+            with open(out_dir + '/genome.stats.per_seq.tsv', 'w') as per_seq_file:
+                self.stats_mgr.write_per_seq_tsv(per_seq_file)
+
+    def write_profile(self, out_dir):
+        """Ends profiling, writing genome.profile.json and a table of stages to stderr, if it was enabled."""
+        if not self.profiler.enabled:
+            return
+        self.profiler.end()
+        with open(out_dir + '/genome.profile.json', 'w') as profile_file:
+            self.profiler.write_json(profile_file)
+        sys.stderr.write("Profile written to " + out_dir + "/genome.profile.json\n")
+        for line in self.profiler.summary():
+            sys.stderr.write(line)
+
+    def write_filter_report(self, out_dir, report_format="tsv"):
+        """Writes the filter report to out_dir and a count per filter to stderr."""
+        filename = out_dir + "/genome.filter_report." + report_format
+        sys.stderr.write("Writing filter report to " + filename + " ...\n")
+        with open(filename, 'w') as report_file:
+            if report_format == "json":
+                self.filter_report.write_json(report_file)
+            else:
+                self.filter_report.write_tsv(report_file)
+        for line in self.filter_report.summary():
+            sys.stderr.write(line)
 
     def stats(self):
         if not self.seqs:
@@ -322,9 +567,10 @@ class Controller(object):
         # Utility methods
 
     def add_gene(self, gene):
-        for seq in self.seqs:
-            if seq.header == gene.seq_name:
-                seq.add_gene(gene)
+        seq = self.registry.get_sequence(gene.seq_name)
+        if seq is not None:
+            seq.add_gene(gene)
+            self.registry.add_gene(seq, gene)
 
     def get_locus_tag(self):
         locus_tag = ""
@@ -336,6 +582,7 @@ class Controller(object):
         return locus_tag
 
     def remove_from_list(self, bad_list):
+        """Removes the sequences, genes and mRNAs with identifiers on bad_list, looking each one up in the registry."""
         # First remove any seqs on the list
         to_remove = []
         for seq in self.seqs:
@@ -346,20 +593,40 @@ class Controller(object):
                 self.seqs.remove(seq)
                 sys.stderr.write("Warning: removing seq " + seq.header + ".\n")
                 sys.stderr.write("You must reload genome to get this sequence back.\n")
-            self.removed_features.extend(to_remove)
-        # Now pass the list down to each seq
-        for seq in self.seqs:
-            removed_from_seq = seq.remove_from_list(bad_list)
-            self.removed_features.extend(removed_from_seq)
+            self.add_removed_features(to_remove)
+        # Then genes, so that mRNAs on removed genes are no longer found
+        for bad_id in bad_list:
+            entry = self.registry.get_gene(bad_id)
+            if entry is not None:
+                seq, gene = entry
+                seq.remove_genes([gene])
+                sys.stderr.write("Removed gene " + gene.identifier + "\n")
+                self.add_removed_features([gene])
+        for bad_id in bad_list:
+            entry = self.registry.get_mrna(bad_id)
+            if entry is not None:
+                seq, gene, mrna = entry
+                gene.remove_mrnas([mrna])
+                sys.stderr.write("Removed mrna " + mrna.identifier + "\n")
+                self.add_removed_features([mrna])
 
     def contains_mrna(self, mrna_id):
-        for seq in self.seqs:
-            if seq.contains_mrna(mrna_id):
-                return True
-        return False
+        return self.registry.contains_mrna(mrna_id)
 
     def contains_gene(self, gene_id):
-        for seq in self.seqs:
-            if seq.contains_gene(gene_id):
-                return True
-        return False
+        return self.registry.contains_gene(gene_id)
+
+    def cds_to_gff(self, mrna_id):
+        """Returns the gff representation of an mRNA's CDS, or an empty string if there isn't one."""
+        entry = self.registry.get_mrna(mrna_id)
+        if entry is None or not entry[2].cds:
+            return ""
+        seq, gene, mrna = entry
+        return mrna.cds_to_gff(seq.header, gene.source)
+
+    def cds_to_tbl(self, mrna_id):
+        """Returns the tbl representation of an mRNA's CDS, or an empty string if there isn't one."""
+        entry = self.registry.get_mrna(mrna_id)
+        if entry is None or not entry[2].cds:
+            return ""
+        return entry[2].cds_to_tbl()
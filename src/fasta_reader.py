@@ -23,3 +23,29 @@ class FastaReader(object):
         # Add the last sequence
         self.seqs.append(Sequence(header, bases))
         return self.seqs
+
+
+def read_sequence_lengths(io_buffer):
+    """Returns a dict of sequence lengths by header, reading one line at a time.
+
+    Headers are cut at the first whitespace, as FastaReader does.
+    """
+    lengths = {}
+    header = None
+    for line in io_buffer:
+        if line[0] == '>':
+            header = line[1:].strip().split()[0]
+            lengths[header] = 0
+        elif header is not None:
+            lengths[header] += len(line.strip())
+    return lengths
+
+
+def read_fasta_index(io_buffer):
+    """Returns a dict of sequence lengths by name from a .fai index (as written by samtools faidx)."""
+    lengths = {}
+    for line in io_buffer:
+        fields = line.rstrip('\n').split('\t')
+        if len(fields) >= 2:
+            lengths[fields[0]] = int(fields[1])
+    return lengths
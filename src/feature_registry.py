@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from src.gene import Gene
+from src.sequence import Sequence
+from src.xrna import XRNA
+
+
+class FeatureRegistry(object):
+    """Finds sequences, genes and mRNAs anywhere in the genome by identifier in constant time.
+
+    Genes are found as (sequence, gene) and mRNAs as (sequence, gene, mRNA);
+    an mRNA's CDS and exons are reached through it. Features must be
+    registered when they are added and unregistered with remove when they
+    are taken off the genome, or lookups will find features that are gone.
+
+    An identifier is only registered once: if a second gene (or mRNA) has
+    the same identifier, the first is kept and the identifier is added to
+    self.duplicates.
+    """
+
+    def __init__(self):
+        self.sequences = {}
+        self.genes = {}
+        self.mrnas = {}
+        self.duplicates = []
+
+    def add_sequence(self, seq):
+        """Registers a sequence and any genes already on it."""
+        self.sequences[seq.header] = seq
+        for gene in seq.genes:
+            self.add_gene(seq, gene)
+
+    def add_gene(self, seq, gene):
+        """Registers a gene on seq and its mRNAs; returns False if its identifier was already registered."""
+        if gene.identifier in self.genes:
+            self.duplicates.append(gene.identifier)
+            return False
+        self.genes[gene.identifier] = (seq, gene)
+        for mrna in gene.mrnas:
+            if mrna.identifier in self.mrnas:
+                self.duplicates.append(mrna.identifier)
+            else:
+                self.mrnas[mrna.identifier] = (seq, gene, mrna)
+        return True
+
+    def remove(self, features):
+        """Unregisters a list of removed sequences, genes and mRNAs, along with everything on them.
+
+        A feature is only unregistered if it is the one registered under its
+        identifier, so removing a duplicate leaves the first one in place.
+        """
+        for feature in features:
+            if isinstance(feature, Sequence):
+                if self.sequences.get(feature.header) is feature:
+                    del self.sequences[feature.header]
+                self.remove(feature.genes)
+            elif isinstance(feature, Gene):
+                entry = self.genes.get(feature.identifier)
+                if entry is not None and entry[1] is feature:
+                    del self.genes[feature.identifier]
+                self.remove(feature.mrnas)
+            elif isinstance(feature, XRNA):
+                entry = self.mrnas.get(feature.identifier)
+                if entry is not None and entry[2] is feature:
+                    del self.mrnas[feature.identifier]
+
+    def get_sequence(self, header):
+        return self.sequences.get(header)
+
+    def get_gene(self, gene_id):
+        """Returns (sequence, gene), or None if no gene has the identifier."""
+        return self.genes.get(gene_id)
+
+    def get_mrna(self, mrna_id):
+        """Returns (sequence, gene, mRNA), or None if no mRNA has the identifier."""
+        return self.mrnas.get(mrna_id)
+
+    def contains_gene(self, gene_id):
+        return gene_id in self.genes
+
+    def contains_mrna(self, mrna_id):
+        return mrna_id in self.mrnas
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+"""A small language for combining per-mRNA conditions, e.g.
+
+    cds.length < 150 and not product
+    (exon.count == 1 or intron.shortest < 10) and gene.length > 1000
+
+Expressions are parsed once and compiled to closures over the columns of a
+TranscriptMetrics table, so any rule is evaluated in the same single pass
+as the built-in filters.
+
+Like the intron filters, intron.shortest can't be read for an mRNA whose
+exons overlap; evaluating it there raises FilterExpressionError.
+"""
+
+import operator
+import re
+
+from src.transcript_metrics import NEGATIVE_INTRON
+
+
+def shortest_intron(metrics, row):
+    """Returns an mRNA row's shortest intron, raising as XRNA.get_shortest_intron does if exons overlap."""
+    shortest = metrics.shortest_intron[row]
+    if shortest == NEGATIVE_INTRON:
+        raise FilterExpressionError("Intron with negative length on " + metrics.mrna_ids[row])
+    return shortest
+
+
+# Each metric is a function of (metrics, row) for an mRNA row
+METRICS = {
+    'cds.length': lambda m, r: m.cds_length[r],
+    'cds.present': lambda m, r: m.has_cds[r],
+    'exon.count': lambda m, r: m.exon_count[r],
+    'exon.shortest': lambda m, r: m.shortest_exon[r],
+    'exon.longest': lambda m, r: m.longest_exon[r],
+    'exon.present': lambda m, r: m.has_exon[r],
+    'intron.count': lambda m, r: max(m.exon_count[r] - 1, 0),
+    'intron.shortest': shortest_intron,
+    'intron.longest': lambda m, r: m.longest_intron[r],
+    'mrna.length': lambda m, r: m.mrna_length[r],
+    'gene.length': lambda m, r: m.gene_length[m.mrna_gene_row[r]],
+    'product': lambda m, r: m.has_product[r],
+}
+
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt,
+               '>=': operator.ge, '==': operator.eq, '!=': operator.ne}
+
+TOKEN = re.compile(r'\s*(?:(\d+)|([A-Za-z_][\w.]*)|(<=|>=|==|!=|<|>|\(|\)))')
+
+
+class FilterExpressionError(ValueError):
+    pass
+
+
+def tokenize(source):
+    """Returns a list of (kind, value) tokens; kind is 'number', 'name' or 'symbol'."""
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = TOKEN.match(source, position)
+        if not match:
+            raise FilterExpressionError("Unexpected character in filter expression at: " + source[position:])
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(('number', int(number)))
+        elif name is not None:
+            tokens.append(('name', name))
+        else:
+            tokens.append(('symbol', symbol))
+        position = match.end()
+    return tokens
+
+
+class FilterExpression(object):
+    """A parsed filter expression.
+
+    Args:
+        source: the expression text
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.position = 0
+        # Every metric the expression reads
+        self.metrics = set()
+        if not self.tokens:
+            raise FilterExpressionError("Empty filter expression")
+        self.function = self.parse_or()
+        if self.position != len(self.tokens):
+            raise FilterExpressionError("Unexpected '" + str(self.tokens[self.position][1]) +
+                                        "' in filter expression: " + source)
+        del self.tokens
+
+    def uses_gene(self):
+        """Returns True if the expression reads a metric of the mRNA's gene."""
+        return any(name.startswith('gene.') for name in self.metrics)
+
+    def evaluate(self, metrics, row):
+        """Returns a boolean for one mRNA row of a TranscriptMetrics table."""
+        return bool(self.function(metrics, row))
+
+    def mask(self, metrics):
+        """Returns a list of booleans, one per mRNA row of a TranscriptMetrics table."""
+        function = self.function
+        return [bool(function(metrics, row)) for row in xrange(len(metrics.mrna_ids))]
+
+    # Recursive descent parser; each method returns a closure of (metrics, row)
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def accept(self, kind, value):
+        if self.peek() == (kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def parse_or(self):
+        left = self.parse_and()
+        while self.accept('name', 'or'):
+            right = self.parse_and()
+            left = (lambda a, b: lambda m, r: a(m, r) or b(m, r))(left, right)
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+        while self.accept('name', 'and'):
+            right = self.parse_not()
+            left = (lambda a, b: lambda m, r: a(m, r) and b(m, r))(left, right)
+        return left
+
+    def parse_not(self):
+        if self.accept('name', 'not'):
+            operand = self.parse_not()
+            return lambda m, r: not operand(m, r)
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_operand()
+        kind, value = self.peek()
+        if kind == 'symbol' and value in COMPARISONS:
+            self.position += 1
+            compare = COMPARISONS[value]
+            right = self.parse_operand()
+            return lambda m, r: compare(left(m, r), right(m, r))
+        return left
+
+    def parse_operand(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise FilterExpressionError("Filter expression ended unexpectedly: " + self.source)
+        self.position += 1
+        if kind == 'number':
+            return lambda m, r: value
+        if kind == 'symbol' and value == '(':
+            inner = self.parse_or()
+            if not self.accept('symbol', ')'):
+                raise FilterExpressionError("Missing ')' in filter expression: " + self.source)
+            return inner
+        if kind == 'name' and value in METRICS:
+            self.metrics.add(value)
+            return METRICS[value]
+        raise FilterExpressionError("Unknown metric '" + str(value) + "' in filter expression; choose from " +
+                                    ", ".join(sorted(METRICS.keys())))
@@ -2,6 +2,7 @@
 # coding=utf-8
 
 import ast
+import sys
 
 # All the filters
 from src.filters import *
@@ -19,12 +20,97 @@ class FilterManager(object):
         self.filters['intron_longer_than'] = MaxIntronLengthFilter()
         self.filters['gene_shorter_than'] = MinGeneLengthFilter()
         self.filters['gene_longer_than'] = MaxGeneLengthFilter()
+        self.filters['expression'] = ExpressionFilter()
 
     def apply_filter(self, filter_name, val, filter_mode, seq):
-        val = ast.literal_eval(val)
-        self.filters[filter_name].arg = val
+        """Applies one filter to seq; returns the mRNAs or genes it removed, if any."""
+        if filter_name == 'expression':
+            self.filters[filter_name] = ExpressionFilter(val)
+        else:
+            self.filters[filter_name].arg = ast.literal_eval(val)
+        self.filters[filter_name].name = filter_name
         self.filters[filter_name].filter_mode = filter_mode
-        self.filters[filter_name].apply(seq)
+        return self.filters[filter_name].apply(seq)
 
     def get_filter_arg(self, filter_name):
         return self.filters[filter_name].arg
+
+    def build_filter(self, filter_name, val, filter_mode):
+        """Returns a new filter of the named type, so one type can be used in several modes at once."""
+        if filter_name != 'expression':
+            val = ast.literal_eval(val)
+        new_filter = self.filters[filter_name].__class__(val)
+        new_filter.filter_mode = filter_mode
+        new_filter.name = filter_name
+        return new_filter
+
+    def apply_filters(self, filter_specs, seqs, report=None):
+        """Applies several filters to every sequence in a single pass over each sequence's genes.
+
+        The result is the same as calling apply_filter for each spec in turn on
+        every sequence and removing empty mRNAs and genes after each: every gene
+        goes through the filters in order, and is cleaned up between them.
+        Summary lines are held back and printed filter by filter at the end;
+        with a report, each filter gets one line counting all the sequences.
+
+        Args:
+            filter_specs: a list of [filter_name, val, filter_mode] lists; for
+                the 'expression' filter, val is the expression text
+            seqs: the list of Sequences to filter
+            report: optional FilterReport in which to record every feature
+                removed, flagged or listed, instead of printing each one
+        Returns:
+            a pair of lists: the empty mRNAs and genes removed between filters,
+            in the same order that sequential application would have removed
+            them, and the mRNAs and genes the filters themselves removed
+        """
+        stages = [self.build_filter(*spec) for spec in filter_specs]
+        for stage in stages:
+            stage.messages = []
+            stage.report = report
+        removed_by_stage = [[] for _ in stages]
+        totals = [0] * len(stages)
+        filtered = []
+        for seq in seqs:
+            counts = [0] * len(stages)
+            removed_mrnas = [[] for _ in stages]
+            removed_genes = [[] for _ in stages]
+            kept_genes = []
+            for gene in seq.genes:
+                kept = True
+                for i, stage in enumerate(stages):
+                    affected = stage.apply_to_gene(gene)
+                    counts[i] += len(affected)
+                    if stage.filter_mode == "REMOVE":
+                        filtered.extend(affected)
+                    if gene.death_flagged:
+                        # Removed by a gene filter; not recorded as a removed feature
+                        kept = False
+                        break
+                    removed_mrnas[i].extend(gene.remove_empty_mrnas(report))
+                    if not gene.mrnas:
+                        if report is not None:
+                            report.add(gene.identifier, "empty_gene", "", "remove")
+                        else:
+                            sys.stderr.write("Removed empty gene " + gene.identifier + "\n")
+                        removed_genes[i].append(gene)
+                        kept = False
+                        break
+                if kept:
+                    kept_genes.append(gene)
+                else:
+                    seq.record_mutation("remove_gene", gene)
+            seq.genes = kept_genes
+            for i, stage in enumerate(stages):
+                if report is None:
+                    stage.write_summary(counts[i])
+                totals[i] += counts[i]
+                removed_by_stage[i].extend(removed_mrnas[i])
+                removed_by_stage[i].extend(removed_genes[i])
+                seq.removed_genes.extend(removed_genes[i])
+        for i, stage in enumerate(stages):
+            if report is not None:
+                stage.write_summary(totals[i])
+            for line in stage.messages:
+                print(line)
+        return [feature for removed in removed_by_stage for feature in removed], filtered
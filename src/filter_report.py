@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+
+COLUMNS = ["feature_id", "filter", "value", "action"]
+
+# Past tense of each action, for console summaries
+ACTION_WORDS = {"remove": "removed", "flag": "flagged", "list": "listed"}
+
+
+class FilterReport(object):
+    """Collects one row per feature removed, flagged or listed, to be written once at the end.
+
+    Each row is a (feature_id, filter, value, action) tuple, where filter
+    names the filter or cleanup step, value is its argument (or an empty
+    string) and action is one of "remove", "flag" or "list".
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, feature_id, filter_name, value, action):
+        self.rows.append((feature_id, filter_name, str(value), action))
+
+    def counts(self):
+        """Returns a list of [filter, value, action, count], in order of first appearance."""
+        result = []
+        index = {}
+        for row in self.rows:
+            key = row[1:]
+            if key not in index:
+                index[key] = len(result)
+                result.append([row[1], row[2], row[3], 0])
+            result[index[key]][3] += 1
+        return result
+
+    def summary(self):
+        """Returns a list of lines giving the number of features per filter and action."""
+        lines = []
+        for filter_name, value, action, count in self.counts():
+            name = filter_name + " " + value if value else filter_name
+            lines.append(name + ": " + ACTION_WORDS.get(action, action) + " " + str(count) + "\n")
+        return lines
+
+    def write_tsv(self, io_buffer):
+        io_buffer.write("\t".join(COLUMNS) + "\n")
+        for row in self.rows:
+            io_buffer.write("\t".join(row) + "\n")
+
+    def write_json(self, io_buffer):
+        json.dump([dict(zip(COLUMNS, row)) for row in self.rows], io_buffer, indent=1)
+        io_buffer.write("\n")
@@ -1,276 +1,296 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+from src.filter_expression import FilterExpression, FilterExpressionError
+from src.transcript_metrics import TranscriptMetrics
 
-# CDS
 
-class MinCDSLengthFilter(object):
-    def __init__(self, min_length=0):
-        self.arg = min_length
+class Filter(object):
+    """Base class for filters, which remove, flag or list the features that fail them.
+
+    Affected features are printed one per line, collected in self.messages,
+    or recorded in self.report, followed by a count. Subclasses say which
+    features they filter, named by noun in the count.
+    """
+
+    noun = "features"
+
+    def __init__(self, arg=0):
+        self.arg = arg
         self.filter_mode = "REMOVE"
-        return
+        self.name = self.__class__.__name__
+        # When set to a list, output lines are collected here instead of printed
+        self.messages = None
+        # When set to a FilterReport, affected features are recorded there instead of written
+        self.report = None
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.cds and mrna.cds.length() < self.arg:
-                    mrna.death_flagged = True  # Destroy the mRNA that the cds lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(mrna.identifier)
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
+    def write(self, line):
+        if self.messages is None:
+            print(line)
+        else:
+            self.messages.append(line)
+
+    def record(self, feature, action, line):
+        # Listed IDs still go to stdout, so LIST mode output can be piped
+        if self.report is None or action == "list":
+            self.write(line)
+        if self.report is not None:
+            self.report.add(feature.identifier, self.name, self.arg, action)
+
+    def write_summary(self, count):
         if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
+            self.write("\nRemoved " + str(count) + " " + self.noun)
         elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " mRNAs")
+            self.write("\nFlagged " + str(count) + " " + self.noun)
         elif self.filter_mode == "LIST":
-            print(str(count) + " mRNAs")
+            self.write(str(count) + " " + self.noun)
 
 
-class MaxCDSLengthFilter(object):
-    def __init__(self, max_length=0):
-        self.arg = max_length
-        self.filter_mode = "REMOVE"
-        return
+class MRNAFilter(Filter):
+    """Base class for filters that remove, flag or list individual mRNAs.
+
+    Subclasses implement fails(mrna) and optionally mark(mrna) to annotate
+    an mRNA that fails. The filter can be applied to a whole
+    sequence with apply(seq), or one gene at a time with apply_to_gene(gene)
+    followed by write_summary(count) once the sequence is done.
+    """
+
+    noun = "mRNAs"
+
+    def fails(self, mrna):
+        """Returns a boolean indicating whether the mRNA should be removed, flagged or listed."""
+        raise NotImplementedError
+
+    def mark(self, mrna):
+        """Annotates an mRNA that failed the filter; does nothing by default."""
+        pass
 
     def apply(self, seq):
-        count = 0
+        """Applies the filter to every gene on seq; returns the mRNAs it removed, if any."""
+        affected = []
         for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.cds and 0 < self.arg < mrna.cds.length():
-                    mrna.cds.add_annotation('gag_flag', "cds_max_length:" + str(self.arg))
-                    mrna.death_flagged = True  # Destroy the mRNA that the cds lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(mrna.identifier)
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
+            affected.extend(self.apply_to_gene(gene))
+        self.write_summary(len(affected))
+        return affected if self.filter_mode == "REMOVE" else []
+
+    def apply_to_gene(self, gene, failed=None):
+        """Applies the filter to one gene's mRNAs; returns a list of the mRNAs affected.
+
+        Args:
+            gene: the Gene whose mRNAs are filtered
+            failed: optional function of an mRNA to use instead of fails
+        """
+        failed = failed or self.fails
+        for mrna in gene.mrnas:
+            if failed(mrna):
+                self.mark(mrna)
+                mrna.death_flagged = True  # Destroy the mRNA?
+        to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
+        for mrna in to_remove:
+            self.act_on(gene, mrna)
+        if self.filter_mode == "REMOVE" and to_remove:
+            # One pass over the gene's mRNAs rather than one per removal
+            gene.remove_mrnas(to_remove)
+        for mrna in gene.mrnas:
+            mrna.death_flagged = False
+        return to_remove
+
+    def act_on(self, gene, mrna):
         if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
+            self.record(mrna, "remove", "Removing mRNA: " + mrna.identifier)
         elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " mRNAs")
+            self.record(mrna, "flag", "Flagging mRNA: " + mrna.identifier)
+            mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
         elif self.filter_mode == "LIST":
-            print(str(count) + " mRNAs")
+            self.record(mrna, "list", mrna.identifier)
 
 
-# Exon
+class GeneFilter(Filter):
+    """Base class for filters that remove, flag or list whole genes.
 
-class MinExonLengthFilter(object):
-    def __init__(self, min_length=0):
-        self.arg = min_length
-        self.filter_mode = "REMOVE"
-        return
+    Subclasses implement fails(gene) and optionally mark(gene). When applied
+    one gene at a time, a gene that should be removed is left with
+    death_flagged set; the caller drops it.
+    """
+
+    noun = "genes"
+
+    def fails(self, gene):
+        """Returns a boolean indicating whether the gene should be removed, flagged or listed."""
+        raise NotImplementedError
+
+    def mark(self, gene):
+        """Annotates a gene that failed the filter; does nothing by default."""
+        pass
 
     def apply(self, seq):
-        count = 0
+        """Applies the filter to every gene on seq; returns the genes it removed, if any."""
+        affected = []
         for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.exon and mrna.get_shortest_exon() < self.arg:
-                    mrna.exon.add_annotation("gag_flag", "exon_min_length:" + str(self.arg))
-                    mrna.death_flagged = True  # Destroy the mRNA that the exon lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(mrna.identifier)
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
+            affected.extend(self.apply_to_gene(gene))
         if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
-        elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " mRNAs")
+            for gene in affected:
+                seq.record_mutation("remove_gene", gene)
+            seq.genes = [gene for gene in seq.genes if not gene.death_flagged]
+        self.write_summary(len(affected))
+        return affected if self.filter_mode == "REMOVE" else []
+
+    def apply_to_gene(self, gene, failed=None):
+        """Applies the filter to one gene; returns [gene] if the gene was affected, else [].
+
+        Args:
+            gene: the Gene to filter
+            failed: optional function of a gene to use instead of fails
+        """
+        failed = failed or self.fails
+        if failed(gene):
+            self.mark(gene)
+            gene.death_flagged = True  # Destroy the gene?
+        if not gene.death_flagged:
+            return []
+        if self.filter_mode == "REMOVE":
+            self.record(gene, "remove", "Removing gene: " + gene.identifier)
+        else:
+            self.act_on(gene)
+            gene.death_flagged = False
+        return [gene]
+
+    def act_on(self, gene):
+        if self.filter_mode == "FLAG":
+            self.record(gene, "flag", "Flagging gene: " + gene.identifier)
+            gene.add_annotation("gag_flag", "gene_min_length:" + str(self.arg))
         elif self.filter_mode == "LIST":
-            print(str(count) + " mRNAs")
+            self.record(gene, "list", gene.identifier)
 
 
-class MaxExonLengthFilter(object):
-    def __init__(self, max_length=0):
-        self.arg = max_length
-        self.filter_mode = "REMOVE"
-        return
+# CDS
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.exon and 0 < self.arg < mrna.get_longest_exon():
-                    mrna.exon.add_annotation("gag_flag", "exon_max_length:" + str(self.arg))
-                    mrna.death_flagged = True  # Destroy the mRNA that the exon lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                else:
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
+class MinCDSLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        return mrna.cds and mrna.cds.length() < self.arg
+
+
+class MaxCDSLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        return mrna.cds and 0 < self.arg < mrna.cds.length()
+
+    def mark(self, mrna):
+        mrna.cds.add_annotation('gag_flag', "cds_max_length:" + str(self.arg))
+
+
+# Exon
+
+class MinExonLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        return mrna.exon and mrna.get_shortest_exon() < self.arg
+
+    def mark(self, mrna):
+        mrna.exon.add_annotation("gag_flag", "exon_min_length:" + str(self.arg))
+
+
+class MaxExonLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        return mrna.exon and 0 < self.arg < mrna.get_longest_exon()
+
+    def mark(self, mrna):
+        mrna.exon.add_annotation("gag_flag", "exon_max_length:" + str(self.arg))
+
+    def act_on(self, gene, mrna):
+        # Any mode other than REMOVE flags
         if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
+            self.record(mrna, "remove", "Removing mRNA: " + mrna.identifier)
         else:
-            print("\nFlagged " + str(count) + " mRNAs")
+            self.record(mrna, "flag", "Flagging mRNA: " + mrna.identifier)
+            mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
+
+    def write_summary(self, count):
+        if self.filter_mode == "REMOVE":
+            self.write("\nRemoved " + str(count) + " " + self.noun)
+        else:
+            self.write("\nFlagged " + str(count) + " " + self.noun)
 
 
 # Intron
 
-class MinIntronLengthFilter(object):
-    def __init__(self, min_length=0):
-        self.arg = min_length
-        self.filter_mode = "REMOVE"
-        return
+class MinIntronLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        if not mrna.exon:
+            return False
+        shortest = mrna.get_shortest_intron()
+        return shortest < self.arg and shortest != 0
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.exon and mrna.get_shortest_intron() < self.arg and mrna.get_shortest_intron() != 0:
-                    mrna.exon.add_annotation("gag_flag", "intron_min_length:" + str(self.arg))
-                    mrna.death_flagged = True  # Destroy the mRNA that the intron lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(mrna.identifier)
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
-        if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
-        elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " mRNAs")
-        elif self.filter_mode == "LIST":
-            print(str(count) + " mRNAs")
+    def mark(self, mrna):
+        mrna.exon.add_annotation("gag_flag", "intron_min_length:" + str(self.arg))
 
 
-class MaxIntronLengthFilter(object):
-    def __init__(self, max_length=0):
-        self.arg = max_length
-        self.filter_mode = "REMOVE"
-        return
+class MaxIntronLengthFilter(MRNAFilter):
+    def fails(self, mrna):
+        return mrna.exon and 0 < self.arg < mrna.get_longest_intron()
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            for mrna in gene.mrnas:
-                if mrna.exon and 0 < self.arg < mrna.get_longest_intron():
-                    mrna.exon.add_annotation("gag_flag", "intron_max_length:" + str(self.arg))
-                    mrna.death_flagged = True  # Destroy the mRNA that the intron lives on?
-            to_remove = [mrna for mrna in gene.mrnas if mrna.death_flagged]
-            count += len(to_remove)
-            for mrna in to_remove:
-                if self.filter_mode == "REMOVE":
-                    print("Removing mRNA: " + mrna.identifier)
-                    gene.remove_mrna(mrna.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging mRNA: " + mrna.identifier)
-                    mrna.cds.add_annotation('gag_flag', "cds_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(mrna.identifier)
-            for mrna in gene.mrnas:
-                mrna.death_flagged = False
-        if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " mRNAs")
-        elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " mRNAs")
-        elif self.filter_mode == "LIST":
-            print(str(count) + " mRNAs")
+    def mark(self, mrna):
+        mrna.exon.add_annotation("gag_flag", "intron_max_length:" + str(self.arg))
 
 
 # Gene
 
-class MinGeneLengthFilter(object):
-    def __init__(self, min_length=0):
-        self.arg = min_length
-        self.filter_mode = "REMOVE"
-        return
+class MinGeneLengthFilter(GeneFilter):
+    def fails(self, gene):
+        return gene.length() < self.arg
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            if gene.length() < self.arg:
-                gene.death_flagged = True  # Destroy the gene?
-        for gene in seq.genes:
-            if gene.death_flagged:
-                count += 1
-                if self.filter_mode == "REMOVE":
-                    print("Removing gene: " + gene.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging gene: " + gene.identifier)
-                    gene.add_annotation("gag_flag", "gene_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(gene.identifier)
-        if self.filter_mode == "REMOVE":
-            seq.genes = [gene for gene in seq.genes if not gene.death_flagged]
-        for gene in seq.genes:
-            gene.death_flagged = False
-        if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " genes")
-        elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " genes")
-        elif self.filter_mode == "LIST":
-            print(str(count) + " genes")
 
+class MaxGeneLengthFilter(GeneFilter):
+    def fails(self, gene):
+        return 0 < self.arg < gene.length()
 
-class MaxGeneLengthFilter(object):
-    def __init__(self, max_length=0):
-        self.arg = max_length
-        self.filter_mode = "REMOVE"
-        return
+    def mark(self, gene):
+        gene.add_annotation("gag_flag", "gene_max_length:" + str(self.arg))
 
-    def apply(self, seq):
-        count = 0
-        for gene in seq.genes:
-            if 0 < self.arg < gene.length():
-                gene.add_annotation("gag_flag", "gene_max_length:" + str(self.arg))
-                gene.death_flagged = True  # Destroy the gene?
-        for gene in seq.genes:
-            if gene.death_flagged:
-                count += 1
-                if self.filter_mode == "REMOVE":
-                    print("Removing gene: " + gene.identifier)
-                elif self.filter_mode == "FLAG":
-                    print("Flagging gene: " + gene.identifier)
-                    gene.add_annotation("gag_flag", "gene_min_length:" + str(self.arg))
-                elif self.filter_mode == "LIST":
-                    print(gene.identifier)
-        if self.filter_mode == "REMOVE":
-            seq.genes = [gene for gene in seq.genes if not gene.death_flagged]
-        for gene in seq.genes:
-            gene.death_flagged = False
-        if self.filter_mode == "REMOVE":
-            print("\nRemoved " + str(count) + " genes")
-        elif self.filter_mode == "FLAG":
-            print("\nFlagged " + str(count) + " genes")
-        elif self.filter_mode == "LIST":
-            print(str(count) + " genes")
+
+# Expression
+
+class ExpressionFilter(MRNAFilter):
+    """Fails mRNAs for which a filter expression is true, e.g. "cds.length < 150 and exon.count == 1".
+
+    The expression is parsed when the filter is created, so a bad expression
+    raises FilterExpressionError before any sequence is touched.
+    """
+
+    def __init__(self, arg=""):
+        super(ExpressionFilter, self).__init__(arg)
+        self.expression = FilterExpression(arg) if arg else None
+
+    def fails(self, mrna, gene=None):
+        """Returns True if the expression is true for mrna.
+
+        Args:
+            mrna: the XRNA to test
+            gene: the mRNA's parent Gene; required if the expression reads a gene metric
+        """
+        metrics = TranscriptMetrics()
+        if gene is not None:
+            metrics.add_gene(gene)
+            return self.expression.evaluate(metrics, metrics.mrna_row(mrna))
+        if self.expression.uses_gene():
+            raise FilterExpressionError("Filter expression needs the mRNA's gene: " + self.arg)
+        metrics.add_mrna(mrna)
+        return self.expression.evaluate(metrics, 0)
+
+    def mask(self, metrics):
+        return self.expression.mask(metrics)
+
+    def apply_to_gene(self, gene, failed=None):
+        if failed is None:
+            # gene.length needs the parent gene, so measure the whole gene
+            metrics = TranscriptMetrics()
+            metrics.add_gene(gene)
+            mask = self.mask(metrics)
+            failed = lambda mrna: mask[metrics.mrna_row(mrna)]
+        return super(ExpressionFilter, self).apply_to_gene(gene, failed)
+
+    def act_on(self, gene, mrna):
+        if self.filter_mode == "FLAG":
+            self.record(mrna, "flag", "Flagging mRNA: " + mrna.identifier)
+            feature = mrna.cds or mrna.exon or mrna
+            feature.add_annotation('gag_flag', "filter:" + self.arg)
+        else:
+            super(ExpressionFilter, self).act_on(gene, mrna)
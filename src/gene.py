@@ -23,6 +23,8 @@ class Gene(object):
         self.pseudo = False
         self.annotations = {} if annotations is None else annotations
         self.death_flagged = False
+        # Shared with the containing Sequence while it tracks mutations
+        self.mutations = None
 
     def __str__(self):
         """Returns string representation of a gene.
@@ -44,47 +46,63 @@ class Gene(object):
         return result
 
     def remove_mrna(self, mrna_id):
-        to_remove = None
-        for mrna in self.mrnas:
-            if mrna.identifier == mrna_id:
-                to_remove = mrna
-        if to_remove:
-            self.mrnas.remove(to_remove)
-            self.removed_mrnas.append(to_remove)
-            return True
+        # The last mRNA with a matching id is removed
+        for i in xrange(len(self.mrnas) - 1, -1, -1):
+            if self.mrnas[i].identifier == mrna_id:
+                mrna = self.mrnas.pop(i)
+                self.removed_mrnas.append(mrna)
+                if self.mutations is not None:
+                    self.mutations.append(("remove_mrna", mrna))
+                return True
         return False  # Return false if mrna wasn't removed
 
+    def remove_mrnas(self, to_remove):
+        """Removes the given mRNAs in a single pass, keeping the order of the rest.
+
+        Args:
+            to_remove: a list of mRNAs belonging to this gene
+        """
+        doomed = set(id(mrna) for mrna in to_remove)
+        self.mrnas[:] = [mrna for mrna in self.mrnas if id(mrna) not in doomed]
+        self.removed_mrnas.extend(to_remove)
+        if self.mutations is not None:
+            self.mutations.extend([("remove_mrna", mrna) for mrna in to_remove])
+
     def remove_mrnas_from_list(self, bad_mrnas):
-        to_remove = []
-        for mrna in self.mrnas:
-            if mrna.identifier in bad_mrnas:
-                to_remove.append(mrna)
+        bad_mrnas = set(bad_mrnas)
+        to_remove = [mrna for mrna in self.mrnas if mrna.identifier in bad_mrnas]
         if to_remove:
+            self.remove_mrnas(to_remove)
             for mrna in to_remove:
-                self.mrnas.remove(mrna)
                 sys.stderr.write("Removed mrna " + mrna.identifier + "\n")
-            self.removed_mrnas.extend(to_remove)
         return to_remove
 
-    def remove_empty_mrnas(self):
+    def remove_empty_mrnas(self, report=None):
         """Removes mRNAs with no exon or CDS.
+
+        Args:
+            report: optional FilterReport to record removals in; if None,
+                each removal is written to stderr
         """
         to_remove = []
         for mrna in self.mrnas:
             if not mrna.cds and not mrna.exon:
-                to_remove.append(mrna)
-                sys.stderr.write("Removed empty mrna " + mrna.identifier + "\n")
+                reason = "empty_mrna"
             elif mrna.rna_type == "mRNA" and not mrna.cds:
-                to_remove.append(mrna)
-                sys.stderr.write("Removed mrna " + mrna.identifier + " with no cds\n")
+                reason = "no_cds"
             elif not mrna.exon:
-                to_remove.append(mrna)
-                sys.stderr.write("Removed mrna " + mrna.identifier + " with no exon\n")
+                reason = "no_exon"
+            else:
+                continue
+            to_remove.append(mrna)
+            if report is not None:
+                report.add(mrna.identifier, reason, "", "remove")
+            elif reason == "empty_mrna":
+                sys.stderr.write("Removed empty mrna " + mrna.identifier + "\n")
+            else:
+                sys.stderr.write("Removed mrna " + mrna.identifier + " with " + reason.replace("_", " ") + "\n")
         if to_remove:
-            for mrna in to_remove:
-                self.mrnas.remove(mrna)
-
-            self.removed_mrnas.extend(to_remove)
+            self.remove_mrnas(to_remove)
         return to_remove
 
     def add_annotation(self, key, value):
@@ -208,17 +226,19 @@ class Gene(object):
             total += mrna.get_num_introns()
         return total
 
-    def create_starts_and_stops(self, seq_object):
+    def create_starts_and_stops(self, seq_helper):
         """Creates start and stop codons on child mRNAs.
 
         Args:
-            seq_object: the actual Sequence containing the gene. I know, I know.
+            seq_helper: a SeqHelper for the Sequence containing the gene
         """
         for mrna in self.mrnas:
-            mrna.create_start_and_stop_if_necessary(seq_object, self.strand)
+            mrna.create_start_and_stop_if_necessary(seq_helper, self.strand)
 
     def adjust_indices(self, n, start_index=1):
         """Adds 'n' to both indices, checking to ensure that they fall after an optional start index"""
+        if self.mutations is not None:
+            self.mutations.append(("rescan", None))
         if self.indices[0] >= start_index:
             self.indices = [i + n for i in self.indices]
         elif self.indices[1] >= start_index:
@@ -243,12 +263,25 @@ class Gene(object):
                     results["no_stop_no_start"] += 1
         return results
 
-    def remove_mrnas_with_internal_stops(self, seq_helper):
-        """Removes child mRNAs that contain internal stop codons."""
+    def remove_mrnas_with_internal_stops(self, stop_finder, report=None):
+        """Removes child mRNAs that contain internal stop codons; returns a list of removed mRNAs.
+
+        Args:
+            stop_finder: a SeqHelper or StopCodonIndex for the Sequence containing the gene
+            report: optional FilterReport to record removals in; if None,
+                each removal is written to stderr
+        """
+        to_remove = []
         for mrna in self.mrnas:
-            if seq_helper.mrna_contains_internal_stop(mrna):
-                mrna.death_flagged = True
-        self.mrnas = [m for m in self.mrnas if not m.death_flagged]
+            if stop_finder.mrna_contains_internal_stop(mrna):
+                to_remove.append(mrna)
+                if report is not None:
+                    report.add(mrna.identifier, "internal_stop", "", "remove")
+                else:
+                    sys.stderr.write("Removed mrna " + mrna.identifier + " with internal stop\n")
+        if to_remove:
+            self.remove_mrnas(to_remove)
+        return to_remove
 
     def contains_mrna(self, mrna_id):
         """Returns a boolean indicating whether gene contains an mRNA with the given id."""
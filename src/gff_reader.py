@@ -58,6 +58,12 @@ class GFFReader(object):
         self.mrnas = {}
         self.orphans = []
         self.skipped_features = 0
+        self.line_count = 0
+        # Identifiers of genes and mRNAs seen more than once; only the first is kept
+        self.duplicate_ids = []
+        # Identifiers of ignored genes and RNAs; features that name one of
+        # them as parent after it was ignored are ignored too
+        self.ignored_ids = set()
 
     @staticmethod
     def validate_line(line):
@@ -231,91 +237,122 @@ class GFFReader(object):
         """
         ltype = self.line_type(line)
         if ltype == 'gene' or ltype == 'pseudogene':
-            self.process_gene_line(line, ltype)
-            return True
+            return self.process_gene_line(line, ltype)
         elif (ltype == 'mRNA' or ltype == 'tRNA' or ltype == 'rRNA' or
               ltype == 'ncRNA' or ltype == 'miRNA' or ltype == 'snRNA'):
-            self.process_rna_line(line, ltype)
-            return True
+            return self.process_rna_line(line, ltype)
         elif ltype == 'CDS':
-            self.process_cds_line(line)
-            return True
+            return self.process_cds_line(line)
         elif ltype == 'exon':
-            self.process_exon_line(line)
-            return True
+            return self.process_exon_line(line)
         elif ltype == 'start_codon' or ltype == 'stop_codon':
-            self.process_other_feature_line(line)
-            return True
+            return self.process_other_feature_line(line)
         else:
             self.skipped_features += 1
             return False
 
     def process_gene_line(self, line, gene_type):
-        """Extracts arguments from a line and instantiates a Gene object."""
+        """Extracts arguments from a line and instantiates a Gene object.
+
+        Returns False if a gene with the same identifier was already read.
+        """
         kwargs = self.extract_gene_args(line)
         if not kwargs:
-            return
+            return True
         gene_id = kwargs['identifier']
+        if gene_id in self.genes:
+            self.duplicate_ids.append(gene_id)
+            self.ignored_ids.add(gene_id)
+            return False
         # noinspection PyArgumentList
         gene = Gene(**kwargs)
         if gene_type == 'pseudogene':
             gene.pseudo = True
         self.genes[gene_id] = gene
+        return True
 
     def process_rna_line(self, line, rna_type):
-        """Extracts arguments from a line and instantiates an XRNA object."""
+        """Extracts arguments from a line and instantiates an XRNA object.
+
+        Returns False if an RNA with the same identifier was already read,
+        or if its parent gene was ignored.
+        """
         kwargs = self.extract_mrna_args(line)
         if not kwargs:
-            return
+            return True
         kwargs["rna_type"] = rna_type
         mrna_id = kwargs['identifier']
+        if mrna_id in self.mrnas or kwargs.get('parent_id') in self.ignored_ids:
+            if mrna_id in self.mrnas:
+                self.duplicate_ids.append(mrna_id)
+            self.ignored_ids.add(mrna_id)
+            return False
         # noinspection PyArgumentList
         self.mrnas[mrna_id] = XRNA(**kwargs)
+        return True
 
     def process_cds_line(self, line):
-        """Extracts arguments from a line and adds them to a CDS, or makes a new one."""
+        """Extracts arguments from a line and adds them to a CDS, or makes a new one.
+
+        Returns False if the parent RNA was ignored.
+        """
         kwargs = self.extract_cds_args(line)
         if not kwargs:
-            return
+            return True
         parent_id = kwargs['parent_id']
+        if parent_id in self.ignored_ids:
+            return False
         if parent_id not in self.mrnas:
             self.orphans.append(line)
-            return
+            return True
         parent_mrna = self.mrnas[parent_id]
         if parent_mrna.cds:
             self.update_cds(line, parent_mrna.cds)
         else:
             # noinspection PyArgumentList
             parent_mrna.cds = CDS(**kwargs)
+        return True
 
     def process_exon_line(self, line):
-        """Extracts arguments from a line and adds them to a Exon, or makes a new one."""
+        """Extracts arguments from a line and adds them to a Exon, or makes a new one.
+
+        Returns False if the parent RNA was ignored.
+        """
         kwargs = self.extract_exon_args(line)
         if not kwargs:
-            return
+            return True
         parent_id = kwargs['parent_id']
+        if parent_id in self.ignored_ids:
+            return False
         if parent_id not in self.mrnas:
             self.orphans.append(line)
-            return
+            return True
         parent_mrna = self.mrnas[parent_id]
         if parent_mrna.exon:
             self.update_exon(line, parent_mrna.exon)
         else:
             # noinspection PyArgumentList
             parent_mrna.exon = Exon(**kwargs)
+        return True
 
     def process_other_feature_line(self, line):
-        """Extracts arguments from a line and instantiates a GenePart from them."""
+        """Extracts arguments from a line and instantiates a GenePart from them.
+
+        Returns False if the parent RNA was ignored.
+        """
         kwargs = self.extract_other_feature_args(line)
         if not kwargs:
-            return
+            return True
         parent_id = kwargs['parent_id']
+        if parent_id in self.ignored_ids:
+            return False
         if parent_id not in self.mrnas:
             self.orphans.append(line)
-            return
+            return True
         parent_mrna = self.mrnas[parent_id]
         # noinspection PyArgumentList
         parent_mrna.other_features.append(GenePart(**kwargs))
+        return True
 
     def read_file(self, reader):
         """GFFReader's public method, takes a reader, returns list of Genes,
@@ -333,6 +370,7 @@ class GFFReader(object):
         # First pass, pulling out all genes and mRNAs
         #  and placing child features if possible
         for line in reader:
+            self.line_count += 1
             if len(line) == 0 or line.startswith('#'):
                 comments.append(line)
                 continue
@@ -349,7 +387,8 @@ class GFFReader(object):
         # preceded their parents in the first pass
         orphans = copy.deepcopy(self.orphans)
         for splitline in orphans:
-            self.process_line(splitline)
+            if not self.process_line(splitline):
+                ignored.append("\t".join(splitline))
 
         # Add mRNAs to their parent genes
         for mrna in self.mrnas.values():
@@ -358,4 +397,11 @@ class GFFReader(object):
 
         if self.skipped_features > 0:
             sys.stderr.write("Warning: skipped " + str(self.skipped_features) + " uninteresting features.\n")
+        if self.duplicate_ids:
+            sys.stderr.write("Warning: ignored " + str(len(self.duplicate_ids)) + " genes and RNAs with the " +
+                             "same ID as an earlier one, and the features under them: " +
+                             ", ".join(self.duplicate_ids[:10]))
+            if len(self.duplicate_ids) > 10:
+                sys.stderr.write(", ...")
+            sys.stderr.write("\n")
         return self.genes.values(), comments, invalid, ignored
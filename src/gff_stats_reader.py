@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import sys
+from src.gff_reader import GFFReader
+from src.stats_accumulator import StatsAccumulator
+
+GENE_TYPES = ['gene', 'pseudogene']
+RNA_TYPES = ['mRNA', 'tRNA', 'rRNA', 'ncRNA', 'miRNA', 'snRNA']
+
+
+class GFFStatsReader(object):
+    """Computes per-sequence stats in one pass over a GFF, without building Genes and mRNAs.
+
+    Only the indices the stats depend on are kept, and only for the sequence
+    currently being read; they are turned into stats and dropped as soon as
+    the next sequence's features begin. Lines are validated and matched to
+    their parents as GFFReader does, so the stats are the same as those of
+    the genome GFFReader would build.
+
+    The GFF should have each sequence's features together, as GAG writes
+    them. Features split between several runs of lines are counted once per
+    run, so genes overlapping across runs aren't counted as overlapping.
+    As in GFFReader, only the first gene or RNA with a given ID is kept, and
+    features naming an ignored gene or RNA as parent after it are ignored too.
+
+    Memory is constant in the size of the genome except for the sets of
+    gene and RNA IDs, which are kept for the whole file so that duplicates on
+    different sequences are found as GFFReader finds them; they grow with
+    the number of genes and RNAs, but hold only the ID strings.
+
+    Args:
+        sequence_lengths: a dict of sequence lengths by header; features on
+            other sequences are ignored, as when loading a genome
+    """
+
+    def __init__(self, sequence_lengths):
+        self.sequence_lengths = sequence_lengths
+        self.finished = set()
+        self.skipped_features = 0
+        # Every gene and RNA ID seen so far, on any sequence
+        self.gene_ids = set()
+        self.mrna_ids = set()
+        self.ignored_ids = set()
+        self.start_sequence(None)
+
+    def start_sequence(self, seq_name):
+        self.seq_name = seq_name
+        # Gene indices by gene id, and (gene id, indices) by mRNA id
+        self.genes = {}
+        self.mrnas = {}
+        # Child features by parent mRNA id
+        self.cds = {}
+        self.exons = {}
+        self.codons = {}
+        # (type, parent id, indices) of child features read before their parent mRNA
+        self.orphans = []
+
+    def read(self, reader):
+        """Yields a (header, stats, length distributions) tuple for each sequence, including those without features."""
+        for line in reader:
+            if len(line) == 0 or line.startswith('#'):
+                continue
+            for fields in GFFReader.validate_line(line):
+                if fields[0] != self.seq_name:
+                    if self.seq_name is not None:
+                        for result in self.finish_sequence():
+                            yield result
+                    if fields[0] in self.finished:
+                        sys.stderr.write("Warning: features on " + fields[0] + " are not together in the gff; " +
+                                         "overlapping genes between them won't be counted.\n")
+                    self.start_sequence(fields[0])
+                self.process_line(fields)
+        for result in self.finish_sequence():
+            yield result
+        for header, length in self.sequence_lengths.items():
+            if header not in self.finished:
+                accumulator = StatsAccumulator()
+                yield header, accumulator.stats(length), accumulator.length_distributions()
+        if self.skipped_features > 0:
+            sys.stderr.write("Warning: skipped " + str(self.skipped_features) + " uninteresting features.\n")
+
+    def process_line(self, fields):
+        ltype = fields[2]
+        if ltype in GENE_TYPES or ltype in RNA_TYPES or ltype in ['CDS', 'exon', 'start_codon', 'stop_codon']:
+            attribs = GFFReader.parse_attributes(fields[8])
+            if not attribs:
+                return
+        else:
+            self.skipped_features += 1
+            return
+        indices = [int(fields[3]), int(fields[4])]
+        if ltype in GENE_TYPES:
+            if attribs['identifier'] in self.gene_ids:
+                self.ignored_ids.add(attribs['identifier'])
+            else:
+                self.gene_ids.add(attribs['identifier'])
+                self.genes[attribs['identifier']] = indices
+            return
+        parent_id = attribs.get('parent_id')
+        if parent_id is None:
+            return
+        if parent_id in self.ignored_ids:
+            if ltype in RNA_TYPES:
+                self.ignored_ids.add(attribs['identifier'])
+            return
+        if ltype in RNA_TYPES:
+            if attribs['identifier'] in self.mrna_ids:
+                self.ignored_ids.add(attribs['identifier'])
+            else:
+                self.mrna_ids.add(attribs['identifier'])
+                self.mrnas[attribs['identifier']] = (parent_id, indices)
+        elif parent_id not in self.mrna_ids:
+            # Placed once the sequence is read, like GFFReader's second pass
+            self.orphans.append((ltype, parent_id, indices))
+        else:
+            self.add_child(ltype, parent_id, indices)
+
+    def add_child(self, ltype, parent_id, indices):
+        if ltype == 'CDS':
+            self.cds.setdefault(parent_id, []).append(indices)
+        elif ltype == 'exon':
+            self.exons.setdefault(parent_id, []).append(indices)
+        else:
+            self.codons.setdefault(parent_id, set()).add(ltype)
+
+    def finish_sequence(self):
+        """Returns a list holding the current sequence's read result, or an empty list if it's unknown."""
+        if self.seq_name not in self.sequence_lengths:
+            return []
+        # The sequence's length is only counted with its first run of features
+        length = 0 if self.seq_name in self.finished else self.sequence_lengths[self.seq_name]
+        self.finished.add(self.seq_name)
+        for ltype, parent_id, indices in self.orphans:
+            if parent_id not in self.ignored_ids:
+                self.add_child(ltype, parent_id, indices)
+        mrna_rows = dict((gene_id, []) for gene_id in self.genes)
+        for mrna_id, (gene_id, indices) in self.mrnas.items():
+            if gene_id not in mrna_rows:
+                continue
+            cds = self.cds.get(mrna_id)
+            exons = self.exons.get(mrna_id)
+            codons = self.codons.get(mrna_id, ())
+            # Same tuple as stats_accumulator.mrna_row
+            mrna_rows[gene_id].append((mrna_id, indices, sorted(cds) if cds else None,
+                                       sorted(exons) if exons else None,
+                                       'start_codon' in codons, 'stop_codon' in codons))
+        accumulator = StatsAccumulator()
+        for gene_id, indices in self.genes.items():
+            accumulator.add_gene_row(indices, mrna_rows[gene_id])
+        return [(self.seq_name, accumulator.stats(length), accumulator.length_distributions())]
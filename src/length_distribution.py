@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import bisect
+import math
+
+DISTRIBUTION_TYPES = ["gene", "mRNA", "exon", "intron", "CDS"]
+
+QUANTILES = [("p5", 0.05), ("median", 0.5), ("p95", 0.95)]
+
+# Each bin used for quantiles is GAMMA times as wide as the one before, so a
+# quantile is within 1% of the true length (and exact below 50, or wherever
+# a bin has only seen one length)
+GAMMA = 1.02
+LOG_GAMMA = math.log(GAMMA)
+
+# Lower bounds of the histogram bins; the last bin has no upper bound
+HISTOGRAM_EDGES = [1, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000]
+
+
+def bin_index(length):
+    return int(math.ceil(math.log(length) / LOG_GAMMA))
+
+
+def bin_value(index):
+    """Returns the length that stands for every length in a bin."""
+    return int(round(2 * GAMMA ** index / (GAMMA + 1)))
+
+
+def histogram_label(i):
+    if i + 1 < len(HISTOGRAM_EDGES):
+        return str(HISTOGRAM_EDGES[i]) + "-" + str(HISTOGRAM_EDGES[i + 1] - 1)
+    return str(HISTOGRAM_EDGES[i]) + "+"
+
+
+class LengthDistribution(object):
+    """Counts of feature lengths in bins, from which quantiles and a histogram are read.
+
+    Only a count per bin is kept, so memory doesn't grow with the number of
+    features, and distributions for different sequences (or from different
+    processes) are combined by adding their counts with merge.
+    """
+
+    def __init__(self):
+        self.count = 0
+        # Counts, and shortest and longest lengths, by bin_index, for quantiles
+        self.bins = {}
+        self.bin_bounds = {}
+        # Counts by HISTOGRAM_EDGES bin
+        self.histogram = [0] * len(HISTOGRAM_EDGES)
+
+    def add(self, length, count=1):
+        """Adds count features of the given length, which must be at least 1."""
+        self.count += count
+        index = bin_index(length)
+        self.bins[index] = self.bins.get(index, 0) + count
+        self.add_bounds(index, (length, length))
+        self.histogram[bisect.bisect_right(HISTOGRAM_EDGES, length) - 1] += count
+
+    def merge(self, other):
+        self.count += other.count
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+            self.add_bounds(index, other.bin_bounds[index])
+        for i, count in enumerate(other.histogram):
+            self.histogram[i] += count
+
+    def add_bounds(self, index, bounds):
+        if index in self.bin_bounds:
+            low, high = self.bin_bounds[index]
+            self.bin_bounds[index] = (min(low, bounds[0]), max(high, bounds[1]))
+        else:
+            self.bin_bounds[index] = bounds
+
+    def quantile(self, fraction):
+        """Returns the length at the given fraction (0 to 1) of the sorted lengths, or 0 if empty."""
+        if not self.count:
+            return 0
+        rank = int(fraction * (self.count - 1))
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                low, high = self.bin_bounds[index]
+                return min(max(bin_value(index), low), high)
+
+    def histogram_rows(self):
+        """Returns a list of (label, count), one per HISTOGRAM_EDGES bin."""
+        return [(histogram_label(i), count) for i, count in enumerate(self.histogram)]
+
+    def to_dict(self):
+        result = {"count": self.count,
+                  "histogram": [{"bin": label, "count": count} for label, count in self.histogram_rows()]}
+        for name, fraction in QUANTILES:
+            result[name] = self.quantile(fraction)
+        return result
+
+
+def new_distributions():
+    """Returns an empty LengthDistribution for each of DISTRIBUTION_TYPES."""
+    return dict((feature_type, LengthDistribution()) for feature_type in DISTRIBUTION_TYPES)
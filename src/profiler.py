@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb():
+    """Returns the largest resident set size of this process so far in MB, or None where it can't be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, OS X bytes
+    if sys.platform == 'darwin':
+        return round(peak / 1048576.0, 1)
+    return round(peak / 1024.0, 1)
+
+
+def current_rss_mb():
+    """Returns the resident set size of this process now in MB, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            pages = int(statm.read().split()[1])
+    except (IOError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1048576.0
+
+
+def page_faults():
+    """Returns the number of page faults this process has had, or None where it can't be read.
+
+    Each fault is (mostly) the first touch of a page of newly allocated memory.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_minflt + usage.ru_majflt
+
+
+def cpu_seconds():
+    times = os.times()
+    return times[0] + times[1]
+
+
+class Profiler(object):
+    """Records wall time, CPU time, memory and counts for each stage of a run.
+
+    A stage lasts from its begin until the next begin or end, so stages
+    are marked in order without wrapping them in blocks. Nothing is
+    recorded until enable is called, so an unprofiled run only pays for
+    the method calls.
+
+    Besides the peak memory so far, each stage records how much the
+    resident memory (on Linux) grew or shrank during it and how many page
+    faults it caused, which shows which stages allocate and hold on to
+    memory even when an earlier stage set the peak. Memory is read outside
+    the timed part of each stage, and costs the same whatever the heap size.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = []
+        self.current = None
+
+    def enable(self):
+        self.enabled = True
+
+    def begin(self, name):
+        """Ends the current stage, if any, and starts a new one."""
+        if not self.enabled:
+            return
+        self.end()
+        self.current = {"stage": name, "counts": {},
+                        "rss": current_rss_mb(), "faults": page_faults()}
+        self.current["cpu"] = cpu_seconds()
+        self.current["wall"] = time.time()
+
+    def count(self, name, value):
+        """Adds value to a count (e.g. lines or bytes read) for the current stage."""
+        if self.current is not None:
+            counts = self.current["counts"]
+            counts[name] = counts.get(name, 0) + value
+
+    def end(self):
+        """Ends the current stage, if any."""
+        if self.current is None:
+            return
+        stage = self.current
+        self.current = None
+        stage["wall_seconds"] = round(time.time() - stage.pop("wall"), 3)
+        stage["cpu_seconds"] = round(cpu_seconds() - stage.pop("cpu"), 3)
+        stage["peak_rss_mb"] = peak_rss_mb()
+        rss = stage.pop("rss")
+        rss_now = current_rss_mb()
+        stage["rss_change_mb"] = None if rss is None or rss_now is None else round(rss_now - rss, 1)
+        faults = stage.pop("faults")
+        stage["page_faults"] = None if faults is None else page_faults() - faults
+        self.stages.append(stage)
+
+    def summary(self):
+        """Returns a table of the recorded stages as a list of lines."""
+        lines = ["%-24s%12s%12s%16s%14s%12s  %s\n" % ("Stage", "Wall (s)", "CPU (s)", "Peak RSS (MB)",
+                                                    "RSS +/- (MB)", "Page faults", "Counts")]
+        for stage in self.stages:
+            counts = ", ".join(name + "=" + str(stage["counts"][name]) for name in sorted(stage["counts"]))
+            peak = stage["peak_rss_mb"]
+            change = stage["rss_change_mb"]
+            faults = stage["page_faults"]
+            line = "%-24s%12.3f%12.3f%16s%14s%12s  %s" % (stage["stage"], stage["wall_seconds"], stage["cpu_seconds"],
+                                                         "-" if peak is None else peak,
+                                                         "-" if change is None else "%+.1f" % change,
+                                                         "-" if faults is None else faults, counts)
+            lines.append(line.rstrip() + "\n")
+        total_wall = sum(stage["wall_seconds"] for stage in self.stages)
+        total_cpu = sum(stage["cpu_seconds"] for stage in self.stages)
+        lines.append("%-24s%12.3f%12.3f\n" % ("Total", total_wall, total_cpu))
+        return lines
+
+    def write_json(self, io_buffer):
+        json.dump(self.stages, io_buffer, indent=1, sort_keys=True)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import os
+import sys
+import time
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+class ProgressReporter(object):
+    """Reports how far a long step has got, with its rate and an ETA, while it runs.
+
+    A step is tracked by wrapping what it iterates over: lines of a file
+    with lines, or sequences with items. At most one report per interval
+    seconds is written to stream, as a line of text or, for a job
+    scheduler, one json object per line. With no format, the iterables
+    are returned as they are, so nothing is tracked and nothing is spent.
+
+    Args:
+        output_format: "text", "json", or None to report nothing
+        interval: the least number of seconds between reports on a step
+    """
+
+    def __init__(self, output_format=None, stream=sys.stderr, interval=5.0):
+        self.output_format = output_format
+        self.stream = stream
+        self.interval = interval
+
+    def lines(self, stage, io_buffer):
+        """Yields the lines of io_buffer, reporting lines and bytes per second, and an ETA from the file's size."""
+        if self.output_format is None:
+            return io_buffer
+        total_bytes = None
+        try:
+            total_bytes = os.fstat(io_buffer.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            pass
+        return self.track(stage, io_buffer, "lines", total_bytes, None, 256)
+
+    def items(self, stage, items, unit):
+        """Yields each of a list of items (e.g. sequences), reporting items per second and an ETA."""
+        if self.output_format is None:
+            return items
+        return self.track(stage, items, unit, None, len(items), 1)
+
+    def track(self, stage, iterable, unit, total_bytes, total, check_every):
+        """Yields from iterable, checking every check_every items whether a report is due."""
+        start = time.time()
+        next_report = start + self.interval
+        count = 0
+        byte_count = 0
+        reported = False
+        for item in iterable:
+            count += 1
+            if total_bytes is not None:
+                byte_count += len(item)
+            # Lines are too quick to check the clock after every one
+            if count % check_every == 0 and time.time() >= next_report:
+                self.report(stage, unit, count, total, byte_count, total_bytes, time.time() - start, False)
+                next_report = time.time() + self.interval
+                reported = True
+            yield item
+        # Quick steps are only reported in the json stream
+        if reported or self.output_format == "json":
+            self.report(stage, unit, count, total, byte_count, total_bytes, time.time() - start, True)
+
+    def report(self, stage, unit, count, total, byte_count, total_bytes, elapsed, done):
+        rate = count / elapsed if elapsed > 0 else 0.0
+        byte_rate = byte_count / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if not done:
+            if total_bytes and byte_rate > 0:
+                eta = max(total_bytes - byte_count, 0) / byte_rate
+            elif total and rate > 0:
+                eta = (total - count) / rate
+        if self.output_format == "json":
+            event = {"event": "done" if done else "progress", "stage": stage, "unit": unit, "count": count,
+                     "elapsed_seconds": round(elapsed, 1), "per_second": round(rate, 1)}
+            if total is not None:
+                event["total"] = total
+            if total_bytes is not None:
+                event.update({"bytes": byte_count, "total_bytes": total_bytes,
+                              "bytes_per_second": round(byte_rate, 1)})
+            if eta is not None:
+                event["eta_seconds"] = round(eta, 1)
+            self.stream.write(json.dumps(event, sort_keys=True) + "\n")
+        else:
+            message = "%s: %d %s" % (stage, count, unit)
+            if total:
+                message += " of %d" % total
+            if total_bytes:
+                message += ", %.1f of %.1f MB" % (byte_count / 1048576.0, total_bytes / 1048576.0)
+            message += ", %.0f %s/s" % (rate, unit)
+            if total_bytes is not None:
+                message += ", %.1f MB/s" % (byte_rate / 1048576.0)
+            if done:
+                message += ", done in " + format_seconds(elapsed)
+            elif eta is not None:
+                message += ", ETA " + format_seconds(eta)
+            self.stream.write(message + "\n")
+        self.stream.flush()
@@ -1,20 +1,26 @@
 #!/usr/bin/env python
 # coding=utf-8
 
-from src.translator import translate, reverse_complement, contains_internal_stop
+from src.translator import reverse_complement_in_place, translate_in_place, contains_internal_stop
 
 
 class SeqHelper(object):
-    def __init__(self, bases):
+    def __init__(self, bases, cache=None, seq_key=None):
+        """Args:
+            bases: the full sequence of the scaffold
+            cache: optional SequenceCache shared between helpers
+            seq_key: (header, version) of the Sequence that owns bases; required with a cache
+        """
         self.full_sequence = bases
+        self.cache = cache
+        self.seq_key = seq_key
 
     def mrna_contains_internal_stop(self, mrna):
         if not mrna.cds:
             return False
-        strand = mrna.strand
-        indices = mrna.cds.indices
-        sequence = self.get_sequence_from_indices(strand, indices)
-        return contains_internal_stop(sequence, strand)
+        # Sequence comes back already reverse complemented for '-' strand
+        sequence = self.get_cds_sequence(mrna)
+        return contains_internal_stop(sequence, '+')
 
     def mrna_to_fasta(self, mrna):
         """Writes a two-line fasta-style entry consisting of all exonic sequence."""
@@ -22,9 +28,7 @@ class SeqHelper(object):
             return ""
         identifier = ">" + mrna.identifier
         metadata = "ID=" + mrna.identifier + "|Parent=" + mrna.parent_id + "|Name=" + mrna.name
-        strand = mrna.strand
-        indices = mrna.exon.indices
-        return self.id_and_indices_to_fasta(identifier, strand, indices, metadata)
+        return identifier + " " + metadata + "\n" + self.get_mrna_sequence(mrna) + "\n"
 
     def mrna_to_cds_fasta(self, mrna):
         """Writes a two-line fasta-style entry consisting of all CDS sequence."""
@@ -32,9 +36,7 @@ class SeqHelper(object):
             return ""
         identifier = ">CDS|" + mrna.identifier
         metadata = "ID=" + mrna.identifier + "|Parent=" + mrna.parent_id + "|Name=" + mrna.name
-        strand = mrna.strand
-        indices = mrna.cds.indices
-        return self.id_and_indices_to_fasta(identifier, strand, indices, metadata)
+        return identifier + " " + metadata + "\n" + self.get_cds_sequence(mrna) + "\n"
 
     def mrna_to_protein_fasta(self, mrna):
         """Writes a two-line fasta-style entry consisting of the translation of CDS sequence."""
@@ -42,18 +44,56 @@ class SeqHelper(object):
             return ""
         identifier = ">protein|" + mrna.identifier
         metadata = "ID=" + mrna.identifier + "|Parent=" + mrna.parent_id + "|Name=" + mrna.name
+        return identifier + " " + metadata + "\n" + self.get_protein_sequence(mrna) + "\n"
+
+    def get_mrna_sequence(self, mrna):
+        """Returns the spliced exonic sequence of an mRNA, read on its own strand."""
+        return self.cached(mrna, 'mrna',
+                           lambda: self.get_sequence_from_indices(mrna.strand, mrna.exon.indices))
+
+    def get_cds_sequence(self, mrna):
+        """Returns the spliced CDS sequence of an mRNA, read on its own strand."""
+        return self.cached(mrna, 'cds',
+                           lambda: self.get_sequence_from_indices(mrna.strand, mrna.cds.indices))
+
+    def get_cds_sequence_on_strand(self, mrna, strand):
+        """Returns the spliced CDS sequence of an mRNA read on strand, leaving out any
+        segment that runs past the end of the sequence (as Sequence.get_subseq does).
+        """
+        seq_length = len(self.full_sequence)
+        if strand == mrna.strand and all(index_pair[1] <= seq_length for index_pair in mrna.cds.indices):
+            return self.get_cds_sequence(mrna)
+        indices = [index_pair for index_pair in mrna.cds.indices if index_pair[1] <= seq_length]
+        return self.get_sequence_from_indices(strand, indices)
+
+    def get_protein_sequence(self, mrna):
+        """Returns the translation of an mRNA's CDS, taking the phase of its first codon into account."""
+        return self.cached(mrna, 'protein', lambda: self.translate_cds(mrna))
+
+    def translate_cds(self, mrna):
         strand = mrna.strand
-        indices = mrna.cds.indices
-        untranslated = self.get_sequence_from_indices(strand, indices)
         # Take phase into account
-        if strand is "+":
+        if strand == "+":
             ph = mrna.cds.get_phase(0)
-        elif strand is "-":
+        elif strand == "-":
             ph = mrna.cds.get_phase(-1)
         else:
             ph = 0
-        untranslated = untranslated[ph:]
-        return identifier + " " + metadata + "\n" + translate(untranslated, "+") + "\n"
+        buf = bytearray(self.get_cds_sequence(mrna))
+        del buf[:ph]
+        translate_in_place(buf)
+        return str(buf)
+
+    def cached(self, mrna, kind, compute):
+        """Returns a derived sequence from the cache, computing and storing it if missing."""
+        if self.cache is None:
+            return compute()
+        key = (self.seq_key, mrna.identifier, mrna.version, kind)
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.put(key, value)
+        return value
 
     def id_and_indices_to_fasta(self, identifier, strand, indices, metadata=None):
         result = identifier
@@ -65,11 +105,27 @@ class SeqHelper(object):
         return result
 
     def get_sequence_from_indices(self, strand, indices):
-        result = ""
+        """Returns the spliced sequence for a list of index pairs, reverse complemented on '-' strand.
+
+        Segments are copied from a memoryview of the scaffold into a single
+        buffer allocated at the spliced length, so no per-segment strings are
+        built; the buffer is copied once more into the returned string.
+        """
+        full_length = len(self.full_sequence)
+        bounds = []
+        spliced_length = 0
         for index_pair in indices:
-            start = index_pair[0] - 1
-            stop = index_pair[1]
-            result += self.full_sequence[start:stop]
+            # Same clipping as slicing full_sequence[start - 1:stop]
+            start, stop, _ = slice(index_pair[0] - 1, index_pair[1]).indices(full_length)
+            if stop > start:
+                bounds.append((start, stop))
+                spliced_length += stop - start
+        buf = bytearray(spliced_length)
+        view = memoryview(self.full_sequence)
+        position = 0
+        for start, stop in bounds:
+            buf[position:position + stop - start] = view[start:stop]
+            position += stop - start
         if strand == '-':
-            result = reverse_complement(result)
-        return result
+            reverse_complement_in_place(buf)
+        return str(buf)
@@ -3,6 +3,8 @@
 
 import sys
 from src.seq_helper import SeqHelper
+from src.stats_accumulator import StatsAccumulator
+from src.stop_codon_index import StopCodonIndex
 
 
 class Sequence(object):
@@ -11,6 +13,12 @@ class Sequence(object):
         self.bases = bases
         self.genes = []
         self.removed_genes = []
+        # Bumped whenever bases change, so cached derived sequences go stale
+        self.version = 0
+        self.cache = None
+        # When a list, removals and other changes to features are recorded here
+        # as (event, feature) tuples; see track_mutations
+        self.mutations = None
 
     def __str__(self):
         result = "Sequence " + self.header
@@ -22,14 +30,34 @@ class Sequence(object):
 
     def add_gene(self, gene):
         self.genes.append(gene)
+        if self.mutations is not None:
+            gene.mutations = self.mutations
+            self.record_mutation("rescan")
+
+    def track_mutations(self):
+        """Starts recording changes to this sequence and its genes in self.mutations.
+
+        Removing a gene or mRNA records ("remove_gene", gene) or ("remove_mrna", mrna);
+        anything that moves or adds features records ("rescan", None). Genes
+        put directly into self.genes after this call are not tracked.
+        """
+        self.mutations = []
+        for gene in self.genes:
+            gene.mutations = self.mutations
+
+    def record_mutation(self, event, feature=None):
+        if self.mutations is not None:
+            self.mutations.append((event, feature))
 
     def contains_gene(self, gene_id):
+        """Returns True if a gene on this sequence has gene_id; a scan, unlike Controller.contains_gene."""
         for gene in self.genes:
             if gene.identifier == gene_id:
                 return True
         return False
 
     def contains_mrna(self, mrna_id):
+        """Returns True if an mRNA on this sequence has mrna_id; a scan, unlike Controller.contains_mrna."""
         for gene in self.genes:
             for mrna in gene.mrnas:
                 if mrna.identifier == mrna_id:
@@ -37,16 +65,27 @@ class Sequence(object):
         return False
 
     def remove_gene(self, gene_id):
-        to_remove = None
-        for gene in self.genes:
-            if gene.identifier == gene_id:
-                to_remove = gene
-        if to_remove:
-            self.genes.remove(to_remove)
-            self.removed_genes.append(to_remove)
-            return True
+        # The last gene with a matching id is removed
+        for i in xrange(len(self.genes) - 1, -1, -1):
+            if self.genes[i].identifier == gene_id:
+                gene = self.genes.pop(i)
+                self.removed_genes.append(gene)
+                self.record_mutation("remove_gene", gene)
+                return True
         return False  # Return false if gene wasn't removed
 
+    def remove_genes(self, to_remove):
+        """Removes the given genes in a single pass, keeping the order of the rest.
+
+        Args:
+            to_remove: a list of genes on this sequence
+        """
+        doomed = set(id(gene) for gene in to_remove)
+        self.genes[:] = [gene for gene in self.genes if id(gene) not in doomed]
+        self.removed_genes.extend(to_remove)
+        for gene in to_remove:
+            self.record_mutation("remove_gene", gene)
+
     def remove_from_list(self, bad_list):
         removed_features = []
         removed_genes = self.remove_genes_from_list(bad_list)
@@ -56,15 +95,12 @@ class Sequence(object):
         return removed_mrnas
 
     def remove_genes_from_list(self, bad_genes):
-        to_remove = []
-        for gene in self.genes:
-            if gene.identifier in bad_genes:
-                to_remove.append(gene)
+        bad_genes = set(bad_genes)
+        to_remove = [gene for gene in self.genes if gene.identifier in bad_genes]
         if to_remove:
+            self.remove_genes(to_remove)
             for gene in to_remove:
-                self.genes.remove(gene)
                 sys.stderr.write("Removed gene " + gene.identifier + "\n")
-            self.removed_genes.extend(to_remove)
         return to_remove
 
     def remove_mrnas_from_list(self, bad_mrnas):
@@ -74,33 +110,43 @@ class Sequence(object):
             removed_mrnas.extend(removed_from_gene)
         return removed_mrnas
 
-    def remove_empty_genes(self):
-        """Removes any gene containing no mRNAs; returns a list of removed genes."""
-        to_remove = []
-        for gene in self.genes:
-            if not gene.mrnas:
-                to_remove.append(gene)
+    def remove_empty_genes(self, report=None):
+        """Removes any gene containing no mRNAs; returns a list of removed genes.
+
+        Args:
+            report: optional FilterReport to record removals in; if None,
+                each removal is written to stderr
+        """
+        to_remove = [gene for gene in self.genes if not gene.mrnas]
         if to_remove:
+            self.remove_genes(to_remove)
             for gene in to_remove:
-                self.genes.remove(gene)
-                sys.stderr.write("Removed empty gene " + gene.identifier + "\n")
-            self.removed_genes.extend(to_remove)
+                if report is not None:
+                    report.add(gene.identifier, "empty_gene", "", "remove")
+                else:
+                    sys.stderr.write("Removed empty gene " + gene.identifier + "\n")
         return to_remove
 
-    def remove_empty_mrnas(self):
+    def remove_empty_mrnas(self, report=None):
         removed_mrnas = []
         for gene in self.genes:
-            removed_from_gene = gene.remove_empty_mrnas()
+            removed_from_gene = gene.remove_empty_mrnas(report)
             removed_mrnas.extend(removed_from_gene)
         return removed_mrnas
 
     def add_annotations_from_list(self, anno_list):
+        """Applies [feature id, key, value] annotations; returns the ids matching no gene or mRNA."""
+        genes_by_id = {}
+        mrnas_by_id = {}
+        self.index_features(genes_by_id, mrnas_by_id)
+        return annotate_features(anno_list, genes_by_id, mrnas_by_id)
+
+    def index_features(self, genes_by_id, mrnas_by_id):
+        """Adds this sequence's genes and mRNAs to dicts of lists of features by identifier."""
         for gene in self.genes:
-            for anno in anno_list:
-                if gene.identifier == anno[0] and anno[1] == "name":
-                    gene.name = anno[2]
-                if gene.contains_mrna(anno[0]):
-                    gene.add_mrna_annotation(anno[0], anno[1], anno[2])
+            genes_by_id.setdefault(gene.identifier, []).append(gene)
+            for mrna in gene.mrnas:
+                mrnas_by_id.setdefault(mrna.identifier, []).append(mrna)
 
     def is_empty(self):
         return len(self.bases) == 0
@@ -187,15 +233,21 @@ class Sequence(object):
             return
         # Remove any genes that are overlap the trimmed region
         genes_to_remove = [g for g in self.genes if overlap([start, stop], g.indices)]
-        self.genes = [g for g in self.genes if g not in genes_to_remove]
+        self.genes = [g for g in self.genes if not overlap([start, stop], g.indices)]
         # Remove bases from sequence
         self.bases = self.bases[:start - 1] + self.bases[stop:]
+        self.version += 1
+        self.record_mutation("rescan")
         # Adjust indices of remaining genes
         bases_removed = stop - start + 1
         for g in self.genes:
             g.adjust_indices(-bases_removed, start)
         return genes_to_remove
 
+    def get_seq_helper(self):
+        """Returns a SeqHelper for this sequence's bases, sharing its cache if it has one."""
+        return SeqHelper(self.bases, self.cache, (self.header, self.version))
+
     def get_subseq(self, start=1, stop=None):
         if not stop:
             stop = len(self.bases)
@@ -203,17 +255,26 @@ class Sequence(object):
             return ""
         return self.bases[start - 1:stop]
 
-    def remove_mrnas_with_internal_stops(self):
-        helper = SeqHelper(self.bases)
+    def remove_mrnas_with_internal_stops(self, report=None):
+        """Removes mRNAs whose CDS contains an internal stop; returns a list of removed mRNAs.
+
+        Genes left without mRNAs are not removed here; see remove_empty_genes.
+
+        Args:
+            report: optional FilterReport to record removals in; if None,
+                each removal is written to stderr
+        """
+        index = StopCodonIndex(self.bases)
+        removed_mrnas = []
         for gene in self.genes:
-            gene.remove_mrnas_with_internal_stops(helper)
-            if not gene.mrnas:
-                gene.death_flagged = True
-        self.genes = [g for g in self.genes if not g.death_flagged]
+            removed_mrnas.extend(gene.remove_mrnas_with_internal_stops(index, report))
+        return removed_mrnas
 
     def create_starts_and_stops(self):
+        helper = self.get_seq_helper()
         for gene in self.genes:
-            gene.create_starts_and_stops(self)
+            gene.create_starts_and_stops(helper)
+        self.record_mutation("rescan")
 
     def get_contained_genes(self):
         contained = []
@@ -242,12 +303,14 @@ class Sequence(object):
         return contained
 
     def cds_to_gff(self, mrna_id):
+        """Returns an mRNA's CDS in gff format; found by a scan, unlike in Controller.cds_to_gff."""
         for gene in self.genes:
             if gene.contains_mrna(mrna_id):
                 return gene.cds_to_gff(self.header, mrna_id)
         return "CDS not found."
 
     def cds_to_tbl(self, mrna_id):
+        """Returns an mRNA's CDS in tbl format; found by a scan, unlike in Controller.cds_to_tbl."""
         for gene in self.genes:
             if gene.contains_mrna(mrna_id):
                 return gene.cds_to_tbl(mrna_id)
@@ -262,21 +325,21 @@ class Sequence(object):
         return result
 
     def to_mrna_fasta(self):
-        helper = SeqHelper(self.bases)
+        helper = self.get_seq_helper()
         result = ""
         for gene in self.genes:
             result += gene.to_mrna_fasta(helper)
         return result
 
     def to_cds_fasta(self):
-        helper = SeqHelper(self.bases)
+        helper = self.get_seq_helper()
         result = ""
         for gene in self.genes:
             result += gene.to_cds_fasta(helper)
         return result
 
     def to_protein_fasta(self):
-        helper = SeqHelper(self.bases)
+        helper = self.get_seq_helper()
         result = ""
         for gene in self.genes:
             result += gene.to_protein_fasta(helper)
@@ -463,38 +526,11 @@ class Sequence(object):
         return length
 
     def stats(self):
-        stats = dict()
-        cds_partial_info = self.get_cds_partial_info()
-
-        stats["Total sequence length"] = len(self.bases)
-        stats["Number of genes"] = len(self.genes)
-        stats["Number of mRNAs"] = int(self.get_num_mrna())
-        stats["Number of exons"] = int(self.get_num_exons())
-        stats["Number of introns"] = int(self.get_num_introns())
-        stats["Number of CDS"] = int(self.get_num_cds())
-        stats["Overlapping genes"] = len(self.get_overlapping_genes())
-        stats["Contained genes"] = len(self.get_contained_genes())
-        stats["CDS: complete"] = int(cds_partial_info["CDS: complete"])
-        stats["CDS: start, no stop"] = int(cds_partial_info["CDS: start, no stop"])
-        stats["CDS: stop, no start"] = int(cds_partial_info["CDS: stop, no start"])
-        stats["CDS: no stop, no start"] = int(cds_partial_info["CDS: no stop, no start"])
-        stats["Longest gene"] = int(self.get_longest_gene())
-        stats["Longest mRNA"] = int(self.get_longest_mrna())
-        stats["Longest exon"] = int(self.get_longest_exon())
-        stats["Longest intron"] = int(self.get_longest_intron())
-        stats["Longest CDS"] = int(self.get_longest_cds())
-        stats["Shortest gene"] = int(self.get_shortest_gene())
-        stats["Shortest mRNA"] = int(self.get_shortest_mrna())
-        stats["Shortest exon"] = int(self.get_shortest_exon())
-        stats["Shortest intron"] = int(self.get_shortest_intron())
-        stats["Shortest CDS"] = int(self.get_shortest_cds())
-        stats["Total gene length"] = int(self.get_total_gene_length())
-        stats["Total mRNA length"] = int(self.get_total_mrna_length())
-        stats["Total exon length"] = int(self.get_total_exon_length())
-        stats["Total intron length"] = int(self.get_total_intron_length())
-        stats["Total CDS length"] = int(self.get_total_cds_length())
-
-        return stats
+        """Returns a dictionary with a value for each StatsManager key, visiting each feature once."""
+        accumulator = StatsAccumulator()
+        for gene in self.genes:
+            accumulator.add_gene(gene)
+        return accumulator.stats(len(self.bases))
 
 
 def overlap(indices1, indices2):
@@ -509,3 +545,30 @@ def overlap(indices1, indices2):
         return True
     else:
         return False
+
+
+def annotate_features(anno_list, genes_by_id, mrnas_by_id):
+    """Applies [feature id, key, value] annotations using dicts from Sequence.index_features.
+
+    A "name" annotation renames a gene with that id; any annotation is added
+    to an mRNA with that id. Each row is one dict lookup, so the cost
+    doesn't depend on the number of genes.
+
+    Returns a list of the ids, in order of first appearance, that matched
+    no gene or mRNA.
+    """
+    unmatched = []
+    seen_unmatched = set()
+    for feature_id, key, value in anno_list:
+        genes = genes_by_id.get(feature_id)
+        mrnas = mrnas_by_id.get(feature_id)
+        if genes and key == "name":
+            for gene in genes:
+                gene.name = value
+        if mrnas:
+            for mrna in mrnas:
+                mrna.add_annotation(key, value)
+        if not genes and not mrnas and feature_id not in seen_unmatched:
+            seen_unmatched.add(feature_id)
+            unmatched.append(feature_id)
+    return unmatched
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from collections import OrderedDict
+
+
+class SequenceCache(object):
+    """Least-recently-used store for sequences derived from transcripts.
+
+    Entries are keyed on the owning sequence's (header, version), the
+    transcript's identifier and version, and the kind of sequence
+    ('cds', 'mrna' or 'protein'). Trimming a sequence or adjusting a
+    transcript's indices bumps a version, so stale entries are never
+    returned; they simply age out.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Returns the cached value for key, or None if it isn't cached."""
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        # Re-insert to mark as most recently used
+        self.entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores value under key, evicting least recently used entries if over the cap."""
+        if len(value) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= len(old)
+        self.entries[key] = value
+        self.total_bytes += len(value)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from src.length_distribution import DISTRIBUTION_TYPES, LengthDistribution
+
+# Keys of StatsManager.increment_stats that are sums over features; the
+# overlapping/contained gene counts, covered bases and sequence length are
+# computed separately
+COUNT_KEYS = ["Number of genes", "Number of mRNAs", "Number of exons", "Number of introns", "Number of CDS",
+              "CDS: complete", "CDS: start, no stop", "CDS: stop, no start", "CDS: no stop, no start",
+              "Total gene length", "Total mRNA length", "Total exon length", "Total intron length",
+              "Total CDS length"]
+
+
+class LengthMultiset(object):
+    """Counts of each length seen, so lengths can be removed again and min and max still found."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, length):
+        self.counts[length] = self.counts.get(length, 0) + 1
+
+    def remove(self, length):
+        count = self.counts[length] - 1
+        if count:
+            self.counts[length] = count
+        else:
+            del self.counts[length]
+
+    def min(self, default=0):
+        return min(self.counts) if self.counts else default
+
+    def max(self, default=0):
+        return max(self.counts) if self.counts else default
+
+
+class StatsAccumulator(object):
+    """Computes the StatsManager keys for a Sequence in a single walk over its features.
+
+    Every gene, mRNA, exon and CDS is visited once, using integer lengths.
+    The results are identical to those of the Sequence helpers (get_num_exons,
+    get_longest_intron and so on), including their quirks: totals of intron length count each intron as
+    abs(start - previous end) + 1, and zero-length introns are ignored when
+    looking for the shortest.
+
+    Each mRNA's contribution is remembered, so removed genes and mRNAs can
+    be taken back out with remove_gene and remove_mrna instead of walking
+    the sequence again. Lengths for the min/max stats are kept as
+    LengthMultisets for the same reason, and are also the source of
+    length_distributions.
+    """
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNT_KEYS, 0)
+        self.lengths = {"gene": LengthMultiset(), "mRNA": LengthMultiset(), "exon": LengthMultiset(),
+                        "CDS": LengthMultiset(), "shortest intron": LengthMultiset(),
+                        "longest intron": LengthMultiset(), "intron": LengthMultiset()}
+        # Keyed by id(gene), or ("row", n) for genes from add_gene_row
+        self.gene_indices = {}
+        self.gene_lengths = {}
+        self.gene_mrnas = {}
+        # Keyed by id(mrna), or ("row", n); see measure_mrna
+        self.mrna_contributions = {}
+
+    def add_gene(self, gene):
+        length = abs(gene.indices[1] - gene.indices[0]) + 1
+        self.counts["Number of genes"] += 1
+        self.counts["Total gene length"] += length
+        self.lengths["gene"].add(length)
+        self.gene_indices[id(gene)] = gene.indices
+        self.gene_lengths[id(gene)] = length
+        self.gene_mrnas[id(gene)] = list(gene.mrnas)
+        for mrna in gene.mrnas:
+            self.add_mrna(mrna)
+
+    def remove_gene(self, gene):
+        """Takes out a gene added earlier, along with those of its mRNAs not already removed."""
+        if id(gene) not in self.gene_indices:
+            return
+        length = self.gene_lengths.pop(id(gene))
+        del self.gene_indices[id(gene)]
+        self.counts["Number of genes"] -= 1
+        self.counts["Total gene length"] -= length
+        self.lengths["gene"].remove(length)
+        for mrna in self.gene_mrnas.pop(id(gene)):
+            self.remove_mrna(mrna)
+
+    def add_gene_row(self, indices, mrna_rows):
+        """Adds a gene from a feature table (see feature_table) rather than a Gene object.
+
+        Genes and mRNAs added this way can't be removed again.
+        """
+        length = abs(indices[1] - indices[0]) + 1
+        self.counts["Number of genes"] += 1
+        self.counts["Total gene length"] += length
+        self.lengths["gene"].add(length)
+        self.gene_indices[("row", len(self.gene_indices))] = indices
+        for row in mrna_rows:
+            contribution = measure_mrna_row(row)
+            self.mrna_contributions[("row", len(self.mrna_contributions))] = contribution
+            self.add_contribution(contribution)
+
+    def add_mrna(self, mrna):
+        contribution = measure_mrna(mrna)
+        self.mrna_contributions[id(mrna)] = contribution
+        self.add_contribution(contribution)
+
+    def add_contribution(self, contribution):
+        self.apply_contribution(contribution, 1)
+        length, cds_length, exon_lengths, longest_intron, shortest_intron = contribution[:5]
+        lengths = self.lengths
+        lengths["mRNA"].add(length)
+        if cds_length is not None:
+            lengths["CDS"].add(cds_length)
+        exon_counts = lengths["exon"].counts
+        for exon_length in exon_lengths or []:
+            exon_counts[exon_length] = exon_counts.get(exon_length, 0) + 1
+        intron_counts = lengths["intron"].counts
+        for intron in contribution[7]:
+            intron_counts[intron] = intron_counts.get(intron, 0) + 1
+        if longest_intron > 0:
+            lengths["longest intron"].add(longest_intron)
+        if shortest_intron is not None:
+            lengths["shortest intron"].add(shortest_intron)
+
+    def remove_mrna(self, mrna):
+        """Takes out an mRNA added earlier; does nothing if it was already removed."""
+        contribution = self.mrna_contributions.pop(id(mrna), None)
+        if contribution is None:
+            return
+        self.apply_contribution(contribution, -1)
+        length, cds_length, exon_lengths, longest_intron, shortest_intron = contribution[:5]
+        lengths = self.lengths
+        lengths["mRNA"].remove(length)
+        if cds_length is not None:
+            lengths["CDS"].remove(cds_length)
+        for exon_length in exon_lengths or []:
+            lengths["exon"].remove(exon_length)
+        for intron in contribution[7]:
+            lengths["intron"].remove(intron)
+        if longest_intron > 0:
+            lengths["longest intron"].remove(longest_intron)
+        if shortest_intron is not None:
+            lengths["shortest intron"].remove(shortest_intron)
+
+    def apply_contribution(self, contribution, sign):
+        length, cds_length, exon_lengths = contribution[:3]
+        intron_length, partial_key = contribution[5:7]
+        counts = self.counts
+        counts["Number of mRNAs"] += sign
+        counts["Total mRNA length"] += sign * length
+        if cds_length is not None:
+            counts["Number of CDS"] += sign
+            counts["Total CDS length"] += sign * cds_length
+        if exon_lengths is not None:
+            counts["Number of exons"] += sign * len(exon_lengths)
+            counts["Number of introns"] += sign * (len(exon_lengths) - 1)
+            counts["Total exon length"] += sign * sum(exon_lengths)
+            counts["Total intron length"] += sign * intron_length
+        counts[partial_key] += sign
+
+    def stats(self, sequence_length):
+        """Returns a dictionary with a value for each StatsManager key."""
+        stats = dict(self.counts)
+        stats["Total sequence length"] = sequence_length
+        indices = self.gene_indices.values()
+        stats["Overlapping genes"] = count_overlapping(indices)
+        stats["Contained genes"] = count_contained(indices)
+        stats["Bases covered by genes"] = union_length(indices)
+        stats["Bases covered by CDS"] = union_length([pair for contribution in self.mrna_contributions.values()
+                                                      for pair in contribution[8] or []])
+        for feature_type in ["gene", "mRNA", "exon", "CDS"]:
+            stats["Longest " + feature_type] = self.lengths[feature_type].max()
+            stats["Shortest " + feature_type] = self.lengths[feature_type].min()
+        stats["Longest intron"] = self.lengths["longest intron"].max()
+        stats["Shortest intron"] = self.lengths["shortest intron"].min()
+        return stats
+
+    def length_distributions(self):
+        """Returns a LengthDistribution for each of DISTRIBUTION_TYPES.
+
+        Introns are those of positive length between consecutive exons.
+        """
+        distributions = {}
+        for feature_type in DISTRIBUTION_TYPES:
+            distribution = LengthDistribution()
+            for length, count in self.lengths[feature_type].counts.items():
+                distribution.add(length, count)
+            distributions[feature_type] = distribution
+        return distributions
+
+
+def mrna_row(mrna):
+    """Returns the parts of an mRNA that the stats depend on, as a plain tuple.
+
+    The tuple holds the identifier, indices, CDS indices (None without a
+    CDS), exon indices (None without an exon) and whether the mRNA has start
+    and stop codons.
+    """
+    has_start = has_stop = False
+    for feature in mrna.other_features:
+        if feature.feature_type == 'start_codon':
+            has_start = True
+        elif feature.feature_type == 'stop_codon':
+            has_stop = True
+    return (mrna.identifier, mrna.indices, mrna.cds.indices if mrna.cds else None,
+            mrna.exon.indices if mrna.exon else None, has_start, has_stop)
+
+
+def feature_table(seq):
+    """Returns (sequence length, [(gene indices, [mrna_row, ...]), ...]) for a Sequence.
+
+    This is all that's needed to compute its stats, and is much cheaper to
+    send to another process than the Sequence itself.
+    """
+    return len(seq.bases), [(gene.indices, [mrna_row(mrna) for mrna in gene.mrnas]) for gene in seq.genes]
+
+
+def sequence_summary(seq):
+    """Returns (stats dictionary, length distributions) for a Sequence; used by worker processes."""
+    accumulator = StatsAccumulator()
+    for gene in seq.genes:
+        accumulator.add_gene(gene)
+    return accumulator.stats(len(seq.bases)), accumulator.length_distributions()
+
+
+def table_summary(table):
+    """Returns (stats dictionary, length distributions) for a feature table; used by worker processes."""
+    sequence_length, genes = table
+    accumulator = StatsAccumulator()
+    for indices, mrna_rows in genes:
+        accumulator.add_gene_row(indices, mrna_rows)
+    return accumulator.stats(sequence_length), accumulator.length_distributions()
+
+
+def measure_mrna(mrna):
+    """Returns an mRNA's contribution to the stats; see measure_mrna_row."""
+    return measure_mrna_row(mrna_row(mrna))
+
+
+def measure_mrna_row(row):
+    """Returns an mRNA's contribution to the stats as a tuple, given its mrna_row.
+
+    The tuple holds the mRNA length, CDS length (None without a CDS), a list
+    of exon lengths (None without an exon), the longest intron (0 if none),
+    the shortest nonzero intron (None if none), the total intron length,
+    the StatsManager key for its start/stop codons, a list of the lengths
+    of its introns longer than 0 and its CDS indices (None without a CDS).
+    """
+    identifier, indices, cds_indices, exon_indices, has_start, has_stop = row
+    length = abs(indices[1] - indices[0]) + 1
+    cds_length = None
+    if cds_indices is not None:
+        cds_length = 0
+        for index_pair in cds_indices:
+            cds_length += abs(index_pair[1] - index_pair[0]) + 1
+    exon_lengths = None
+    longest_intron = 0
+    shortest_intron = None
+    intron_length = 0
+    intron_lengths = []
+    if exon_indices is not None:
+        exon_lengths = []
+        # The shortest intron skips zero-length introns without moving on
+        # its previous exon end, as XRNA.get_shortest_intron does
+        last_end = 0
+        shortest_last_end = 0
+        for index_pair in exon_indices:
+            exon_lengths.append(abs(index_pair[1] - index_pair[0]) + 1)
+            if last_end != 0:
+                intron_length += abs(index_pair[0] - last_end) + 1
+                intron = index_pair[0] - last_end - 1
+                if intron > 0:
+                    intron_lengths.append(intron)
+                if intron > longest_intron:
+                    longest_intron = intron
+            last_end = index_pair[1]
+            if shortest_last_end != 0:
+                intron = index_pair[0] - shortest_last_end - 1
+                if intron == 0:
+                    continue
+                if intron < 0:
+                    raise Exception("Intron with negative length on " + identifier)
+                if shortest_intron is None or intron < shortest_intron:
+                    shortest_intron = intron
+            shortest_last_end = index_pair[1]
+    if has_start:
+        partial_key = "CDS: complete" if has_stop else "CDS: start, no stop"
+    else:
+        partial_key = "CDS: stop, no start" if has_stop else "CDS: no stop, no start"
+    return length, cds_length, exon_lengths, longest_intron, shortest_intron, intron_length, partial_key, \
+        intron_lengths, cds_indices
+
+
+def union_length(indices):
+    """Returns the number of bases covered by at least one of a list of index pairs.
+
+    Pairs are sorted by start and merged where they overlap, so bases
+    covered by overlapping genes, or by a CDS shared between isoforms, are
+    only counted once.
+    """
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted((min(pair), max(pair)) for pair in indices):
+        if current_end is not None and start <= current_end:
+            if end > current_end:
+                current_end = end
+        else:
+            if current_end is not None:
+                total += current_end - current_start + 1
+            current_start, current_end = start, end
+    if current_end is not None:
+        total += current_end - current_start + 1
+    return total
+
+
+def count_overlapping(indices):
+    """Returns the number of intervals that overlap at least one other interval in the list.
+
+    Same result as Sequence.get_overlapping_genes, by sorting rather than
+    comparing every pair. Falls back to comparing pairs if any interval
+    has its start after its end.
+    """
+    if any(pair[0] > pair[1] for pair in indices):
+        overlapping = set()
+        for i, a in enumerate(indices):
+            for j in xrange(i + 1, len(indices)):
+                b = indices[j]
+                if a[1] >= b[0] and a[0] <= b[1]:
+                    overlapping.add(i)
+                    overlapping.add(j)
+        return len(overlapping)
+    ordered = sorted(indices, key=lambda pair: pair[0])
+    count = 0
+    max_end = None
+    for i, pair in enumerate(ordered):
+        # Overlaps an earlier interval, or the next one (whose start is the smallest of those after)
+        if (max_end is not None and max_end >= pair[0]) or \
+                (i + 1 < len(ordered) and ordered[i + 1][0] <= pair[1]):
+            count += 1
+        if max_end is None or pair[1] > max_end:
+            max_end = pair[1]
+    return count
+
+
+def count_contained(indices):
+    """Returns the number of intervals contained in another interval with different indices.
+
+    Same result as Sequence.get_contained_genes. Sorting by start, then by
+    end descending, puts every possible container before the intervals it
+    contains; identical intervals are handled as a group.
+    """
+    ordered = sorted([(pair[0], pair[1]) for pair in indices], key=lambda pair: (pair[0], -pair[1]))
+    count = 0
+    max_end = None
+    i = 0
+    while i < len(ordered):
+        group_end = i
+        while group_end < len(ordered) and ordered[group_end] == ordered[i]:
+            group_end += 1
+        if max_end is not None and max_end >= ordered[i][1]:
+            count += group_end - i
+        if max_end is None or ordered[i][1] > max_end:
+            max_end = ordered[i][1]
+        i = group_end
+    return count
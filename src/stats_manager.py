@@ -1,6 +1,32 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import json
+import multiprocessing
+import os
+
+from src.assembly_stats import AssemblyStats, sequence_assembly
+from src.length_distribution import DISTRIBUTION_TYPES, QUANTILES, new_distributions
+from src.stats_accumulator import StatsAccumulator, feature_table, sequence_summary, table_summary
+
+# Sequences inherited by forked worker processes; see StatsManager.update_stats_parallel
+worker_seqs = []
+
+
+def worker_seq_summary(task):
+    """Returns (stats, length distributions, AssemblyStats or None) for one of worker_seqs."""
+    index, scan = task
+    seq = worker_seqs[index]
+    stats, distributions = sequence_summary(seq)
+    return stats, distributions, sequence_assembly(seq.bases) if scan else None
+
+
+def worker_table_summary(task):
+    """Returns (stats, length distributions, AssemblyStats or None) for a feature table and its bases."""
+    table, bases = task
+    stats, distributions = table_summary(table)
+    return stats, distributions, sequence_assembly(bases) if bases is not None else None
+
 
 # TODO: ok, update should take a list of seqs instead of a single seq
 # then it can calculate stuff like longest seq, number of seqs, etc.
@@ -12,6 +38,8 @@ class StatsManager(object):
                        "CDS: stop, no start", "CDS: no stop, no start",
                        "Total gene length", "Total mRNA length", "Total exon length",
                        "Total intron length", "Total CDS length"]
+    # Also summed over sequences, but reported in their own table; see coverage_summary
+    coverage_stats = ["Bases covered by genes", "Bases covered by CDS"]
     min_stats = ["Shortest gene", "Shortest mRNA", "Shortest exon", "Shortest intron", "Shortest CDS"]
     max_stats = ["Longest gene", "Longest mRNA", "Longest exon", "Longest intron", "Longest CDS"]
     calc_stats_formulae = {"mean gene length": ["Total gene length", "Number of genes"],
@@ -21,21 +49,39 @@ class StatsManager(object):
                            "mean CDS length": ["Total CDS length", "Number of CDS"],
                            "% of genome covered by genes": ["Total gene length", "Total sequence length"],
                            "% of genome covered by CDS": ["Total CDS length", "Total sequence length"],
+                           "% of genome covered by genes (union)": ["Bases covered by genes",
+                                                                    "Total sequence length"],
+                           "% of genome covered by CDS (union)": ["Bases covered by CDS", "Total sequence length"],
                            "mean mRNAs per gene": ["Number of mRNAs", "Number of genes"],
                            "mean exons per mRNA": ["Number of exons", "Number of mRNAs"],
                            "mean introns per mRNA": ["Number of introns", "Number of mRNAs"]}
     calc_stats = ["mean gene length", "mean mRNA length", "mean exon length", "mean intron length",
                   "mean CDS length", "% of genome covered by genes", "% of genome covered by CDS",
                   "mean mRNAs per gene", "mean exons per mRNA", "mean introns per mRNA"]
+    coverage_calc_stats = ["% of genome covered by genes (union)", "% of genome covered by CDS (union)"]
 
     def __init__(self):
         self.ref_stats = {}
         self.alt_stats = {}
         self.initialize_dict(self.ref_stats)
         self.initialize_dict(self.alt_stats)
+        # LengthDistributions by feature type
+        self.ref_lengths = new_distributions()
+        self.alt_lengths = new_distributions()
+        self.ref_assembly = AssemblyStats()
+        self.alt_assembly = AssemblyStats()
+        # (header, stats) for each sequence added to the modified genome stats,
+        # once record_per_seq has been called
+        self.per_seq_stats = None
+        # Accumulators holding each tracked sequence's reference stats, keyed by id(seq)
+        self.accumulators = {}
+        # (version, AssemblyStats) of each sequence's bases when its reference
+        # stats were taken, keyed by id(seq), so unchanged bases aren't scanned twice
+        self.ref_assemblies = {}
 
     def initialize_dict(self, d):
-        for stat in self.increment_stats + self.min_stats + self.max_stats + self.calc_stats:
+        for stat in self.increment_stats + self.min_stats + self.max_stats + self.calc_stats + \
+                self.coverage_stats + self.coverage_calc_stats:
             d[stat] = 0
 
     def alt_is_empty(self):
@@ -46,10 +92,17 @@ class StatsManager(object):
 
     def clear_alt(self):
         self.initialize_dict(self.alt_stats)
+        self.alt_lengths = new_distributions()
+        self.alt_assembly = AssemblyStats()
 
     def clear_all(self):
         self.initialize_dict(self.ref_stats)
         self.initialize_dict(self.alt_stats)
+        self.ref_lengths = new_distributions()
+        self.alt_lengths = new_distributions()
+        self.ref_assembly = AssemblyStats()
+        self.alt_assembly = AssemblyStats()
+        self.ref_assemblies = {}
 
     def update_ref(self, stats):
         self.update_stats(self.ref_stats, stats)
@@ -57,10 +110,133 @@ class StatsManager(object):
     def update_alt(self, stats):
         self.update_stats(self.alt_stats, stats)
 
+    def record_per_seq(self):
+        """Keeps each sequence's stats as it's added to the modified genome stats, for write_per_seq_tsv."""
+        self.per_seq_stats = []
+
+    def add_per_seq(self, header, stats):
+        if self.per_seq_stats is not None:
+            self.per_seq_stats.append((header, stats))
+
+    def write_per_seq_tsv(self, io_buffer):
+        """Writes one row per recorded sequence with a column for every stat, including calculated ones."""
+        counted = self.increment_stats + self.min_stats + self.max_stats
+        keys = counted + self.calc_stats + self.coverage_stats + self.coverage_calc_stats
+        io_buffer.write("\t".join(["seq_id"] + keys) + "\n")
+        for header, stats in self.per_seq_stats or []:
+            values = [stats[key] for key in counted]
+            values.extend([self.calculated_value(stats, stat) for stat in self.calc_stats])
+            values.extend([stats[key] for key in self.coverage_stats])
+            values.extend([self.calculated_value(stats, stat) for stat in self.coverage_calc_stats])
+            io_buffer.write("\t".join([header] + [str(value) for value in values]) + "\n")
+
+    def update_ref_lengths(self, distributions):
+        update_distributions(self.ref_lengths, distributions)
+
+    def update_alt_lengths(self, distributions):
+        update_distributions(self.alt_lengths, distributions)
+
+    def update_ref_from_seq(self, seq):
+        """Adds a sequence's stats to the reference stats and starts tracking its mutations.
+
+        A later update_alt_from_seq on the same sequence can then apply its
+        removals as deltas rather than computing its stats from scratch.
+        """
+        accumulator = StatsAccumulator()
+        for gene in seq.genes:
+            accumulator.add_gene(gene)
+        self.update_ref(accumulator.stats(len(seq.bases)))
+        self.update_ref_lengths(accumulator.length_distributions())
+        self.add_ref_assembly(seq, sequence_assembly(seq.bases))
+        self.accumulators[id(seq)] = accumulator
+        seq.track_mutations()
+
+    def update_alt_from_seq(self, seq):
+        """Adds a sequence's current stats to the modified genome stats.
+
+        If the sequence was passed to update_ref_from_seq and has only had
+        genes and mRNAs removed since, its reference stats are updated by
+        taking those features out; otherwise its stats are computed again.
+        """
+        accumulator = self.accumulators.pop(id(seq), None)
+        mutations = seq.mutations or []
+        if accumulator is None or seq.mutations is None or \
+                any(event == "rescan" for event, feature in mutations):
+            stats, distributions = sequence_summary(seq)
+        else:
+            for event, feature in mutations:
+                if event == "remove_mrna":
+                    accumulator.remove_mrna(feature)
+                elif event == "remove_gene":
+                    accumulator.remove_gene(feature)
+            stats, distributions = accumulator.stats(len(seq.bases)), accumulator.length_distributions()
+        self.update_alt(stats)
+        self.update_alt_lengths(distributions)
+        assembly = self.pop_ref_assembly(seq)
+        self.alt_assembly.merge(assembly if assembly is not None else sequence_assembly(seq.bases))
+        self.add_per_seq(seq.header, stats)
+
+    def add_ref_assembly(self, seq, assembly):
+        self.ref_assembly.merge(assembly)
+        self.ref_assemblies[id(seq)] = (seq.version, assembly)
+
+    def pop_ref_assembly(self, seq):
+        """Returns the AssemblyStats taken of a sequence's bases for the reference, or None if they've changed."""
+        version, assembly = self.ref_assemblies.pop(id(seq), (None, None))
+        if version != seq.version:
+            return None
+        return assembly
+
+    def update_ref_parallel(self, seqs, processes):
+        results = self.update_stats_parallel(self.ref_stats, self.ref_lengths, seqs, processes, [True] * len(seqs))
+        for seq, (stats, assembly) in zip(seqs, results):
+            self.add_ref_assembly(seq, assembly)
+
+    def update_alt_parallel(self, seqs, processes):
+        # Bases left alone since the reference stats aren't scanned again
+        reused = [self.pop_ref_assembly(seq) for seq in seqs]
+        results = self.update_stats_parallel(self.alt_stats, self.alt_lengths, seqs, processes,
+                                             [assembly is None for assembly in reused])
+        for seq, (stats, assembly), ref_assembly in zip(seqs, results, reused):
+            self.alt_assembly.merge(assembly if ref_assembly is None else ref_assembly)
+            self.add_per_seq(seq.header, stats)
+
+    def update_stats_parallel(self, old, old_lengths, seqs, processes, scan):
+        """Computes each sequence's stats, length distributions and assembly stats in a pool of worker processes.
+
+        Stats and length distributions are merged into old and old_lengths.
+        A list of (stats, AssemblyStats) for each sequence is returned, in the
+        same order as seqs; the AssemblyStats is None where scan is False.
+
+        Where processes are forked, workers share the parent's sequences and
+        are only sent their positions in seqs. Elsewhere each is sent a
+        compact feature table rather than the Sequence itself, plus the
+        bases if they're to be scanned.
+        """
+        global worker_seqs
+        if hasattr(os, 'fork'):
+            worker_seqs = seqs
+            function, tasks = worker_seq_summary, zip(xrange(len(seqs)), scan)
+        else:
+            function = worker_table_summary
+            tasks = ((feature_table(seq), seq.bases if scan_seq else None) for seq, scan_seq in zip(seqs, scan))
+        results = []
+        pool = multiprocessing.Pool(processes)
+        try:
+            for stats, distributions, assembly in pool.imap(function, tasks, chunksize=64):
+                self.update_stats(old, stats)
+                update_distributions(old_lengths, distributions)
+                results.append((stats, assembly))
+        finally:
+            pool.close()
+            pool.join()
+            worker_seqs = []
+        return results
+
     def update_stats(self, old, new):
         if not validate_dicts(old, new):
             return
-        for stat in self.increment_stats:
+        for stat in self.increment_stats + self.coverage_stats:
             old[stat] += new[stat]
         for stat in self.min_stats:
             if old[stat] == 0:
@@ -72,30 +248,22 @@ class StatsManager(object):
                 old[stat] = new[stat]
 
     def calculate_stat(self, stat):
+        self.ref_stats[stat] = self.calculated_value(self.ref_stats, stat)
+        self.alt_stats[stat] = self.calculated_value(self.alt_stats, stat)
+
+    def calculated_value(self, stats, stat):
+        """Returns the value of one of calc_stats, given a dictionary of the stats it's calculated from."""
         dividend_key = self.calc_stats_formulae[stat][0]
         divisor_key = self.calc_stats_formulae[stat][1]
-        # Calculate for reference genome
-        dividend = self.ref_stats[dividend_key]
-        divisor = self.ref_stats[divisor_key]
-        if divisor == 0:
-            self.ref_stats[stat] = 0
-        else:
-            raw_value = float(dividend) / float(divisor)
-            if "%" in stat:
-                self.ref_stats[stat] = format_percent(raw_value)
-            else:
-                self.ref_stats[stat] = int(round(raw_value))
-        # Calculate for modified genome
-        dividend = self.alt_stats[dividend_key]
-        divisor = self.alt_stats[divisor_key]
+        dividend = stats[dividend_key]
+        divisor = stats[divisor_key]
         if divisor == 0:
-            self.alt_stats[stat] = 0
+            return 0
+        raw_value = float(dividend) / float(divisor)
+        if "%" in stat:
+            return format_percent(raw_value)
         else:
-            raw_value = float(dividend) / float(divisor)
-            if "%" in stat:
-                self.alt_stats[stat] = format_percent(raw_value)
-            else:
-                self.alt_stats[stat] = int(round(raw_value))
+            return int(round(raw_value))
 
     def summary(self):
         for stat in self.calc_stats:
@@ -108,6 +276,65 @@ class StatsManager(object):
             return format_columns(["Reference Genome", "Modified Genome"], stats_order,
                                   [self.ref_stats, self.alt_stats], 5)
 
+    def coverage_summary(self):
+        """Returns a table of the bases covered by at least one gene or CDS, formatted like summary.
+
+        Unlike the percentages in summary, overlapping features are only counted once.
+        """
+        for stat in self.coverage_calc_stats:
+            self.calculate_stat(stat)
+        key_order = self.coverage_stats + self.coverage_calc_stats
+        if self.alt_is_empty():
+            return format_columns(["Genome"], key_order, [self.ref_stats], 5)
+        else:
+            return format_columns(["Reference Genome", "Modified Genome"], key_order,
+                                  [self.ref_stats, self.alt_stats], 5)
+
+    def assembly_summary(self):
+        """Returns a table of scaffold and contig stats, formatted like summary."""
+        ref_stats = self.ref_assembly.stats()
+        columns = [dict(ref_stats), dict(self.alt_assembly.stats())]
+        key_order = [name for name, value in ref_stats]
+        if self.alt_is_empty():
+            return format_columns(["Genome"], key_order, columns[:1], 5)
+        else:
+            return format_columns(["Reference Genome", "Modified Genome"], key_order, columns, 5)
+
+    def length_summary(self):
+        """Returns a table of length quantiles and histogram counts, formatted like summary.
+
+        Histogram bins that are empty in every column are left out.
+        """
+        key_order = []
+        columns = [{}, {}]
+        for feature_type in DISTRIBUTION_TYPES:
+            for name, fraction in QUANTILES:
+                key = name + " " + feature_type + " length"
+                key_order.append(key)
+                columns[0][key] = self.ref_lengths[feature_type].quantile(fraction)
+                columns[1][key] = self.alt_lengths[feature_type].quantile(fraction)
+        for feature_type in DISTRIBUTION_TYPES:
+            rows = zip(self.ref_lengths[feature_type].histogram_rows(), self.alt_lengths[feature_type].histogram)
+            for (label, ref_count), alt_count in rows:
+                if ref_count or alt_count:
+                    key = feature_type + " length " + label
+                    key_order.append(key)
+                    columns[0][key] = ref_count
+                    columns[1][key] = alt_count
+        if self.alt_is_empty():
+            return format_columns(["Genome"], key_order, columns[:1], 5)
+        else:
+            return format_columns(["Reference Genome", "Modified Genome"], key_order, columns, 5)
+
+    def write_lengths_json(self, io_buffer):
+        """Writes quantiles and histograms for the reference and modified genomes as json."""
+        result = {}
+        for name, distributions in [("reference", self.ref_lengths), ("modified", self.alt_lengths)]:
+            result[name] = dict((feature_type, distributions[feature_type].to_dict())
+                                for feature_type in DISTRIBUTION_TYPES)
+        json.dump(result, io_buffer, indent=1, sort_keys=True)
+        io_buffer.write("\n")
+
 
 # UTILITY FUNCTIONS
 
@@ -145,6 +372,12 @@ def format_columns(column_names, key_order, dicts, spacing=3):
     return tbl_str
 
 
+def update_distributions(old, new):
+    """Merges a dict of LengthDistributions into another with the same feature types."""
+    for feature_type, distribution in new.items():
+        old[feature_type].merge(distribution)
+
+
 def validate_dicts(old, new):
     oldkeys = old.keys()
     newkeys = new.keys()
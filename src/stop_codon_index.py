@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import bisect
+import re
+
+from src.translator import reverse_complement
+
+# Zero-width lookahead so that overlapping codons are all found
+FORWARD_STOPS = re.compile(r'(?=(TAA|TAG|TGA))', re.IGNORECASE)
+# Reverse complements of the stop codons, as they appear on the forward strand
+REVERSE_STOPS = re.compile(r'(?=(TTA|CTA|TCA))', re.IGNORECASE)
+
+
+def build_frame_lists(pattern, bases):
+    """Returns three sorted lists of 1-based codon start positions, one per frame.
+
+    A codon starting at position p is stored in list p % 3.
+    """
+    frames = [[], [], []]
+    for match in pattern.finditer(bases):
+        position = match.start() + 1
+        frames[position % 3].append(position)
+    return frames
+
+
+def any_in_range(positions, first, last):
+    """Returns a boolean indicating whether a sorted list has a value in [first, last]."""
+    if first > last:
+        return False
+    i = bisect.bisect_left(positions, first)
+    return i < len(positions) and positions[i] <= last
+
+
+class StopCodonIndex(object):
+    """Positions of every stop codon on a sequence, in all six reading frames.
+
+    The sequence is scanned once on construction; afterwards checking a CDS
+    for internal stops is a handful of range queries instead of a translation.
+    """
+
+    def __init__(self, bases):
+        self.bases = bases
+        self.forward = build_frame_lists(FORWARD_STOPS, bases)
+        self.reverse = build_frame_lists(REVERSE_STOPS, bases)
+
+    def has_stop(self, strand, first, last, frame):
+        """Returns a boolean indicating whether a stop codon starts in [first, last] on frame.
+
+        Args:
+            strand: either '+' or '-'
+            first: lowest 1-based forward-strand start position to consider
+            last: highest 1-based forward-strand start position to consider
+            frame: codon start position modulo 3
+        """
+        if strand == '-':
+            return any_in_range(self.reverse[frame], first, last)
+        return any_in_range(self.forward[frame], first, last)
+
+    def mrna_contains_internal_stop(self, mrna):
+        """Returns a boolean indicating whether the mRNA's CDS contains an internal stop."""
+        if not mrna.cds:
+            return False
+        return self.contains_internal_stop(mrna.strand, mrna.cds.indices)
+
+    def contains_internal_stop(self, strand, indices):
+        """Returns a boolean indicating whether a spliced CDS contains an internal stop.
+
+        Codons are counted from the 5' end of the spliced sequence and the final
+        codon is not considered internal, as in translator.contains_internal_stop.
+        """
+        segments = []
+        for index_pair in indices:
+            start = max(index_pair[0], 1)
+            stop = min(index_pair[1], len(self.bases))
+            if start <= stop:
+                segments.append([start, stop])
+        if strand == '-':
+            segments = segments[::-1]
+        spliced_length = sum([stop - start + 1 for start, stop in segments])
+        # Spliced offset of the first base of the last complete codon
+        last_codon = 3 * (spliced_length // 3 - 1)
+        if last_codon <= 0:
+            return False
+
+        offset = 0
+        for start, stop in segments:
+            length = stop - start + 1
+            # First codon beginning inside this segment, in spliced coordinates
+            first_codon = offset + (-offset % 3)
+            if strand == '-':
+                # Codons read downward; a codon at spliced offset c ends at
+                # stop - (c - offset) and starts two bases before that.
+                highest = stop - (first_codon - offset) - 2
+                lowest = max(start, stop - (last_codon - 3 - offset) - 2)
+                if self.has_stop('-', lowest, highest, highest % 3):
+                    return True
+            else:
+                lowest = start + (first_codon - offset)
+                highest = min(stop - 2, start + (last_codon - 3 - offset))
+                if self.has_stop('+', lowest, highest, lowest % 3):
+                    return True
+            offset += length
+
+        # Codons spanning a splice junction are not contiguous on the
+        # sequence, so look those up base by base.
+        for codon_start in self.junction_codons(segments, last_codon):
+            codon = self.spliced_codon(strand, segments, codon_start)
+            if codon.upper() in ('TAA', 'TAG', 'TGA'):
+                return True
+        return False
+
+    @staticmethod
+    def junction_codons(segments, last_codon):
+        """Returns spliced offsets of internal codons that cross a segment boundary."""
+        result = []
+        boundary = 0
+        for start, stop in segments[:-1]:
+            boundary += stop - start + 1
+            for codon_start in (boundary - 1 - (boundary - 1) % 3, boundary - 2 - (boundary - 2) % 3):
+                if codon_start < last_codon and codon_start + 3 > boundary and codon_start not in result:
+                    result.append(codon_start)
+        return result
+
+    def spliced_codon(self, strand, segments, codon_start):
+        """Returns the three bases at a spliced offset, read on the given strand."""
+        codon = ''
+        for spliced_position in range(codon_start, codon_start + 3):
+            offset = 0
+            for start, stop in segments:
+                length = stop - start + 1
+                if spliced_position < offset + length:
+                    if strand == '-':
+                        base = self.bases[stop - (spliced_position - offset) - 1]
+                        codon += reverse_complement(base)
+                    else:
+                        codon += self.bases[start + (spliced_position - offset) - 1]
+                    break
+                offset += length
+        return codon
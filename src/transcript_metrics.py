@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+from array import array
+
+
+def segment_length(index_pair):
+    """Returns the length in base pairs between two indices (inclusive), as an integer."""
+    return abs(index_pair[1] - index_pair[0]) + 1
+
+
+# Stored as the shortest intron of a transcript whose exons overlap
+NEGATIVE_INTRON = -1
+
+
+class TranscriptMetrics(object):
+    """Lengths of every mRNA and gene on a Sequence, computed in a single walk.
+
+    Each metric is an integer array with one entry per row. mRNA rows follow
+    the order of seq.genes and gene.mrnas; gene rows follow seq.genes. Values
+    match those returned by the length methods on Gene, XRNA and CDS, but are
+    computed once, so each term of a filter expression reads them from the
+    table instead of walking the segments again.
+
+    Args:
+        seq: the Sequence to measure; if None, the table starts empty and
+            genes can be added with add_gene
+    """
+
+    def __init__(self, seq=None):
+        self.mrna_rows = {}
+        self.gene_rows = {}
+        self.mrna_ids = []
+        self.has_cds = []
+        self.has_exon = []
+        self.has_product = []
+        self.mrna_length = array('l')
+        self.mrna_gene_row = array('l')
+        self.cds_length = array('l')
+        self.exon_count = array('l')
+        self.shortest_exon = array('l')
+        self.longest_exon = array('l')
+        self.shortest_intron = array('l')
+        self.longest_intron = array('l')
+        self.gene_length = array('l')
+        if seq:
+            for gene in seq.genes:
+                self.add_gene(gene)
+
+    def add_gene(self, gene):
+        gene_row = len(self.gene_length)
+        self.gene_rows[id(gene)] = gene_row
+        self.gene_length.append(segment_length(gene.indices))
+        for mrna in gene.mrnas:
+            self.add_mrna(mrna, gene_row)
+
+    def add_mrna(self, mrna, gene_row=-1):
+        self.mrna_rows[id(mrna)] = len(self.mrna_ids)
+        self.mrna_ids.append(mrna.identifier)
+        self.mrna_gene_row.append(gene_row)
+        self.mrna_length.append(segment_length(mrna.indices))
+        self.has_product.append(mrna.annotations_contain_product())
+        self.has_cds.append(bool(mrna.cds))
+        self.cds_length.append(sum([segment_length(pair) for pair in mrna.cds.indices]) if mrna.cds else 0)
+        self.has_exon.append(bool(mrna.exon))
+        exon_indices = mrna.exon.indices if mrna.exon else []
+        exon_lengths = [segment_length(pair) for pair in exon_indices]
+        self.exon_count.append(len(exon_lengths))
+        self.shortest_exon.append(min(exon_lengths) if exon_lengths else 0)
+        self.longest_exon.append(max(exon_lengths) if exon_lengths else 0)
+        shortest, longest = intron_extremes(exon_indices)
+        self.shortest_intron.append(shortest)
+        self.longest_intron.append(longest)
+
+    def mrna_row(self, mrna):
+        return self.mrna_rows[id(mrna)]
+
+    def gene_row(self, gene):
+        return self.gene_rows[id(gene)]
+
+
+def intron_extremes(exon_indices):
+    """Returns (shortest, longest) intron lengths between a list of exon index pairs.
+
+    Follows XRNA.get_shortest_intron and XRNA.get_longest_intron exactly,
+    including their handling of zero-length introns; a negative intron makes
+    the shortest NEGATIVE_INTRON instead of raising.
+    """
+    shortest = None
+    longest = 0
+    shortest_last_end = 0
+    longest_last_end = 0
+    negative = False
+    for index_pair in exon_indices:
+        if longest_last_end != 0:
+            this_intron = index_pair[0] - longest_last_end - 1
+            if this_intron > longest:
+                longest = this_intron
+        longest_last_end = index_pair[1]
+        if shortest_last_end != 0:
+            this_intron = index_pair[0] - shortest_last_end - 1
+            if this_intron == 0:
+                continue
+            if this_intron < 0:
+                negative = True
+            elif shortest is None or this_intron < shortest:
+                shortest = this_intron
+        shortest_last_end = index_pair[1]
+    if negative:
+        return NEGATIVE_INTRON, longest
+    return shortest or 0, longest
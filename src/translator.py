@@ -9,6 +9,32 @@ AMINO_ACIDS = 'FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG'
 CODON_TABLE = dict(zip(CODONS, AMINO_ACIDS))
 
 
+def build_complement_table():
+    """Returns a 256-character table for str.translate; unknown bases become 'N'."""
+    table = ['N'] * 256
+    for base, complement in zip('acgtnACGTN', 'tgcanTGCAN'):
+        table[ord(base)] = complement
+    return ''.join(table)
+
+
+def build_base_codes():
+    """Returns a list mapping each byte to its position in BASES, or 64 if it isn't a base.
+
+    64 is large enough that any codon containing a non-base gets a code of at least 64.
+    """
+    codes = [64] * 256
+    for i, base in enumerate(BASES):
+        codes[ord(base)] = i
+        codes[ord(base.upper())] = i
+    return codes
+
+
+COMPLEMENT_TABLE = build_complement_table()
+BASE_CODES = build_base_codes()
+AMINO_ACID_CODES = bytearray(AMINO_ACIDS)
+UNKNOWN_AMINO_ACID = ord('X')
+
+
 def valid_seq(seq):
     # Assumes seq is already lowercase
     for base in seq:
@@ -46,21 +72,39 @@ def contains_internal_stop(seq, strand):
 
 
 def reverse_complement(seq):
-    complement = {'a': 't',
-                  'A': 'T',
-                  'c': 'g',
-                  'G': 'C',
-                  'g': 'c',
-                  'C': 'G',
-                  't': 'a',
-                  'T': 'A',
-                  'n': 'n',
-                  'N': 'N'}
-    return ''.join([complement.get(base, 'N') for base in seq[::-1]])
+    return seq[::-1].translate(COMPLEMENT_TABLE)
+
+
+def reverse_complement_in_place(buf):
+    """Reverses and complements a bytearray of nucleotides.
+
+    The reverse is done in place; the complement goes through one temporary
+    bytearray, which is copied back into buf.
+    """
+    buf.reverse()
+    buf[:] = buf.translate(COMPLEMENT_TABLE)
+
+
+def translate_in_place(buf):
+    """Translates a bytearray of nucleotides (read on the + strand) in place.
+
+    Each codon's amino acid is written over the front of the buffer, which is
+    then truncated to the length of the peptide. Codons containing anything
+    other than a, c, g or t become 'X'; a trailing partial codon is dropped.
+    """
+    peptide_length = len(buf) // 3
+    for i in xrange(peptide_length):
+        j = 3 * i
+        code = BASE_CODES[buf[j]] * 16 + BASE_CODES[buf[j + 1]] * 4 + BASE_CODES[buf[j + 2]]
+        if code < 64:
+            buf[i] = AMINO_ACID_CODES[code]
+        else:
+            buf[i] = UNKNOWN_AMINO_ACID
+    del buf[peptide_length:]
 
 
 def translate(seq, strand):
-    seq = seq.lower().replace('\n', '').replace(' ', '')
+    seq = seq.replace('\n', '').replace(' ', '')
 
     # Verify strand
     if not valid_strand(strand):
@@ -71,16 +115,6 @@ def translate(seq, strand):
         seq = reverse_complement(seq)
 
     # Now translate
-    peptide = ''
-
-    for i in xrange(0, len(seq), 3):
-        codon = seq[i: i + 3]
-        if len(codon) != 3:
-            amino_acid = ''
-        elif 'N' in codon or 'n' in codon or codon not in CODON_TABLE.keys():
-            amino_acid = 'X'
-        else:
-            amino_acid = CODON_TABLE.get(codon, '')
-        peptide += amino_acid
-
-    return peptide
+    peptide = bytearray(seq)
+    translate_in_place(peptide)
+    return str(peptide)
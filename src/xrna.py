@@ -23,6 +23,8 @@ class XRNA(object):
         self.other_features = []
         self.annotations = {} if annotations is None else annotations
         self.death_flagged = False
+        # Bumped whenever indices change, so cached derived sequences go stale
+        self.version = 0
         self.source = source
         self.seq_name = seq_name
         self.name = name
@@ -67,6 +69,7 @@ class XRNA(object):
             n: integer by which to increment indices
             start_index: optional coordinate before which no indices will be changed.
         """
+        self.version += 1
         if self.indices[0] > start_index:
             self.indices = [i + n for i in self.indices]
         elif self.indices[1] > start_index:
@@ -91,7 +94,7 @@ class XRNA(object):
             total += 1
         return total
 
-    def create_start_and_stop_if_necessary(self, seq_object, strand):
+    def create_start_and_stop_if_necessary(self, seq_helper, strand):
         """Inspects child CDS and creates start/stop codons if appropriate.
 
         This is accomplished by examining the first and last three nucleotides
@@ -99,14 +102,12 @@ class XRNA(object):
         override any start_codon or stop_codon entries in the original GFF file.
 
         Args:
-            seq_object: the actual sequence containing the RNA
+            seq_helper: a SeqHelper for the sequence containing the RNA
             strand: either '+' or '-'
         """
-        # TODO I'd rather pass seq.bases than the object itself, since
-        # the object owns this mrna...
         if not self.cds:
             return
-        seq = self.cds.extract_sequence(seq_object, strand)
+        seq = seq_helper.get_cds_sequence_on_strand(self, strand)
         if translate.has_start_codon(seq):
             indices = self.cds.get_start_indices(strand)
             self.add_start_codon(indices)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import io
+import unittest
+
+from src.annotation_reader import AnnotationReader
+
+
+class TestAnnotationReader(unittest.TestCase):
+    def test_read(self):
+        text = "# comment\n" \
+               "gene1\tname\tfoo\n" \
+               "\n" \
+               "mrna1\tDbxref\tPFAM:0001\n" \
+               "mrna1\tproduct\tbar\n"
+        reader = AnnotationReader()
+        batches = list(reader.read(io.BytesIO(text)))
+        self.assertEquals([[["gene1", "name", "foo"], ["mrna1", "Dbxref", "PFAM:0001"],
+                            ["mrna1", "product", "bar"]]], batches)
+        self.assertEquals(3, reader.rows)
+        self.assertEquals(2, reader.comments)
+
+    def test_read_skips_bad_rows(self):
+        text = "gene1\tname\n" \
+               "gene1\tname\tfoo\textra\n" \
+               "gene1\tname\tfoo\n"
+        reader = AnnotationReader()
+        batches = list(reader.read(io.BytesIO(text)))
+        self.assertEquals([[["gene1", "name", "foo"]]], batches)
+        self.assertEquals(2, reader.bad_rows)
+
+    def test_read_skips_repeated_annotations(self):
+        text = "mrna1\tDbxref\tPFAM:0001\n" \
+               "mrna1\tDbxref\tPFAM:0002\n" \
+               "mrna1\tDbxref\tPFAM:0001\n" \
+               "mrna2\tDbxref\tPFAM:0001\n"
+        reader = AnnotationReader()
+        rows = [row for batch in reader.read(io.BytesIO(text)) for row in batch]
+        self.assertEquals([["mrna1", "Dbxref", "PFAM:0001"], ["mrna1", "Dbxref", "PFAM:0002"],
+                           ["mrna2", "Dbxref", "PFAM:0001"]], rows)
+        self.assertEquals(1, reader.duplicates)
+
+    def test_read_batches_end_between_ids(self):
+        text = "gene1\tname\tfoo\n" \
+               "mrna1\tproduct\tbar\n" \
+               "mrna1\tDbxref\tPFAM:0001\n" \
+               "mrna1\tDbxref\tPFAM:0002\n" \
+               "mrna2\tproduct\tbaz\n"
+        reader = AnnotationReader(batch_size=2)
+        batches = list(reader.read(io.BytesIO(text)))
+        self.assertEquals([["gene1", "mrna1", "mrna1", "mrna1"], ["mrna2"]],
+                          [[row[0] for row in batch] for batch in batches])
+
+    def test_read_empty(self):
+        reader = AnnotationReader()
+        self.assertEquals([], list(reader.read(io.BytesIO(""))))
+        self.assertEquals(0, reader.rows)
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestAnnotationReader))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from src.assembly_stats import AssemblyStats, nx_stats, sequence_assembly
+
+
+class TestAssemblyStats(unittest.TestCase):
+    def test_nx_stats(self):
+        self.assertEquals([(0, 0), (0, 0)], nx_stats([], [0.5, 0.9]))
+        self.assertEquals([(8, 2), (3, 3)], nx_stats([2, 10, 3, 8], [0.5, 0.9]))
+        self.assertEquals([(3, 3), (10, 1)], nx_stats([2, 10, 3, 8], [0.9, 0.1]))
+        self.assertEquals([(10, 1)], nx_stats([10], [0.5]))
+
+    def test_add_sequence(self):
+        stats = AssemblyStats()
+        stats.add_sequence("NNGATTNNNNACAnGC")
+        stats.add_sequence("GGGG")
+        stats.add_sequence("")
+        self.assertEquals([16, 4], stats.scaffold_lengths)
+        self.assertEquals([4, 3, 2, 4], stats.contig_lengths)
+        self.assertEquals(3, stats.gaps)
+        self.assertEquals(7, stats.gap_length)
+        self.assertEquals(8, stats.gc)
+        self.assertEquals(13, stats.acgt)
+
+    def test_stats(self):
+        stats = AssemblyStats()
+        stats.add_sequence("AAAANNGGGGGG")
+        stats.add_sequence("CCAT")
+        result = dict(stats.stats())
+        self.assertEquals(2, result["Number of scaffolds"])
+        self.assertEquals(12, result["Scaffold N50"])
+        self.assertEquals(1, result["Scaffold L50"])
+        self.assertEquals(3, result["Number of contigs"])
+        self.assertEquals(4, result["Contig N50"])
+        self.assertEquals(2, result["Contig L50"])
+        self.assertEquals(4, result["Contig N90"])
+        self.assertEquals(1, result["Number of gaps"])
+        self.assertEquals(2, result["Total gap length"])
+        self.assertEquals(57.1, result["GC content (%)"])
+
+    def test_stats_from_lengths_only(self):
+        stats = AssemblyStats()
+        stats.add_length(100)
+        stats.add_length(0)
+        names = [name for name, value in stats.stats()]
+        self.assertEquals(["Number of scaffolds", "Scaffold N50", "Scaffold L50", "Scaffold N90"], names)
+        self.assertEquals(1, dict(stats.stats())["Number of scaffolds"])
+
+    def test_merge(self):
+        expected = AssemblyStats()
+        merged = AssemblyStats()
+        for bases in ["ACGTNNACG", "", "GGNNNNNCCCAT"]:
+            expected.add_sequence(bases)
+            merged.merge(sequence_assembly(bases))
+        self.assertEquals(expected.stats(), merged.stats())
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestAssemblyStats))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
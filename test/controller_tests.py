@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from mock import Mock
+
+from src.cds import CDS
+from src.controller import Controller, DEFAULT_OUTPUTS, parse_outputs
+from src.exon import Exon
+from src.gene import Gene
+from src.sequence import Sequence
+from src.xrna import XRNA
+
+
+class TestController(unittest.TestCase):
+    def test_parse_outputs(self):
+        self.assertEquals(DEFAULT_OUTPUTS, parse_outputs(None))
+        self.assertEquals(DEFAULT_OUTPUTS, parse_outputs(""))
+        self.assertEquals(["gff", "tbl", "cds"], parse_outputs("gff, tbl,cds"))
+        self.assertFalse("cds" in DEFAULT_OUTPUTS)
+
+    def test_parse_outputs_unknown(self):
+        self.assertRaises(ValueError, parse_outputs, "gff,genbank")
+
+    def test_sequence_output(self):
+        seq = Mock()
+        seq.to_cds_fasta.return_value = ">CDS|mrna1\nATG\n"
+        self.assertEquals(">CDS|mrna1\nATG\n", Controller.sequence_output(seq, "cds"))
+        Controller.sequence_output(seq, "tbl")
+        seq.to_tbl.assert_called_with()
+        self.assertFalse(seq.to_protein_fasta.called)
+
+    def make_genome(self):
+        """Returns a Controller holding seq1 with gene1 (mrna1, mrna2) and gene2 (mrna3)."""
+        controller = Controller()
+        seq = Sequence("seq1", "ATG" + "GCT" * 30 + "TAA" + "ACGT" * 100)
+        controller.seqs = [seq]
+        controller.registry.add_sequence(seq)
+        gene1 = Gene("seq1", "maker", [1, 150], '+', "gene1")
+        gene1.mrnas.extend([self.make_mrna("mrna1", "gene1", [1, 96]), self.make_mrna("mrna2", "gene1", [1, 150])])
+        gene2 = Gene("seq1", "maker", [200, 400], '+', "gene2")
+        gene2.mrnas.append(self.make_mrna("mrna3", "gene2", [200, 400]))
+        controller.add_gene(gene1)
+        controller.add_gene(gene2)
+        return controller
+
+    @staticmethod
+    def make_mrna(mrna_id, gene_id, indices):
+        """Returns an mRNA with one exon and a CDS over all of it."""
+        mrna = XRNA(mrna_id, list(indices), gene_id, source="maker", seq_name="seq1")
+        mrna.exon = Exon(identifier=mrna_id + ":exon", indices=list(indices), parent_id=mrna_id)
+        mrna.cds = CDS(identifier=mrna_id + ":cds", indices=list(indices), phase=0, strand='+', parent_id=mrna_id)
+        return mrna
+
+    def test_remove_from_list(self):
+        controller = self.make_genome()
+        controller.remove_from_list(["mrna2", "gene2", "mrna3", "nothing"])
+        seq = controller.seqs[0]
+        self.assertEquals(["gene1"], [gene.identifier for gene in seq.genes])
+        self.assertEquals(["mrna1"], [mrna.identifier for mrna in seq.genes[0].mrnas])
+        self.assertEquals(["gene2", "mrna2"], [feature.identifier for feature in controller.removed_features])
+        self.assertFalse(controller.contains_gene("gene2"))
+        self.assertFalse(controller.contains_mrna("mrna3"))
+        self.assertFalse(controller.contains_mrna("mrna2"))
+        self.assertTrue(controller.contains_mrna("mrna1"))
+
+    def test_remove_from_list_seq(self):
+        controller = self.make_genome()
+        controller.remove_from_list(["seq1"])
+        self.assertEquals([], controller.seqs)
+        self.assertFalse(controller.contains_gene("gene1"))
+        self.assertFalse(controller.contains_mrna("mrna1"))
+
+    def assert_filtered_out(self, controller):
+        for mrna_id in ["mrna1", "mrna2", "mrna3"]:
+            self.assertFalse(controller.contains_mrna(mrna_id))
+        self.assertFalse(controller.contains_gene("gene1"))
+        self.assertFalse(controller.contains_gene("gene2"))
+        self.assertEquals("", controller.cds_to_gff("mrna1"))
+        self.assertEquals("", controller.cds_to_tbl("mrna1"))
+
+    def test_apply_filters_unregisters_removed_features(self):
+        controller = self.make_genome()
+        # An mRNA filter, a gene filter and an expression
+        controller.apply_filters([["cds_shorter_than", "100", "REMOVE"], ["gene_shorter_than", "200", "REMOVE"],
+                                  ["expression", "mrna.length > 200", "REMOVE"]])
+        self.assertEquals([], controller.seqs[0].genes)
+        self.assert_filtered_out(controller)
+
+    def test_apply_filter_unregisters_removed_features(self):
+        controller = self.make_genome()
+        controller.apply_filter("cds_shorter_than", "100", "REMOVE")
+        self.assertFalse(controller.contains_mrna("mrna1"))
+        self.assertTrue(controller.contains_mrna("mrna2"))
+        controller.apply_filter("gene_shorter_than", "200", "REMOVE")
+        controller.apply_filter("expression", "mrna.length > 200", "REMOVE")
+        self.assertEquals([], controller.seqs[0].genes)
+        self.assert_filtered_out(controller)
+
+    def test_cds_to_gff(self):
+        controller = self.make_genome()
+        self.assertEquals("seq1\tmaker\tCDS\t1\t96\t.\t+\t0\tID=mrna1:cds;Parent=mrna1\n",
+                          controller.cds_to_gff("mrna1"))
+        controller.registry.get_mrna("mrna2")[2].cds = None
+        self.assertEquals("", controller.cds_to_gff("mrna2"))
+        self.assertEquals("", controller.cds_to_gff("nothing"))
+
+    def test_cds_to_tbl(self):
+        controller = self.make_genome()
+        # No start or stop codon has been made, so the CDS is partial at both ends
+        self.assertEquals("<1\t>96\tCDS\n\t\t\tcodon_start\t1\n", controller.cds_to_tbl("mrna1"))
+        controller.registry.get_mrna("mrna2")[2].cds = None
+        self.assertEquals("", controller.cds_to_tbl("mrna2"))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestController))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@
 import io
 import unittest
 
-from src.fasta_reader import FastaReader
+from src.fasta_reader import FastaReader, read_fasta_index, read_sequence_lengths
 
 
 class TestFastaReader(unittest.TestCase):
@@ -27,6 +27,14 @@ class TestFastaReader(unittest.TestCase):
         self.assertEquals(4, len(self.reader.seqs))
         self.assertEquals('NNNNNNNNGATTACAGATTACAGATTACANNNNNNNNNNN', self.reader.seqs[3].bases)
 
+    def test_read_sequence_lengths(self):
+        fasta = io.BytesIO('>seq_1 some description\nGATTACAGATTACA\nGATTACA\n>seq_2\nNNNNN\n>seq_3\n')
+        self.assertEquals({'seq_1': 21, 'seq_2': 5, 'seq_3': 0}, read_sequence_lengths(fasta))
+
+    def test_read_fasta_index(self):
+        fai = io.BytesIO('seq_1\t21\t24\t14\t15\nseq_2\t5\t55\t5\t6\n')
+        self.assertEquals({'seq_1': 21, 'seq_2': 5}, read_fasta_index(fai))
+
 
 def suite():
     _suite = unittest.TestSuite()
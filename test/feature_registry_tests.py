@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from src.feature_registry import FeatureRegistry
+from src.gene import Gene
+from src.sequence import Sequence
+from src.xrna import XRNA
+
+
+class TestFeatureRegistry(unittest.TestCase):
+    def setUp(self):
+        self.seq = Sequence("seq1", "ACGT" * 100)
+        self.gene = Gene("seq1", "maker", [1, 100], '+', "gene1")
+        self.mrna = XRNA("mrna1", [1, 100], "gene1", source="maker", seq_name="seq1")
+        self.gene.mrnas.append(self.mrna)
+        self.seq.add_gene(self.gene)
+        self.registry = FeatureRegistry()
+        self.registry.add_sequence(self.seq)
+
+    def test_add_sequence(self):
+        self.assertIs(self.seq, self.registry.get_sequence("seq1"))
+        self.assertEquals((self.seq, self.gene), self.registry.get_gene("gene1"))
+        self.assertEquals((self.seq, self.gene, self.mrna), self.registry.get_mrna("mrna1"))
+        self.assertTrue(self.registry.contains_gene("gene1"))
+        self.assertFalse(self.registry.contains_gene("mrna1"))
+        self.assertTrue(self.registry.contains_mrna("mrna1"))
+        self.assertIsNone(self.registry.get_mrna("mrna2"))
+
+    def test_add_gene_duplicate(self):
+        duplicate = Gene("seq1", "maker", [200, 300], '+', "gene1")
+        self.assertFalse(self.registry.add_gene(self.seq, duplicate))
+        self.assertEquals(["gene1"], self.registry.duplicates)
+        self.assertIs(self.gene, self.registry.get_gene("gene1")[1])
+        # Removing the duplicate leaves the first gene in place
+        self.registry.remove([duplicate])
+        self.assertIs(self.gene, self.registry.get_gene("gene1")[1])
+
+    def test_remove_mrna(self):
+        self.registry.remove([self.mrna])
+        self.assertFalse(self.registry.contains_mrna("mrna1"))
+        self.assertTrue(self.registry.contains_gene("gene1"))
+
+    def test_remove_gene_removes_its_mrnas(self):
+        self.registry.remove([self.gene])
+        self.assertFalse(self.registry.contains_gene("gene1"))
+        self.assertFalse(self.registry.contains_mrna("mrna1"))
+
+    def test_remove_sequence(self):
+        self.registry.remove([self.seq])
+        self.assertIsNone(self.registry.get_sequence("seq1"))
+        self.assertFalse(self.registry.contains_gene("gene1"))
+        self.assertFalse(self.registry.contains_mrna("mrna1"))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestFeatureRegistry))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from src.cds import CDS
+from src.exon import Exon
+from src.filter_expression import FilterExpression, FilterExpressionError, tokenize
+from src.filters import ExpressionFilter, MinCDSLengthFilter
+from src.gene import Gene
+from src.sequence import Sequence
+from src.transcript_metrics import TranscriptMetrics
+from src.xrna import XRNA
+
+
+class TestFilterExpression(unittest.TestCase):
+    def setUp(self):
+        self.seq = Sequence("seq1", "A" * 1000)
+        gene1 = Gene("seq1", "maker", [1, 520], '+', "gene1")
+        mrna1 = XRNA("gene1-RA", [1, 520], "gene1")
+        mrna1.exon = Exon(identifier="exon1", indices=[1, 40], parent_id="gene1-RA")
+        mrna1.exon.add_indices([60, 100])
+        mrna1.exon.add_indices([301, 520])
+        mrna1.cds = CDS(identifier="cds1", indices=[20, 40], phase=0, parent_id="gene1-RA")
+        mrna1.cds.add_indices([60, 90])
+        mrna1.add_annotation("product", "widget")
+        mrna2 = XRNA("gene1-RB", [1, 100], "gene1")
+        mrna2.exon = Exon(identifier="exon2", indices=[1, 100], parent_id="gene1-RB")
+        mrna2.cds = CDS(identifier="cds2", indices=[10, 99], phase=0, parent_id="gene1-RB")
+        gene1.mrnas = [mrna1, mrna2]
+        gene2 = Gene("seq1", "maker", [601, 700], '-', "gene2")
+        mrna3 = XRNA("gene2-RA", [601, 700], "gene2")
+        mrna3.exon = Exon(identifier="exon3", indices=[601, 700], parent_id="gene2-RA")
+        gene2.mrnas = [mrna3]
+        self.seq.genes = [gene1, gene2]
+        self.metrics = TranscriptMetrics(self.seq)
+
+    def mask(self, source):
+        return FilterExpression(source).mask(self.metrics)
+
+    def test_tokenize(self):
+        self.assertEquals([('name', 'cds.length'), ('symbol', '<='), ('number', 150)],
+                          tokenize("cds.length<=150 "))
+
+    def test_comparisons(self):
+        # A missing CDS has length 0
+        self.assertEquals([True, False, True], self.mask("cds.length < 60"))
+        self.assertEquals([False, True, True], self.mask("exon.count == 1"))
+        self.assertEquals([True, False, False], self.mask("intron.count != 0"))
+        self.assertEquals([True, True, False], self.mask("gene.length >= 520"))
+        self.assertEquals([True, False, False], self.mask("mrna.length > 100"))
+        self.assertEquals([True, True, True], self.mask("100 >= exon.shortest"))
+
+    def test_boolean_metrics(self):
+        self.assertEquals([True, False, False], self.mask("product"))
+        self.assertEquals([False, True, True], self.mask("not product"))
+        self.assertEquals([False, False, True], self.mask("not cds.present"))
+
+    def test_precedence(self):
+        # 'and' binds tighter than 'or'
+        self.assertEquals([True, False, True], self.mask("product or not cds.present and exon.count == 1"))
+        self.assertEquals([False, False, True], self.mask("(product or not cds.present) and exon.count == 1"))
+        self.assertEquals([False, True, True], self.mask("not (product and intron.shortest < 100)"))
+
+    def test_errors(self):
+        for source in ["", "cds.length <", "cds.width < 3", "cds.length < 3 and", "(exon.count == 1",
+                       "exon.count == 1)", "cds.length < 3.5", "cds.length = 3"]:
+            self.assertRaises(FilterExpressionError, FilterExpression, source)
+
+    def test_shortest_intron_of_overlapping_exons(self):
+        mrna = self.seq.genes[1].mrnas[0]
+        mrna.exon.indices = [[601, 650], [640, 700]]
+        metrics = TranscriptMetrics(self.seq)
+        self.assertRaises(FilterExpressionError, FilterExpression("intron.shortest < 10").mask, metrics)
+        # Terms that are never reached are never read
+        self.assertEquals([False, True, True],
+                          FilterExpression("exon.count < 3 or intron.shortest < 10").mask(metrics))
+        self.assertRaises(FilterExpressionError, ExpressionFilter("intron.shortest < 10").fails, mrna)
+
+    def test_filter_fails_matches_mask(self):
+        expression_filter = ExpressionFilter("cds.length < 100 and exon.count == 1")
+        mrnas = [mrna for gene in self.seq.genes for mrna in gene.mrnas]
+        self.assertEquals(expression_filter.mask(self.metrics),
+                          [expression_filter.fails(mrna) for mrna in mrnas])
+
+    def test_filter_fails_with_gene_metric(self):
+        expression_filter = ExpressionFilter("gene.length >= 520 and cds.present")
+        gene1, gene2 = self.seq.genes
+        self.assertTrue(expression_filter.fails(gene1.mrnas[0], gene1))
+        self.assertFalse(expression_filter.fails(gene2.mrnas[0], gene2))
+        self.assertRaises(FilterExpressionError, expression_filter.fails, gene1.mrnas[0])
+
+    def test_filter_same_as_builtin(self):
+        expression_filter = ExpressionFilter("cds.present and cds.length < 60")
+        mrnas = [mrna for gene in self.seq.genes for mrna in gene.mrnas]
+        self.assertEquals([bool(MinCDSLengthFilter(60).fails(mrna)) for mrna in mrnas],
+                          expression_filter.mask(self.metrics))
+
+    def test_flag_annotates_cds_or_exon(self):
+        expression_filter = ExpressionFilter("not product")
+        expression_filter.filter_mode = "FLAG"
+        expression_filter.messages = []
+        expression_filter.apply(self.seq)
+        self.assertEquals([['gag_flag', "filter:not product"]], self.seq.genes[0].mrnas[1].cds.annotations)
+        self.assertEquals([['gag_flag', "filter:not product"]], self.seq.genes[1].mrnas[0].exon.annotations)
+        self.assertEquals(["Flagging mRNA: gene1-RB", "Flagging mRNA: gene2-RA", "\nFlagged 2 mRNAs"],
+                          expression_filter.messages)
+
+    def test_remove(self):
+        expression_filter = ExpressionFilter("gene.length < 200")
+        expression_filter.messages = []
+        expression_filter.apply(self.seq)
+        self.assertEquals(2, len(self.seq.genes[0].mrnas))
+        self.assertEquals([], self.seq.genes[1].mrnas)
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestFilterExpression))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
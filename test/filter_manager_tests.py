@@ -1,9 +1,45 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import copy
+import io
 import unittest
-from mock import Mock
+from mock import Mock, patch
+from src.cds import CDS
+from src.exon import Exon
 from src.filter_manager import FilterManager
+from src.filter_report import FilterReport
+from src.gene import Gene
+from src.sequence import Sequence
+from src.xrna import XRNA
+
+
+def build_seq():
+    """Returns a Sequence with genes of assorted gene, exon and CDS lengths."""
+    seq = Sequence("seq1", "A" * 1000)
+    layouts = [[[1, 40], [60, 100]], [[101, 300]], [[301, 305], [320, 400], [500, 520]], [[601, 900]]]
+    for i, layout in enumerate(layouts):
+        gene = Gene("seq1", "maker", [layout[0][0], layout[-1][1]], '+', "gene" + str(i))
+        for j in range(2):
+            mrna_id = "gene" + str(i) + "-R" + str(j)
+            mrna = XRNA(mrna_id, [layout[0][0], layout[-1][1]], gene.identifier, seq_name="seq1")
+            mrna.exon = Exon(identifier=mrna_id + ":exon", indices=list(layout[0]), parent_id=mrna_id)
+            for pair in layout[1:]:
+                mrna.exon.add_indices(list(pair))
+            # Second isoform has a CDS over the first segment only
+            cds_layout = layout if j == 0 else layout[:1]
+            mrna.cds = CDS(identifier=mrna_id + ":cds", indices=list(cds_layout[0]), phase=0, parent_id=mrna_id)
+            for pair in cds_layout[1:]:
+                mrna.cds.add_indices(list(pair))
+            gene.mrnas.append(mrna)
+        seq.add_gene(gene)
+    return seq
+
+
+def describe(seq, removed):
+    genes = [(g.identifier, sorted(g.annotations.items()),
+              [(m.identifier, m.cds.annotations, m.exon.annotations) for m in g.mrnas]) for g in seq.genes]
+    return genes, [feature.identifier for feature in removed]
 
 
 class TestFilterManager(unittest.TestCase):
@@ -19,6 +55,69 @@ class TestFilterManager(unittest.TestCase):
         self.assertEqual(self.filter_mgr.get_filter_arg('cds_shorter_than'), 30)
         self.filter_mgr.filters['cds_shorter_than'].apply.assert_called_with(fake_seq)
 
+    def test_apply_filters_matches_sequential(self):
+        specs = [["cds_shorter_than", "100", "REMOVE"], ["exon_shorter_than", "10", "REMOVE"],
+                 ["intron_longer_than", "50", "FLAG"], ["gene_shorter_than", "250", "REMOVE"],
+                 ["gene_longer_than", "200", "FLAG"], ["cds_longer_than", "250", "LIST"]]
+        seq = build_seq()
+        fused_seq = copy.deepcopy(seq)
+        # Sequential: one filter at a time, cleaning up empty features after each
+        removed = []
+        filtered = []
+        for spec in specs:
+            filtered.extend(self.filter_mgr.apply_filter(spec[0], spec[1], spec[2], seq))
+            removed.extend(seq.remove_empty_mrnas())
+            removed.extend(seq.remove_empty_genes())
+        fused_removed, fused_filtered = FilterManager().apply_filters(specs, [fused_seq])
+        self.assertEqual(describe(seq, removed), describe(fused_seq, fused_removed))
+        # The same features, though gene by gene rather than filter by filter
+        self.assertEqual(["gene0-R0", "gene0-R1", "gene1", "gene2-R0", "gene2-R1"],
+                         sorted(feature.identifier for feature in filtered))
+        self.assertEqual(sorted(feature.identifier for feature in filtered),
+                         sorted(feature.identifier for feature in fused_filtered))
+        self.assertEqual(["gene3"], [gene.identifier for gene in fused_seq.genes])
+
+    def test_apply_filters_records_in_report(self):
+        specs = [["cds_shorter_than", "100", "REMOVE"], ["gene_longer_than", "200", "FLAG"]]
+        seq = build_seq()
+        report = FilterReport()
+        FilterManager().apply_filters(specs, [seq], report)
+        self.assertEqual([("gene0-R0", "cds_shorter_than", "100", "remove"),
+                          ("gene0-R1", "cds_shorter_than", "100", "remove"),
+                          ("gene0", "empty_gene", "", "remove")], report.rows[:3])
+        self.assertEqual([["cds_shorter_than", "100", "remove", 3], ["empty_gene", "", "remove", 1],
+                          ["gene_longer_than", "200", "flag", 2]], report.counts())
+
+    def test_apply_filters_with_report_prints_one_summary_per_filter(self):
+        specs = [["cds_shorter_than", "100", "REMOVE"], ["gene_longer_than", "200", "FLAG"]]
+        seqs = [build_seq(), build_seq()]
+        with patch('sys.stdout', new_callable=io.BytesIO) as stdout:
+            FilterManager().apply_filters(specs, seqs, FilterReport())
+        self.assertEqual("\nRemoved 6 mRNAs\n\nFlagged 4 genes\n", stdout.getvalue())
+
+    def test_list_mode_writes_ids_and_records_in_report(self):
+        seq = build_seq()
+        list_filter = self.filter_mgr.build_filter("cds_shorter_than", "100", "LIST")
+        list_filter.messages = []
+        list_filter.report = FilterReport()
+        list_filter.apply(seq)
+        self.assertEqual(["gene0-R0", "gene0-R1", "gene2-R1", "3 mRNAs"], list_filter.messages)
+        self.assertEqual([["cds_shorter_than", "100", "list", 3]], list_filter.report.counts())
+
+    def test_apply_filters_negative_intron_removed_earlier(self):
+        seq = build_seq()
+        # Overlapping exons on a transcript the CDS filter removes first
+        seq.genes[0].mrnas[0].exon.indices = [[1, 40], [30, 100]]
+        FilterManager().apply_filters([["cds_shorter_than", "100", "REMOVE"],
+                                       ["intron_shorter_than", "10", "REMOVE"]], [seq])
+        self.assertEqual(["gene1", "gene2", "gene3"], [gene.identifier for gene in seq.genes])
+
+    def test_apply_filters_negative_intron_raises(self):
+        seq = build_seq()
+        seq.genes[3].mrnas[0].exon.indices = [[601, 700], [650, 900]]
+        self.assertRaises(Exception, FilterManager().apply_filters,
+                          [["cds_shorter_than", "100", "REMOVE"], ["intron_shorter_than", "10", "REMOVE"]], [seq])
+
 
 def suite():
     _suite = unittest.TestSuite()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import json
+import unittest
+from StringIO import StringIO
+
+from src.filter_report import FilterReport
+
+
+class TestFilterReport(unittest.TestCase):
+    def setUp(self):
+        self.report = FilterReport()
+        self.report.add("mrna1", "cds_shorter_than", 150, "remove")
+        self.report.add("gene1", "empty_gene", "", "remove")
+        self.report.add("mrna2", "cds_shorter_than", 150, "remove")
+        self.report.add("gene2", "gene_longer_than", 20000, "flag")
+
+    def test_counts(self):
+        self.assertEquals([["cds_shorter_than", "150", "remove", 2], ["empty_gene", "", "remove", 1],
+                           ["gene_longer_than", "20000", "flag", 1]], self.report.counts())
+
+    def test_summary(self):
+        self.assertEquals(["cds_shorter_than 150: removed 2\n", "empty_gene: removed 1\n",
+                           "gene_longer_than 20000: flagged 1\n"], self.report.summary())
+
+    def test_write_tsv(self):
+        io_buffer = StringIO()
+        self.report.write_tsv(io_buffer)
+        lines = io_buffer.getvalue().split("\n")
+        self.assertEquals("feature_id\tfilter\tvalue\taction", lines[0])
+        self.assertEquals("gene1\tempty_gene\t\tremove", lines[2])
+        self.assertEquals(6, len(lines))
+
+    def test_write_json(self):
+        io_buffer = StringIO()
+        self.report.write_json(io_buffer)
+        rows = json.loads(io_buffer.getvalue())
+        self.assertEquals(4, len(rows))
+        self.assertEquals({"feature_id": "gene2", "filter": "gene_longer_than", "value": "20000", "action": "flag"},
+                          rows[3])
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestFilterReport))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
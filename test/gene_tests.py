@@ -5,6 +5,7 @@ import unittest
 
 from mock import Mock
 
+from src.filter_report import FilterReport
 from src.gene import Gene
 
 
@@ -54,6 +55,15 @@ class TestGene(unittest.TestCase):
         self.assertEquals(self.test_gene1.mrnas, [self.fake_mrna2])
         self.assertEquals(self.test_gene1.removed_mrnas, [self.fake_mrna1])
 
+    def test_remove_mrnas_keeps_order(self):
+        fake_mrna3 = Mock()
+        self.test_gene1.mrnas.append(fake_mrna3)
+        mrnas = self.test_gene1.mrnas
+        self.test_gene1.remove_mrnas([fake_mrna3, self.fake_mrna1])
+        self.assertEquals([self.fake_mrna2], self.test_gene1.mrnas)
+        self.assertTrue(mrnas is self.test_gene1.mrnas)
+        self.assertEquals([fake_mrna3, self.fake_mrna1], self.test_gene1.removed_mrnas)
+
     def test_remove_mrnas_from_list(self):
         self.fake_mrna3 = Mock()
         self.fake_mrna3.identifier = "fake_mrna3"
@@ -88,6 +98,18 @@ class TestGene(unittest.TestCase):
         self.assertEquals(1, len(self.test_gene1.mrnas))
         self.assertEquals(2, len(self.test_gene1.removed_mrnas))
 
+    def test_remove_empty_mrnas_records_in_report(self):
+        self.fake_mrna1.rna_type = "mRNA"
+        self.fake_mrna1.cds = Mock()
+        self.fake_mrna1.exon = None
+        self.fake_mrna2.rna_type = "mRNA"
+        self.fake_mrna2.cds = None
+        self.fake_mrna2.exon = Mock()
+        report = FilterReport()
+        self.test_gene1.remove_empty_mrnas(report)
+        self.assertEquals([("fake_mrna1", "no_exon", "", "remove"), ("fake_mrna2", "no_cds", "", "remove")],
+                          report.rows)
+
     def test_get_longest_exon(self):
         self.fake_mrna1.get_longest_exon.return_value = 10
         self.fake_mrna2.get_longest_exon.return_value = 20
@@ -152,6 +174,22 @@ class TestGene(unittest.TestCase):
         self.test_gene1.remove_mrnas_with_internal_stops(helper)
         self.assertEquals(0, len(self.test_gene1.mrnas))
 
+    def test_remove_mrnas_with_internal_stops_returns_removed(self):
+        helper = Mock()
+        helper.mrna_contains_internal_stop.side_effect = lambda mrna: mrna is self.fake_mrna2
+        removed = self.test_gene1.remove_mrnas_with_internal_stops(helper)
+        self.assertEquals([self.fake_mrna2], removed)
+        self.assertEquals([self.fake_mrna1], self.test_gene1.mrnas)
+        self.assertEquals([self.fake_mrna2], self.test_gene1.removed_mrnas)
+
+    def test_remove_mrnas_with_internal_stops_records_in_report(self):
+        helper = Mock()
+        helper.mrna_contains_internal_stop.side_effect = lambda mrna: mrna is self.fake_mrna2
+        self.fake_mrna2.identifier = "bar_mrna"
+        report = FilterReport()
+        self.test_gene1.remove_mrnas_with_internal_stops(helper, report)
+        self.assertEquals([("bar_mrna", "internal_stop", "", "remove")], report.rows)
+
     def test_contains_mrna(self):
         self.fake_mrna1.identifier = "foo_mrna"
         self.fake_mrna2.identifier = "bar_mrna"
@@ -294,6 +294,47 @@ class TestGFFReader(unittest.TestCase):
         self.assertEquals(1, len(genes))
         self.assertEquals({"Dbxref": ["PRINTS:PR00075", "PFAM:foo"]}, genes[0].mrnas[0].annotations)
 
+    def test_read_file_duplicate_ids(self):
+        text = get_sample_text()
+        duplicate = "scaffold00080\tmaker\tgene\t1\t100\t.\t+\t.\tID=BDOR_007864\n"
+        inbuff = io.BytesIO(text + duplicate)
+        genes, comments, invalids, ignored = self.reader.read_file(inbuff)
+        self.assertEquals(2, len(genes))
+        self.assertEquals(duplicate, ignored[-1])
+        self.assertEquals(["BDOR_007864"], self.reader.duplicate_ids)
+        gene = [g for g in genes if g.identifier == "BDOR_007864"][0]
+        self.assertEquals([106151, 109853], gene.indices)
+
+    def test_read_file_duplicate_gene_with_children(self):
+        first = "seq1\tmaker\tgene\t1\t60\t.\t+\t.\tID=G1\n" + \
+                "seq1\tmaker\tmRNA\t1\t60\t.\t+\t.\tID=G1-RA;Parent=G1\n" + \
+                "seq1\tmaker\texon\t1\t60\t.\t+\t.\tID=G1-RA:exon1;Parent=G1-RA\n" + \
+                "seq1\tmaker\tCDS\t1\t60\t.\t+\t0\tID=G1-RA:cds1;Parent=G1-RA\n"
+        duplicate = ["seq1\tmaker\tgene\t100\t200\t.\t+\t.\tID=G1\n",
+                     "seq1\tmaker\tmRNA\t100\t150\t.\t+\t.\tID=G1-RB;Parent=G1\n",
+                     "seq1\tmaker\texon\t100\t150\t.\t+\t.\tID=G1-RB:exon1;Parent=G1-RB\n",
+                     "seq1\tmaker\tmRNA\t160\t200\t.\t+\t.\tID=G1-RA;Parent=G1\n",
+                     "seq1\tmaker\texon\t160\t200\t.\t+\t.\tID=G1-RA:exon2;Parent=G1-RA\n",
+                     "seq1\tmaker\tCDS\t160\t200\t.\t+\t0\tID=G1-RA:cds2;Parent=G1-RA\n"]
+        genes, comments, invalids, ignored = self.reader.read_file(io.BytesIO(first + "".join(duplicate)))
+        self.assertEquals(1, len(genes))
+        self.assertEquals([1, 60], genes[0].indices)
+        self.assertEquals(["G1-RA"], [mrna.identifier for mrna in genes[0].mrnas])
+        self.assertEquals([[1, 60]], genes[0].mrnas[0].exon.indices)
+        self.assertEquals([[1, 60]], genes[0].mrnas[0].cds.indices)
+        self.assertEquals(duplicate, ignored)
+        self.assertEquals(["G1", "G1-RA"], self.reader.duplicate_ids)
+
+    def test_read_file_orphan_of_duplicate_rna_is_ignored(self):
+        orphan = "seq1\tmaker\texon\t1\t60\t.\t+\t.\tID=R1:exon1;Parent=R1\n"
+        text = orphan + \
+            "seq1\tmaker\tgene\t1\t60\t.\t+\t.\tID=G1\n" + \
+            "seq1\tmaker\tmRNA\t1\t60\t.\t+\t.\tID=R1;Parent=G1\n" + \
+            "seq1\tmaker\tmRNA\t1\t60\t.\t+\t.\tID=R1;Parent=G1\n"
+        genes, comments, invalids, ignored = self.reader.read_file(io.BytesIO(text))
+        self.assertEquals(None, genes[0].mrnas[0].exon)
+        self.assertEquals(orphan, ignored[-1])
+
     def test_CDS_knows_its_strand(self):
         text = get_annotated_gff()
         inbuff = io.BytesIO(text)
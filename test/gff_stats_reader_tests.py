@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import io
+import random
+import unittest
+
+from src.gff_reader import GFFReader
+from src.gff_stats_reader import GFFStatsReader
+from src.sequence import Sequence
+from src.stats_accumulator import sequence_summary
+from test.stats_accumulator_tests import random_seq
+
+
+def gff_lines(seq):
+    """Returns GFF lines for a Sequence from random_seq, one per exon and CDS segment."""
+    lines = []
+
+    def add_line(feature_type, indices, attributes):
+        lines.append("\t".join([seq.header, "maker", feature_type, str(indices[0]), str(indices[1]),
+                                ".", "+", "0", attributes]) + "\n")
+
+    for gene in seq.genes:
+        add_line("gene", gene.indices, "ID=" + gene.identifier)
+        for mrna in gene.mrnas:
+            add_line("mRNA", mrna.indices, "ID=" + mrna.identifier + ";Parent=" + gene.identifier)
+            for part in [mrna.exon, mrna.cds] + mrna.other_features:
+                if part is None:
+                    continue
+                for i, indices in enumerate(part.indices):
+                    add_line(part.feature_type, indices,
+                             "ID=" + mrna.identifier + ":" + part.feature_type + str(i) +
+                             ";Parent=" + mrna.identifier)
+    return lines
+
+
+def comparable(result):
+    """Returns a read result with its LengthDistributions as dicts, so results can be compared."""
+    header, stats, distributions = result
+    return header, stats, dict((key, value.to_dict()) for key, value in distributions.items())
+
+
+def loaded_result(gff, header, length):
+    """Returns a comparable read result for the genome GFFReader builds from the gff text."""
+    seq = Sequence(header, "A" * length)
+    genes = GFFReader().read_file(io.BytesIO(gff))[0]
+    for gene in genes:
+        if gene.seq_name == header:
+            seq.add_gene(gene)
+    return comparable((header,) + sequence_summary(seq))
+
+
+class TestGFFStatsReader(unittest.TestCase):
+    def test_matches_loaded_genome(self):
+        rng = random.Random(17)
+        for _ in range(20):
+            gff = "".join(gff_lines(random_seq(rng, rng.randint(0, 12))))
+            reader = GFFStatsReader({"seq1": 5000})
+            results = [comparable(result) for result in reader.read(io.BytesIO(gff))]
+            self.assertEquals([loaded_result(gff, "seq1", 5000)], results)
+
+    def test_children_before_parents(self):
+        gff = "".join(reversed(gff_lines(random_seq(random.Random(19), 6))))
+        reader = GFFStatsReader({"seq1": 5000})
+        results = [comparable(result) for result in reader.read(io.BytesIO(gff))]
+        self.assertEquals([loaded_result(gff, "seq1", 5000)], results)
+
+    def test_duplicate_gene_with_children(self):
+        gff = "seq1\tmaker\tgene\t1\t60\t.\t+\t.\tID=G1\n" + \
+              "seq1\tmaker\tmRNA\t1\t60\t.\t+\t.\tID=G1-RA;Parent=G1\n" + \
+              "seq1\tmaker\texon\t1\t60\t.\t+\t.\tID=G1-RA:exon1;Parent=G1-RA\n" + \
+              "seq1\tmaker\tCDS\t1\t60\t.\t+\t0\tID=G1-RA:cds1;Parent=G1-RA\n" + \
+              "seq1\tmaker\tgene\t100\t200\t.\t+\t.\tID=G1\n" + \
+              "seq1\tmaker\tmRNA\t100\t150\t.\t+\t.\tID=G1-RB;Parent=G1\n" + \
+              "seq1\tmaker\texon\t100\t150\t.\t+\t.\tID=G1-RB:exon1;Parent=G1-RB\n" + \
+              "seq1\tmaker\tmRNA\t160\t200\t.\t+\t.\tID=G1-RA;Parent=G1\n" + \
+              "seq1\tmaker\texon\t160\t200\t.\t+\t.\tID=G1-RA:exon2;Parent=G1-RA\n" + \
+              "seq1\tmaker\tCDS\t160\t200\t.\t+\t0\tID=G1-RA:cds2;Parent=G1-RA\n"
+        results = [comparable(result) for result in GFFStatsReader({"seq1": 500}).read(io.BytesIO(gff))]
+        self.assertEquals([loaded_result(gff, "seq1", 500)], results)
+        self.assertEquals(1, results[0][1]["Number of mRNAs"])
+        self.assertEquals(60, results[0][1]["Total CDS length"])
+
+    def test_sequences_without_features_and_unknown_sequences(self):
+        gff = "seq2\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n" + \
+              "seq2\tmaker\tmRNA\t1\t100\t.\t+\t.\tID=mrna1;Parent=gene1\n" + \
+              "seq2\tmaker\tintron\t10\t20\t.\t+\t.\tID=intron1;Parent=mrna1\n"
+        reader = GFFStatsReader({"seq1": 500})
+        results = list(reader.read(io.BytesIO(gff)))
+        self.assertEquals(1, len(results))
+        self.assertEquals("seq1", results[0][0])
+        self.assertEquals(500, results[0][1]["Total sequence length"])
+        self.assertEquals(0, results[0][1]["Number of genes"])
+        self.assertEquals(1, reader.skipped_features)
+
+    def test_sequence_length_counted_once_when_features_are_split(self):
+        gff = "seq1\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene1\n" + \
+              "seq2\tmaker\tgene\t1\t100\t.\t+\t.\tID=gene2\n" + \
+              "seq1\tmaker\tgene\t50\t150\t.\t+\t.\tID=gene3\n"
+        reader = GFFStatsReader({"seq1": 500, "seq2": 300})
+        results = list(reader.read(io.BytesIO(gff)))
+        self.assertEquals(3, len(results))
+        self.assertEquals(800, sum(result[1]["Total sequence length"] for result in results))
+        self.assertEquals(3, sum(result[1]["Number of genes"] for result in results))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestGFFStatsReader))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import random
+import unittest
+
+from src.length_distribution import LengthDistribution
+
+
+class TestLengthDistribution(unittest.TestCase):
+    def test_empty(self):
+        distribution = LengthDistribution()
+        self.assertEquals(0, distribution.quantile(0.5))
+        self.assertEquals(0, sum(count for label, count in distribution.histogram_rows()))
+
+    def test_small_lengths_are_exact(self):
+        distribution = LengthDistribution()
+        for length in range(1, 50):
+            distribution.add(length)
+        self.assertEquals(1, distribution.quantile(0))
+        self.assertEquals(25, distribution.quantile(0.5))
+        self.assertEquals(49, distribution.quantile(1))
+
+    def test_quantiles_within_one_percent(self):
+        rng = random.Random(23)
+        lengths = sorted(rng.randint(1, 200000) for _ in range(5000))
+        distribution = LengthDistribution()
+        for length in lengths:
+            distribution.add(length)
+        for fraction in [0.05, 0.5, 0.95]:
+            expected = lengths[int(fraction * (len(lengths) - 1))]
+            self.assertTrue(abs(distribution.quantile(fraction) - expected) <= 0.01 * expected + 1)
+
+    def test_histogram(self):
+        distribution = LengthDistribution()
+        for length in [1, 49, 50, 999, 1000, 100000, 250000]:
+            distribution.add(length)
+        rows = dict(distribution.histogram_rows())
+        self.assertEquals(2, rows["1-49"])
+        self.assertEquals(1, rows["50-99"])
+        self.assertEquals(1, rows["500-999"])
+        self.assertEquals(1, rows["1000-1999"])
+        self.assertEquals(2, rows["100000+"])
+
+    def test_merge_same_as_adding_everything(self):
+        rng = random.Random(29)
+        lengths = [rng.randint(1, 10000) for _ in range(1000)]
+        whole = LengthDistribution()
+        parts = [LengthDistribution(), LengthDistribution(), LengthDistribution()]
+        for i, length in enumerate(lengths):
+            whole.add(length)
+            parts[i % 3].add(length)
+        merged = LengthDistribution()
+        for part in parts:
+            merged.merge(part)
+        self.assertEquals(whole.to_dict(), merged.to_dict())
+
+    def test_add_with_count(self):
+        distribution = LengthDistribution()
+        distribution.add(1200, 3)
+        distribution.add(7)
+        self.assertEquals(4, distribution.count)
+        self.assertEquals(1200, distribution.quantile(0.5))
+        self.assertEquals(7, distribution.quantile(0))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestLengthDistribution))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
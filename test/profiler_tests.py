@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import io
+import json
+import unittest
+
+from src.profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled(self):
+        profiler = Profiler()
+        profiler.begin("read_fasta")
+        profiler.count("bytes", 10)
+        profiler.end()
+        self.assertEquals([], profiler.stages)
+
+    def test_stages(self):
+        profiler = Profiler()
+        profiler.enable()
+        profiler.begin("read_fasta")
+        profiler.count("bytes", 10)
+        profiler.count("bytes", 5)
+        profiler.begin("read_gff")
+        profiler.count("lines", 3)
+        profiler.end()
+        self.assertEquals(["read_fasta", "read_gff"], [stage["stage"] for stage in profiler.stages])
+        self.assertEquals({"bytes": 15}, profiler.stages[0]["counts"])
+        self.assertEquals({"lines": 3}, profiler.stages[1]["counts"])
+        for stage in profiler.stages:
+            self.assertTrue(stage["wall_seconds"] >= 0)
+            self.assertTrue(stage["cpu_seconds"] >= 0)
+            self.assertTrue("peak_rss_mb" in stage)
+            self.assertTrue("rss_change_mb" in stage)
+
+    def test_page_faults(self):
+        profiler = Profiler()
+        profiler.enable()
+        profiler.begin("load")
+        # 10 MB is about 2500 pages, each faulted in when first written
+        kept = "x" * 10000000
+        profiler.end()
+        if profiler.stages[0]["page_faults"] is not None:
+            self.assertTrue(profiler.stages[0]["page_faults"] >= 1000)
+        self.assertEquals(10000000, len(kept))
+
+    def test_count_outside_stage(self):
+        profiler = Profiler()
+        profiler.enable()
+        profiler.count("bytes", 10)
+        profiler.end()
+        self.assertEquals([], profiler.stages)
+
+    def test_summary(self):
+        profiler = Profiler()
+        profiler.enable()
+        profiler.begin("read_fasta")
+        profiler.count("sequences", 2)
+        profiler.end()
+        lines = profiler.summary()
+        self.assertEquals(3, len(lines))
+        self.assertTrue(lines[0].startswith("Stage"))
+        self.assertTrue(lines[1].startswith("read_fasta"))
+        self.assertTrue(lines[1].endswith("sequences=2\n"))
+        self.assertTrue(lines[2].startswith("Total"))
+
+    def test_write_json(self):
+        profiler = Profiler()
+        profiler.enable()
+        profiler.begin("write_output")
+        profiler.end()
+        buf = io.BytesIO()
+        profiler.write_json(buf)
+        self.assertEquals("write_output", json.loads(buf.getvalue())[0]["stage"])
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestProfiler))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import io
+import json
+import unittest
+
+from src.progress import ProgressReporter, format_seconds
+
+
+class TestProgressReporter(unittest.TestCase):
+    def test_no_format(self):
+        stream = io.BytesIO()
+        progress = ProgressReporter(None, stream)
+        seqs = ["seq1", "seq2"]
+        self.assertIs(seqs, progress.items("filters", seqs, "scaffolds"))
+        lines = io.BytesIO("a\nb\n")
+        self.assertIs(lines, progress.lines("read_gff", lines))
+        self.assertEquals("", stream.getvalue())
+
+    def test_text_quick_step_not_reported(self):
+        stream = io.BytesIO()
+        progress = ProgressReporter("text", stream)
+        self.assertEquals(["a\n", "b\n"], list(progress.lines("read_gff", io.BytesIO("a\nb\n"))))
+        self.assertEquals("", stream.getvalue())
+
+    def test_text(self):
+        stream = io.BytesIO()
+        progress = ProgressReporter("text", stream, interval=0)
+        self.assertEquals(["seq1", "seq2"], list(progress.items("filters", ["seq1", "seq2"], "scaffolds")))
+        lines = stream.getvalue().splitlines()
+        self.assertEquals(3, len(lines))
+        self.assertTrue(lines[0].startswith("filters: 1 scaffolds of 2, "))
+        self.assertTrue("ETA" in lines[0])
+        self.assertTrue(lines[2].startswith("filters: 2 scaffolds of 2, "))
+        self.assertTrue("done in" in lines[2])
+
+    def test_json(self):
+        stream = io.BytesIO()
+        progress = ProgressReporter("json", stream)
+        list(progress.lines("read_gff", io.BytesIO("a\nbc\n")))
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEquals(1, len(events))
+        self.assertEquals("done", events[0]["event"])
+        self.assertEquals("read_gff", events[0]["stage"])
+        self.assertEquals(2, events[0]["count"])
+
+    def test_format_seconds(self):
+        self.assertEquals("0:00:05", format_seconds(5.7))
+        self.assertEquals("1:01:01", format_seconds(3661))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestProgressReporter))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -113,6 +113,22 @@ class TestSeqHelper(unittest.TestCase):
         # make sure the method catches it
         self.assertTrue(helper.mrna_contains_internal_stop(mrna))
 
+    def test_get_cds_sequence_on_strand_leaves_out_segments_past_end(self):
+        helper = SeqHelper("ATGaaaTAGccc")
+        mrna = Mock()
+        mrna.strand = '+'
+        mrna.cds = Mock()
+        mrna.cds.indices = [[1, 9], [11, 20]]
+        self.assertEquals("ATGaaaTAG", helper.get_cds_sequence_on_strand(mrna, '+'))
+
+    def test_get_cds_sequence_on_strand_uses_strand(self):
+        helper = SeqHelper("ATGaaaTAGccc")
+        mrna = Mock()
+        mrna.strand = '+'
+        mrna.cds = Mock()
+        mrna.cds.indices = [[1, 9]]
+        self.assertEquals("CTAtttCAT", helper.get_cds_sequence_on_strand(mrna, '-'))
+
 
 def suite():
     _suite = unittest.TestSuite()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from mock import Mock
+
+from src.seq_helper import SeqHelper
+from src.sequence_cache import SequenceCache
+
+
+class TestSequenceCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SequenceCache(max_bytes=10)
+
+    def test_get_missing(self):
+        self.assertEquals(None, self.cache.get('foo'))
+        self.assertEquals(1, self.cache.misses)
+
+    def test_put_and_get(self):
+        self.cache.put('foo', 'GATTACA')
+        self.assertEquals('GATTACA', self.cache.get('foo'))
+        self.assertEquals(1, self.cache.hits)
+        self.assertEquals(7, self.cache.total_bytes)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put('foo', 'GATT')
+        self.cache.put('bar', 'ACAG')
+        self.cache.get('foo')
+        self.cache.put('baz', 'ATTA')
+        self.assertEquals('GATT', self.cache.get('foo'))
+        self.assertEquals(None, self.cache.get('bar'))
+        self.assertEquals(8, self.cache.total_bytes)
+
+    def test_oversized_value_not_cached(self):
+        self.cache.put('foo', 'GATTACAGATTACA')
+        self.assertEquals(0, len(self.cache))
+        self.assertEquals(0, self.cache.total_bytes)
+
+    def test_replace_value(self):
+        self.cache.put('foo', 'GATT')
+        self.cache.put('foo', 'GA')
+        self.assertEquals(1, len(self.cache))
+        self.assertEquals(2, self.cache.total_bytes)
+
+    def test_clear(self):
+        self.cache.put('foo', 'GATT')
+        self.cache.clear()
+        self.assertEquals(0, len(self.cache))
+        self.assertEquals(0, self.cache.total_bytes)
+
+    def test_seq_helper_uses_cache(self):
+        cache = SequenceCache()
+        mrna = Mock()
+        mrna.identifier = "foo_mrna"
+        mrna.version = 0
+        mrna.strand = '+'
+        mrna.cds.indices = [[4, 10]]
+        helper = SeqHelper("nnnGATTACAnnn", cache, ("seq1", 0))
+        self.assertEquals("GATTACA", helper.get_cds_sequence(mrna))
+        # Same key, different bases: the cached value is returned
+        other_helper = SeqHelper("nnnCCCCCCCnnn", cache, ("seq1", 0))
+        self.assertEquals("GATTACA", other_helper.get_cds_sequence(mrna))
+        # A new transcript version or sequence version misses the cache
+        mrna.version = 1
+        self.assertEquals("CCCCCCC", other_helper.get_cds_sequence(mrna))
+        newer_helper = SeqHelper("nnnTTTTTTTnnn", cache, ("seq1", 1))
+        self.assertEquals("TTTTTTT", newer_helper.get_cds_sequence(mrna))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestSequenceCache))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
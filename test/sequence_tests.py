@@ -5,7 +5,11 @@ import unittest
 
 from mock import Mock
 
+from src.cds import CDS
+from src.exon import Exon
+from src.gene import Gene
 from src.sequence import Sequence, overlap
+from src.xrna import XRNA
 
 
 class TestSequence(unittest.TestCase):
@@ -33,6 +37,7 @@ class TestSequence(unittest.TestCase):
         mockgene.mrnas[0].cds = Mock()
         mockgene.mrnas[0].cds.identifier = [name + "-RA:CDS"]
         mockgene.mrnas[0].cds.length = Mock(return_value=5)
+        mockgene.mrnas[0].cds.indices = [[2, 3], [6, 8]]
         mockgene.mrnas[0].exon = Mock()
         mockgene.mrnas[0].length = Mock(return_value=2)
         mockgene.get_valid_mrnas = Mock(return_value=mockgene.mrnas)
@@ -63,6 +68,7 @@ class TestSequence(unittest.TestCase):
         mockgene.mrnas[1].cds = Mock()
         mockgene.mrnas[1].cds.identifier = [name + "-RB:CDS"]
         mockgene.mrnas[1].cds.length = Mock(return_value=3)
+        mockgene.mrnas[1].cds.indices = [[21, 23]]
         mockgene.mrnas[1].exon = Mock()
         mockgene.mrnas[1].length = Mock(return_value=2)
         mockgene.get_valid_mrnas = Mock(return_value=mockgene.mrnas)
@@ -141,6 +147,14 @@ class TestSequence(unittest.TestCase):
         self.assertEqual(0, len(self.seq1.genes))
         self.assertEqual(1, len(self.seq1.removed_genes))
 
+    def test_remove_genes_keeps_order(self):
+        for name in ['foo_gene', 'bar_gene', 'zub_gene', 'baz_gene']:
+            self.add_mock_gene(name)
+        genes = list(self.seq1.genes)
+        self.seq1.remove_genes([genes[2], genes[0]])
+        self.assertEquals([genes[1], genes[3]], self.seq1.genes)
+        self.assertEquals([genes[2], genes[0]], self.seq1.removed_genes)
+
     def test_remove_genes_from_list(self):
         self.add_mock_gene('foo_gene')
         self.add_mock_gene('bar_gene')
@@ -187,8 +201,8 @@ class TestSequence(unittest.TestCase):
         self.seq1.genes[0].remove_empty_mrnas.return_value = []
         self.seq1.genes[1].remove_empty_mrnas.return_value = []
         self.seq1.remove_empty_mrnas()
-        self.seq1.genes[0].remove_empty_mrnas.assert_called_with()
-        self.seq1.genes[1].remove_empty_mrnas.assert_called_with()
+        self.seq1.genes[0].remove_empty_mrnas.assert_called_with(None)
+        self.seq1.genes[1].remove_empty_mrnas.assert_called_with(None)
 
     def test_remove_empty_mrnas_returns_list(self):
         gene = Mock()
@@ -237,19 +251,32 @@ class TestSequence(unittest.TestCase):
         self.seq1.genes = [gene]
         gene.mrnas = [mrna]
         gene.identifier = "foo_gene"
-        gene.contains_mrna.return_value = True
+        mrna.identifier = "foo_mrna"
         anno_list = [["foo_mrna", "Dbxref", "PFAM:0001"]]
         self.seq1.add_annotations_from_list(anno_list)
-        gene.add_mrna_annotation.assert_called_with("foo_mrna", "Dbxref", "PFAM:0001")
+        mrna.add_annotation.assert_called_with("Dbxref", "PFAM:0001")
 
     def test_add_annotations_from_list_adds_to_gene(self):
         gene = Mock()
         self.seq1.genes = [gene]
         gene.identifier = "foo_gene"
+        gene.mrnas = []
         anno_list = [["foo_gene", "name", "ABC123"], ["bar_gene", "name", "XYZ789"]]
         self.seq1.add_annotations_from_list(anno_list)
         self.assertEquals("ABC123", gene.name)
 
+    def test_add_annotations_from_list_returns_unmatched_ids(self):
+        gene = Mock()
+        mrna = Mock()
+        self.seq1.genes = [gene]
+        gene.mrnas = [mrna]
+        gene.identifier = "foo_gene"
+        mrna.identifier = "foo_mrna"
+        anno_list = [["bar_mrna", "product", "thing"], ["foo_gene", "product", "other thing"],
+                     ["foo_mrna", "product", "protein"], ["baz_gene", "name", "BAZ"], ["bar_mrna", "Dbxref", "x"]]
+        self.assertEquals(["bar_mrna", "baz_gene"], self.seq1.add_annotations_from_list(anno_list))
+        mrna.add_annotation.assert_called_once_with("product", "protein")
+
     def test_get_subseq(self):
         self.assertEquals("ATTA", self.seq1.get_subseq(2, 5))
 
@@ -354,38 +381,89 @@ class TestSequence(unittest.TestCase):
         expected += "mockgene to tbl"
         self.assertEquals(tbl, expected)
 
-    def test_stats(self):
+    def test_stats_helpers(self):
         self.add_mock_gene_with_1_mrna("foo_gene1")
         self.add_mock_gene_with_2_mrnas("foo_gene2")
-        stats = self.seq1.stats()
-        self.assertEquals(stats["Total sequence length"], 7)
-        self.assertEquals(stats["Number of genes"], 2)
-        self.assertEquals(stats["Number of mRNAs"], 3)
-        self.assertEquals(stats["Number of exons"], 9)
-        self.assertEquals(stats["Number of introns"], 7)
-        self.assertEquals(stats["Number of CDS"], 2)
-        self.assertEquals(stats["Overlapping genes"], 0)
-        self.assertEquals(stats["Contained genes"], 0)
+        self.assertEquals(3, self.seq1.get_num_mrna())
+        self.assertEquals(9, self.seq1.get_num_exons())
+        self.assertEquals(7, self.seq1.get_num_introns())
+        self.assertEquals(2, self.seq1.get_num_cds())
+        self.assertEquals(0, len(self.seq1.get_overlapping_genes()))
+        self.assertEquals(0, len(self.seq1.get_contained_genes()))
+        self.assertEquals({"CDS: complete": 1, "CDS: start, no stop": 1, "CDS: stop, no start": 2,
+                           "CDS: no stop, no start": 2}, self.seq1.get_cds_partial_info())
+        self.assertEquals(20, self.seq1.get_longest_gene())
+        self.assertEquals(5, self.seq1.get_longest_mrna())
+        self.assertEquals(20, self.seq1.get_longest_exon())
+        self.assertEquals(20, self.seq1.get_longest_intron())
+        self.assertEquals(5, self.seq1.get_longest_cds())
+        self.assertEquals(10, self.seq1.get_shortest_gene())
+        self.assertEquals(2, self.seq1.get_shortest_mrna())
+        self.assertEquals(5, self.seq1.get_shortest_exon())
+        self.assertEquals(5, self.seq1.get_shortest_intron())
+        self.assertEquals(3, self.seq1.get_shortest_cds())
+        self.assertEquals(30, self.seq1.get_total_gene_length())
+        self.assertEquals(9, self.seq1.get_total_mrna_length())
+        self.assertEquals(40, self.seq1.get_total_exon_length())
+        self.assertEquals(40, self.seq1.get_total_intron_length())
+        self.assertEquals(8, self.seq1.get_total_cds_length())
+
+    def add_mrna(self, gene, identifier, indices, exons, cds):
+        mrna = XRNA(identifier, indices, gene.identifier, seq_name=gene.seq_name)
+        mrna.exon = Exon(identifier=identifier + ":exon", indices=exons[0], parent_id=identifier)
+        for index_pair in exons[1:]:
+            mrna.exon.add_indices(index_pair)
+        if cds:
+            mrna.cds = CDS(identifier=identifier + ":cds", indices=cds[0], phase=0, parent_id=identifier)
+            for index_pair in cds[1:]:
+                mrna.cds.add_indices(index_pair)
+        gene.mrnas.append(mrna)
+        return mrna
+
+    def test_stats(self):
+        seq = Sequence("seq1", "A" * 100)
+        gene1 = Gene("seq1", "maker", [1, 50], '+', "gene1")
+        mrna = self.add_mrna(gene1, "gene1-RA", [1, 50], [[1, 10], [21, 50]], [[5, 10], [21, 30]])
+        mrna.add_start_codon([5, 7])
+        mrna.add_stop_codon([28, 30])
+        gene2 = Gene("seq1", "maker", [41, 90], '-', "gene2")
+        self.add_mrna(gene2, "gene2-RA", [41, 90], [[41, 90]], [[51, 80]])
+        mrna = self.add_mrna(gene2, "gene2-RB", [60, 90], [[60, 70], [76, 90]], [[60, 70], [76, 84]])
+        mrna.add_stop_codon([60, 62])
+        gene3 = Gene("seq1", "maker", [60, 70], '+', "gene3")
+        self.add_mrna(gene3, "gene3-RA", [60, 70], [[60, 70]], None)
+        for gene in [gene1, gene2, gene3]:
+            seq.add_gene(gene)
+        stats = seq.stats()
+        self.assertEquals(stats["Total sequence length"], 100)
+        self.assertEquals(stats["Number of genes"], 3)
+        self.assertEquals(stats["Number of mRNAs"], 4)
+        self.assertEquals(stats["Number of exons"], 6)
+        self.assertEquals(stats["Number of introns"], 2)
+        self.assertEquals(stats["Number of CDS"], 3)
+        self.assertEquals(stats["Overlapping genes"], 3)
+        self.assertEquals(stats["Contained genes"], 1)
         self.assertEquals(stats["CDS: complete"], 1)
-        self.assertEquals(stats["CDS: start, no stop"], 1)
-        self.assertEquals(stats["CDS: stop, no start"], 2)
+        self.assertEquals(stats["CDS: start, no stop"], 0)
+        self.assertEquals(stats["CDS: stop, no start"], 1)
         self.assertEquals(stats["CDS: no stop, no start"], 2)
-        self.assertEquals(stats["Longest gene"], 20)
-        self.assertEquals(stats["Longest mRNA"], 5)
-        self.assertEquals(stats["Longest exon"], 20)
-        self.assertEquals(stats["Longest intron"], 20)
-        self.assertEquals(stats["Longest CDS"], 5)
-        self.assertEquals(stats["Shortest gene"], 10)
-        self.assertEquals(stats["Shortest mRNA"], 2)
-        self.assertEquals(stats["Shortest exon"], 5)
+        self.assertEquals(stats["Longest gene"], 50)
+        self.assertEquals(stats["Longest mRNA"], 50)
+        self.assertEquals(stats["Longest exon"], 50)
+        self.assertEquals(stats["Longest intron"], 10)
+        self.assertEquals(stats["Longest CDS"], 30)
+        self.assertEquals(stats["Shortest gene"], 11)
+        self.assertEquals(stats["Shortest mRNA"], 11)
+        self.assertEquals(stats["Shortest exon"], 10)
         self.assertEquals(stats["Shortest intron"], 5)
-        self.assertEquals(stats["Shortest CDS"], 3)
-        self.assertEquals(stats["Total gene length"], 30)
-        self.assertEquals(stats["Total mRNA length"], 9)
-        self.assertEquals(stats["Total exon length"], 40)
-        self.assertEquals(stats["Total intron length"], 40)
-        self.assertEquals(stats["Total CDS length"], 8)
-
+        self.assertEquals(stats["Shortest CDS"], 16)
+        self.assertEquals(stats["Total gene length"], 111)
+        self.assertEquals(stats["Total mRNA length"], 142)
+        self.assertEquals(stats["Total exon length"], 127)
+        self.assertEquals(stats["Total intron length"], 19)
+        self.assertEquals(stats["Total CDS length"], 66)
+        self.assertEquals(stats["Bases covered by genes"], 90)
+        self.assertEquals(stats["Bases covered by CDS"], 50)
 
 def suite():
     _suite = unittest.TestSuite()
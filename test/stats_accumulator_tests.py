@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import random
+import unittest
+
+from src.cds import CDS
+from src.exon import Exon
+from src.gene import Gene
+from src.sequence import Sequence
+from src.stats_accumulator import LengthMultiset, StatsAccumulator, count_contained, count_overlapping, \
+    feature_table, table_summary, union_length
+from src.xrna import XRNA
+
+
+def random_seq(rng, n_genes):
+    """Returns a Sequence with random, often overlapping, genes, mRNAs, exons and CDSs."""
+    seq = Sequence("seq1", "A" * 5000)
+    for i in range(n_genes):
+        start = rng.randint(1, 4000)
+        gene = Gene("seq1", "maker", [start, start + rng.randint(0, 900)], '+', "gene" + str(i))
+        for j in range(rng.randint(0, 3)):
+            mrna_id = gene.identifier + "-R" + str(j)
+            mrna = XRNA(mrna_id, list(gene.indices), gene.identifier)
+            position = gene.indices[0]
+            for k in range(rng.randint(0, 4)):
+                pair = [position, position + rng.randint(0, 50)]
+                if mrna.exon is None:
+                    mrna.exon = Exon(identifier=mrna_id + ":exon", indices=pair, parent_id=mrna_id)
+                else:
+                    mrna.exon.add_indices(pair)
+                # Gaps of 1 give zero-length introns
+                position = pair[1] + rng.choice([1, 2, 10, 100])
+            if mrna.exon and rng.random() < 0.7:
+                mrna.cds = CDS(identifier=mrna_id + ":cds", indices=list(mrna.exon.indices[0]), phase=0,
+                               parent_id=mrna_id)
+                for pair in mrna.exon.indices[1:]:
+                    mrna.cds.add_indices(list(pair))
+            if rng.random() < 0.5:
+                mrna.add_start_codon([mrna.indices[0], mrna.indices[0] + 2])
+            if rng.random() < 0.5:
+                mrna.add_stop_codon([mrna.indices[1] - 2, mrna.indices[1]])
+            gene.mrnas.append(mrna)
+        seq.add_gene(gene)
+    return seq
+
+
+def stats_from_helpers(seq):
+    """Returns the stats of a Sequence built from its per-feature helper methods, as a reference."""
+    cds_partial_info = seq.get_cds_partial_info()
+    stats = dict((key, int(value)) for key, value in cds_partial_info.items())
+    stats["Total sequence length"] = len(seq.bases)
+    stats["Number of genes"] = len(seq.genes)
+    stats["Number of mRNAs"] = int(seq.get_num_mrna())
+    stats["Number of exons"] = int(seq.get_num_exons())
+    stats["Number of introns"] = int(seq.get_num_introns())
+    stats["Number of CDS"] = int(seq.get_num_cds())
+    stats["Overlapping genes"] = len(seq.get_overlapping_genes())
+    stats["Contained genes"] = len(seq.get_contained_genes())
+    stats["Longest gene"] = int(seq.get_longest_gene())
+    stats["Longest mRNA"] = int(seq.get_longest_mrna())
+    stats["Longest exon"] = int(seq.get_longest_exon())
+    stats["Longest intron"] = int(seq.get_longest_intron())
+    stats["Longest CDS"] = int(seq.get_longest_cds())
+    stats["Shortest gene"] = int(seq.get_shortest_gene())
+    stats["Shortest mRNA"] = int(seq.get_shortest_mrna())
+    stats["Shortest exon"] = int(seq.get_shortest_exon())
+    stats["Shortest intron"] = int(seq.get_shortest_intron())
+    stats["Shortest CDS"] = int(seq.get_shortest_cds())
+    stats["Total gene length"] = int(seq.get_total_gene_length())
+    stats["Total mRNA length"] = int(seq.get_total_mrna_length())
+    stats["Total exon length"] = int(seq.get_total_exon_length())
+    stats["Total intron length"] = int(seq.get_total_intron_length())
+    stats["Total CDS length"] = int(seq.get_total_cds_length())
+    stats["Bases covered by genes"] = union_length([gene.indices for gene in seq.genes])
+    stats["Bases covered by CDS"] = union_length([pair for gene in seq.genes for mrna in gene.mrnas if mrna.cds
+                                                  for pair in mrna.cds.indices])
+    return stats
+
+
+class TestStatsAccumulator(unittest.TestCase):
+    def test_matches_helpers(self):
+        rng = random.Random(7)
+        for _ in range(30):
+            seq = random_seq(rng, rng.randint(0, 12))
+            self.assertEquals(stats_from_helpers(seq), seq.stats())
+
+    def test_table_stats_matches_stats(self):
+        rng = random.Random(13)
+        for _ in range(10):
+            seq = random_seq(rng, rng.randint(0, 12))
+            self.assertEquals(seq.stats(), table_summary(feature_table(seq))[0])
+
+    def test_remove_matches_fresh_stats(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            seq = random_seq(rng, rng.randint(1, 12))
+            accumulator = StatsAccumulator()
+            for gene in seq.genes:
+                accumulator.add_gene(gene)
+            for gene in list(seq.genes):
+                if rng.random() < 0.3:
+                    seq.genes.remove(gene)
+                    accumulator.remove_gene(gene)
+                    continue
+                for mrna in list(gene.mrnas):
+                    if rng.random() < 0.3:
+                        gene.mrnas.remove(mrna)
+                        accumulator.remove_mrna(mrna)
+            self.assertEquals(seq.stats(), accumulator.stats(len(seq.bases)))
+
+    def test_length_multiset(self):
+        lengths = LengthMultiset()
+        self.assertEquals(0, lengths.min())
+        for length in [5, 3, 9, 3]:
+            lengths.add(length)
+        lengths.remove(3)
+        self.assertEquals((3, 9), (lengths.min(), lengths.max()))
+        lengths.remove(3)
+        lengths.remove(9)
+        self.assertEquals((5, 5), (lengths.min(), lengths.max()))
+        lengths.add(3)
+        self.assertEquals(3, lengths.min())
+
+    def test_negative_intron_raises(self):
+        seq = Sequence("seq1", "A" * 100)
+        gene = Gene("seq1", "maker", [1, 50], '+', "gene1")
+        mrna = XRNA("gene1-RA", [1, 50], "gene1")
+        mrna.exon = Exon(identifier="exon1", indices=[1, 20], parent_id="gene1-RA")
+        mrna.exon.add_indices([10, 50])
+        gene.mrnas.append(mrna)
+        seq.add_gene(gene)
+        self.assertRaises(Exception, seq.stats)
+
+    def test_count_overlapping_and_contained(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            seq = Sequence("seq1", "")
+            for i in range(rng.randint(0, 10)):
+                start = rng.randint(1, 30)
+                seq.add_gene(Gene("seq1", "maker", [start, start + rng.randint(0, 10)], '+', "gene" + str(i)))
+            indices = [gene.indices for gene in seq.genes]
+            self.assertEquals(len(seq.get_overlapping_genes()), count_overlapping(indices))
+            self.assertEquals(len(seq.get_contained_genes()), count_contained(indices))
+
+    def test_union_length(self):
+        self.assertEquals(0, union_length([]))
+        self.assertEquals(15, union_length([[1, 10], [6, 15], [11, 12]]))
+        self.assertEquals(20, union_length([[1, 10], [11, 20]]))
+        self.assertEquals(10, union_length([[10, 1]]))
+        rng = random.Random(31)
+        for _ in range(50):
+            indices = []
+            for _ in range(rng.randint(1, 20)):
+                start = rng.randint(1, 500)
+                indices.append([start, start + rng.randint(0, 80)])
+            covered = set()
+            for start, end in indices:
+                covered.update(range(start, end + 1))
+            self.assertEquals(len(covered), union_length(indices))
+
+    def test_count_overlapping_reversed_indices(self):
+        seq = Sequence("seq1", "")
+        for i, indices in enumerate([[10, 1], [5, 8], [20, 30], [25, 3]]):
+            seq.add_gene(Gene("seq1", "maker", indices, '+', "gene" + str(i)))
+        self.assertEquals(len(seq.get_overlapping_genes()), count_overlapping([g.indices for g in seq.genes]))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestStatsAccumulator))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,28 @@
 #!/usr/bin/env python
 # coding=utf-8
 
+import io
+import random
 import unittest
+from src.assembly_stats import AssemblyStats
+from src.filter_manager import FilterManager
+from src.length_distribution import LengthDistribution
+from src.stats_accumulator import sequence_summary
 from src.stats_manager import StatsManager
 from src.stats_manager import format_column
 from src.stats_manager import format_columns
+from test.stats_accumulator_tests import random_seq
+
+
+def distribution(lengths):
+    result = LengthDistribution()
+    for length in lengths:
+        result.add(length)
+    return result
+
+
+def as_dicts(distributions):
+    return dict((key, value.to_dict()) for key, value in distributions.items())
 
 
 class TestStatsManager(unittest.TestCase):
@@ -57,6 +75,8 @@ class TestStatsManager(unittest.TestCase):
         self.mgr.ref_stats["Total exon length"] = 65
         self.mgr.ref_stats["Total intron length"] = 65
         self.mgr.ref_stats["Total CDS length"] = 60
+        self.mgr.ref_stats["Bases covered by genes"] = 60
+        self.mgr.ref_stats["Bases covered by CDS"] = 50
 
     @staticmethod
     def get_new_dict():
@@ -86,7 +106,9 @@ class TestStatsManager(unittest.TestCase):
              "Total mRNA length": 15,
              "Total exon length": 15,
              "Total intron length": 15,
-             "Total CDS length": 10}
+             "Total CDS length": 10,
+             "Bases covered by genes": 12,
+             "Bases covered by CDS": 8}
         return d
 
     def test_alt_is_empty(self):
@@ -150,6 +172,17 @@ class TestStatsManager(unittest.TestCase):
         summary = self.mgr.summary()
         self.assertEquals(summary, expected)
 
+    def test_coverage_summary(self):
+        self.populate_ref()
+        self.mgr.update_alt(self.get_new_dict())
+        expected = "                                         Reference Genome     Modified Genome     \n"
+        expected += "                                         ----------------     ---------------     \n"
+        expected += "Bases covered by genes                   60                   12                  \n"
+        expected += "Bases covered by CDS                     50                   8                   \n"
+        expected += "% of genome covered by genes (union)     60.0                 24.0                \n"
+        expected += "% of genome covered by CDS (union)       50.0                 16.0                \n"
+        self.assertEquals(expected, self.mgr.coverage_summary())
+
     def test_summary_without_modifications(self):
         self.mgr.update_alt(self.get_new_dict())
         self.mgr.update_ref(self.get_new_dict())
@@ -195,6 +228,129 @@ class TestStatsManager(unittest.TestCase):
         summary = self.mgr.summary()
         self.assertEquals(summary, expected)
 
+    def test_update_alt_from_seq_after_removals(self):
+        rng = random.Random(5)
+        for _ in range(20):
+            seq = random_seq(rng, rng.randint(1, 12))
+            mgr = StatsManager()
+            mgr.update_ref_from_seq(seq)
+            FilterManager().apply_filters([["cds_shorter_than", "60", "REMOVE"],
+                                           ["gene_longer_than", "700", "REMOVE"]], [seq])
+            if seq.genes and seq.genes[0].mrnas:
+                seq.genes[0].remove_mrna(seq.genes[0].mrnas[-1].identifier)
+            seq.remove_empty_genes()
+            self.assertFalse(any(event == "rescan" for event, feature in seq.mutations))
+            mgr.update_alt_from_seq(seq)
+            expected = StatsManager()
+            expected.update_alt(seq.stats())
+            self.assertEquals(expected.alt_stats, mgr.alt_stats)
+            expected.update_alt_lengths(sequence_summary(seq)[1])
+            self.assertEquals(as_dicts(expected.alt_lengths), as_dicts(mgr.alt_lengths))
+
+    def test_update_alt_from_seq_after_trim(self):
+        seq = random_seq(random.Random(9), 8)
+        self.mgr.update_ref_from_seq(seq)
+        seq.trim_region(1, 500)
+        self.assertTrue(("rescan", None) in seq.mutations)
+        self.mgr.update_alt_from_seq(seq)
+        expected = StatsManager()
+        expected.update_alt(seq.stats())
+        self.assertEquals(expected.alt_stats, self.mgr.alt_stats)
+
+    def test_update_ref_parallel_matches_serial(self):
+        rng = random.Random(11)
+        seqs = [random_seq(rng, rng.randint(0, 8)) for _ in range(10)]
+        for seq in seqs:
+            self.mgr.update_ref(seq.stats())
+        mgr = StatsManager()
+        mgr.update_ref_parallel(seqs, 2)
+        self.assertEquals(self.mgr.ref_stats, mgr.ref_stats)
+        for seq in seqs:
+            self.mgr.update_ref_lengths(sequence_summary(seq)[1])
+        self.assertEquals(as_dicts(self.mgr.ref_lengths), as_dicts(mgr.ref_lengths))
+        assembly = AssemblyStats()
+        for seq in seqs:
+            assembly.add_sequence(seq.bases)
+        self.assertEquals(assembly.stats(), mgr.ref_assembly.stats())
+
+    def test_update_alt_parallel_matches_serial(self):
+        rng = random.Random(17)
+        seqs = [random_seq(rng, rng.randint(0, 8)) for _ in range(6)]
+        for seq in seqs:
+            seq.bases = "ACGTNNNNGGCC" * 500
+        for seq in seqs:
+            self.mgr.update_ref_from_seq(seq)
+        mgr = StatsManager()
+        mgr.update_ref_parallel(seqs, 2)
+        seqs[0].trim_region(1, 100)
+        seqs[3].trim_region(4001, 6000)
+        for seq in seqs:
+            self.mgr.update_alt_from_seq(seq)
+        mgr.update_alt_parallel(seqs, 2)
+        self.assertEquals(self.mgr.alt_stats, mgr.alt_stats)
+        assembly = AssemblyStats()
+        for seq in seqs:
+            assembly.add_sequence(seq.bases)
+        self.assertEquals(assembly.stats(), self.mgr.alt_assembly.stats())
+        self.assertEquals(assembly.stats(), mgr.alt_assembly.stats())
+
+    def test_alt_reuses_assembly_of_unchanged_bases(self):
+        seq = random_seq(random.Random(19), 2)
+        self.mgr.update_ref_from_seq(seq)
+        assembly = self.mgr.ref_assemblies[id(seq)][1]
+        self.assertEquals(assembly, self.mgr.pop_ref_assembly(seq))
+        self.mgr.update_ref_from_seq(seq)
+        seq.trim_region(1, 10)
+        self.assertEquals(None, self.mgr.pop_ref_assembly(seq))
+
+    def test_write_per_seq_tsv(self):
+        rng = random.Random(41)
+        seqs = [random_seq(rng, 3), random_seq(rng, 0)]
+        seqs[1].header = "seq2"
+        self.mgr.record_per_seq()
+        for seq in seqs:
+            self.mgr.update_alt_from_seq(seq)
+        io_buffer = io.BytesIO()
+        self.mgr.write_per_seq_tsv(io_buffer)
+        lines = io_buffer.getvalue().splitlines()
+        self.assertEquals(3, len(lines))
+        columns = lines[0].split("\t")
+        self.assertEquals("seq_id", columns[0])
+        self.assertEquals(1 + len(self.mgr.increment_stats + self.mgr.min_stats + self.mgr.max_stats +
+                                  self.mgr.calc_stats + self.mgr.coverage_stats + self.mgr.coverage_calc_stats),
+                          len(columns))
+        first = dict(zip(columns, lines[1].split("\t")))
+        self.assertEquals("seq1", first["seq_id"])
+        self.assertEquals(str(seqs[0].stats()["Number of genes"]), first["Number of genes"])
+        self.assertEquals(str(self.mgr.calculated_value(seqs[0].stats(), "mean gene length")),
+                          first["mean gene length"])
+        self.assertEquals("seq2", lines[2].split("\t")[0])
+
+    def test_per_seq_not_recorded_by_default(self):
+        self.mgr.update_alt_from_seq(random_seq(random.Random(43), 2))
+        self.assertEquals(None, self.mgr.per_seq_stats)
+
+    def test_assembly_summary(self):
+        seq = random_seq(random.Random(37), 2)
+        seq.genes = []
+        seq.bases = "ACGTNNNNACGT"
+        self.mgr.update_ref_from_seq(seq)
+        seq.trim_region(5, 12)
+        self.mgr.update_alt_from_seq(seq)
+        summary = self.mgr.assembly_summary()
+        self.assertTrue("Number of gaps          1                    0" in summary)
+        self.assertTrue("Contig N50              4                    4" in summary)
+
+    def test_length_summary(self):
+        self.mgr.update_ref_lengths({"gene": distribution([100, 300, 300]), "mRNA": distribution([100])})
+        self.mgr.update_alt_lengths({"gene": distribution([300]), "mRNA": distribution([100])})
+        self.mgr.ref_stats["Number of genes"] = 3
+        self.mgr.alt_stats["Number of genes"] = 1
+        summary = self.mgr.length_summary()
+        self.assertTrue("median gene length       300                  300" in summary)
+        self.assertTrue("gene length 100-199      1                    0" in summary)
+        self.assertTrue("exon length" not in summary.split("p95 CDS length")[1])
+
     def test_format_column(self):
         column = ['a', 'sd', 'asdf']
         self.assertEquals(format_column(column, 5), ['a        ', 'sd       ', 'asdf     '])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import random
+import unittest
+
+from mock import Mock
+
+from src.seq_helper import SeqHelper
+from src.stop_codon_index import StopCodonIndex
+
+
+class TestStopCodonIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = StopCodonIndex("gattacaTAGgattaca")
+
+    def test_initialize(self):
+        # TAG at position 8, frame 8 % 3 == 2
+        self.assertEquals([[], [], [8]], self.index.forward)
+        # 'tta' at 3 and 13 on the forward strand
+        self.assertEquals([[3], [13], []], self.index.reverse)
+
+    def test_has_stop(self):
+        self.assertTrue(self.index.has_stop('+', 1, 17, 2))
+        self.assertFalse(self.index.has_stop('+', 1, 7, 2))
+        self.assertFalse(self.index.has_stop('+', 1, 17, 0))
+        self.assertTrue(self.index.has_stop('-', 13, 13, 1))
+
+    def test_mrna_contains_internal_stop(self):
+        mrna = Mock()
+        mrna.strand = '+'
+        mrna.cds = Mock()
+        mrna.cds.indices = [[2, 4], [8, 14]]
+        self.assertTrue(self.index.mrna_contains_internal_stop(mrna))
+
+    def test_mrna_contains_internal_stop_no_cds(self):
+        mrna = Mock()
+        mrna.cds = None
+        self.assertFalse(self.index.mrna_contains_internal_stop(mrna))
+
+    def test_final_stop_is_not_internal(self):
+        self.assertFalse(self.index.contains_internal_stop('+', [[2, 10]]))
+
+    def test_stop_across_splice_junction(self):
+        # 'gat' + 'TAG' + 'gac' split as 'gatT' | 'AGgaccc'
+        index = StopCodonIndex("gatTccccAGgaccc")
+        self.assertTrue(index.contains_internal_stop('+', [[1, 4], [9, 15]]))
+        self.assertFalse(index.contains_internal_stop('+', [[1, 4], [10, 15]]))
+
+    def test_reverse_strand(self):
+        # Reverse complement of 'gatTAGgat' is 'atcCTAatc'
+        index = StopCodonIndex("atcCTAatc")
+        self.assertTrue(index.contains_internal_stop('-', [[1, 9]]))
+        self.assertFalse(index.contains_internal_stop('+', [[1, 9]]))
+
+    def test_matches_seq_helper(self):
+        rand = random.Random(26)
+        bases = ''.join([rand.choice('ACGTacgtN') for _ in range(3000)])
+        index = StopCodonIndex(bases)
+        helper = SeqHelper(bases)
+        for _ in range(500):
+            indices = []
+            position = rand.randint(1, 100)
+            for _ in range(rand.randint(1, 5)):
+                start = position + rand.randint(0, 60)
+                stop = start + rand.randint(0, 40)
+                indices.append([start, stop])
+                position = stop + 1
+            strand = rand.choice(['+', '-'])
+            mrna = Mock()
+            mrna.strand = strand
+            mrna.cds = Mock()
+            mrna.cds.indices = indices
+            self.assertEquals(helper.mrna_contains_internal_stop(mrna),
+                              index.mrna_contains_internal_stop(mrna))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestStopCodonIndex))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
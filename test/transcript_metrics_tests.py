@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+from src.cds import CDS
+from src.exon import Exon
+from src.gene import Gene
+from src.sequence import Sequence
+from src.transcript_metrics import TranscriptMetrics, intron_extremes, NEGATIVE_INTRON
+from src.xrna import XRNA
+
+
+class TestTranscriptMetrics(unittest.TestCase):
+    def setUp(self):
+        self.seq = Sequence("seq1", "A" * 1000)
+        gene1 = Gene("seq1", "maker", [1, 520], '+', "gene1")
+        mrna1 = XRNA("gene1-RA", [1, 520], "gene1")
+        mrna1.exon = Exon(identifier="exon1", indices=[1, 40], parent_id="gene1-RA")
+        mrna1.exon.add_indices([60, 100])
+        mrna1.exon.add_indices([301, 520])
+        mrna1.cds = CDS(identifier="cds1", indices=[20, 40], phase=0, parent_id="gene1-RA")
+        mrna1.cds.add_indices([60, 90])
+        mrna2 = XRNA("gene1-RB", [1, 100], "gene1")
+        mrna2.exon = Exon(identifier="exon2", indices=[1, 100], parent_id="gene1-RB")
+        gene1.mrnas = [mrna1, mrna2]
+        gene2 = Gene("seq1", "maker", [601, 700], '-', "gene2")
+        mrna3 = XRNA("gene2-RA", [601, 700], "gene2")
+        gene2.mrnas = [mrna3]
+        self.seq.genes = [gene1, gene2]
+        self.metrics = TranscriptMetrics(self.seq)
+
+    def test_columns(self):
+        self.assertEquals(["gene1-RA", "gene1-RB", "gene2-RA"], self.metrics.mrna_ids)
+        self.assertEquals([True, False, False], self.metrics.has_cds)
+        self.assertEquals([True, True, False], self.metrics.has_exon)
+        self.assertEquals([52, 0, 0], list(self.metrics.cds_length))
+        self.assertEquals([3, 1, 0], list(self.metrics.exon_count))
+        self.assertEquals([40, 100, 0], list(self.metrics.shortest_exon))
+        self.assertEquals([220, 100, 0], list(self.metrics.longest_exon))
+        self.assertEquals([19, 0, 0], list(self.metrics.shortest_intron))
+        self.assertEquals([200, 0, 0], list(self.metrics.longest_intron))
+        self.assertEquals([520, 100], list(self.metrics.gene_length))
+
+    def test_matches_feature_methods(self):
+        for gene in self.seq.genes:
+            self.assertEquals(gene.length(), self.metrics.gene_length[self.metrics.gene_row(gene)])
+            for mrna in gene.mrnas:
+                row = self.metrics.mrna_row(mrna)
+                if mrna.cds:
+                    self.assertEquals(mrna.cds.length(), self.metrics.cds_length[row])
+                self.assertEquals(mrna.get_shortest_exon(), self.metrics.shortest_exon[row])
+                self.assertEquals(mrna.get_longest_exon(), self.metrics.longest_exon[row])
+                self.assertEquals(mrna.get_shortest_intron(), self.metrics.shortest_intron[row])
+                self.assertEquals(mrna.get_longest_intron(), self.metrics.longest_intron[row])
+
+    def test_intron_extremes_skips_zero_length_introns(self):
+        # Like XRNA.get_shortest_intron, a zero-length intron doesn't move the last exon end
+        self.assertEquals((30, 20), intron_extremes([[1, 10], [11, 20], [41, 50]]))
+
+    def test_intron_extremes_negative(self):
+        self.assertEquals((NEGATIVE_INTRON, 0), intron_extremes([[1, 10], [5, 20]]))
+
+
+def suite():
+    _suite = unittest.TestSuite()
+    _suite.addTest(unittest.makeSuite(TestTranscriptMetrics))
+    return _suite
+
+
+if __name__ == '__main__':
+    unittest.main()
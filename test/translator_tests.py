@@ -53,6 +53,16 @@ class TestTranslate(unittest.TestCase):
         test_seq = 'GATTACTAG'  # stop, but not internal
         self.assertFalse(contains_internal_stop(test_seq, '+'))
 
+    def test_reverse_complement_in_place(self):
+        buf = bytearray('GATTACAn')
+        reverse_complement_in_place(buf)
+        self.assertEquals(bytearray('nTGTAATC'), buf)
+
+    def test_translate_in_place(self):
+        buf = bytearray('CATGACAGAAGATNTTTCaa')
+        translate_in_place(buf)
+        self.assertEquals(bytearray('HDRRXF'), buf)
+
 
 def suite():
     _suite = unittest.TestSuite()
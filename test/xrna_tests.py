@@ -5,6 +5,8 @@ import unittest
 
 from mock import Mock
 
+from src.cds import CDS
+from src.seq_helper import SeqHelper
 from src.xrna import XRNA
 
 
@@ -144,28 +146,37 @@ class TestXRNA(unittest.TestCase):
         self.assertTrue(mrna.indices_intersect_mrna([9, 21]))
 
     def test_create_start_and_stop_if_necessary(self):
-        seq_object = Mock()
+        seq_helper = Mock()
+        seq_helper.get_cds_sequence_on_strand.return_value = 'atgtag'  # startstop
         cds = Mock()
-        cds.extract_sequence.return_value = 'atgtag'  # startstop
         cds.get_start_indices.return_value = 20
         cds.get_stop_indices.return_value = 40
         self.test_mrna0.cds = cds
         strand = '+'
         self.assertFalse(self.test_mrna0.other_features)
-        self.test_mrna0.create_start_and_stop_if_necessary(seq_object, strand)
+        self.test_mrna0.create_start_and_stop_if_necessary(seq_helper, strand)
         self.assertTrue(self.test_mrna0.other_features)
         self.assertEquals(2, len(self.test_mrna0.other_features))
 
+    def test_create_start_and_stop_with_cds_past_end_of_sequence(self):
+        mrna = XRNA(identifier='mrna1', indices=[1, 20], strand='+', parent_id='gene1')
+        mrna.cds = CDS(identifier='cds1', indices=[1, 9], strand='+', parent_id='mrna1')
+        mrna.cds.add_indices([11, 20])
+        # The second segment runs past the end and is left out rather than
+        # cut short, so the CDS sequence checked ends with the stop at 7-9
+        mrna.create_start_and_stop_if_necessary(SeqHelper("ATGaaaTAGccc"), '+')
+        self.assertEquals(['start_codon', 'stop_codon'], [feature.feature_type for feature in mrna.other_features])
+
     def test_create_start_and_stop_when_no_start_or_stop(self):
-        seq_object = Mock()
+        seq_helper = Mock()
+        seq_helper.get_cds_sequence_on_strand.return_value = 'tagatg'  # no start or stop
         cds = Mock()
-        cds.extract_sequence.return_value = 'tagatg'  # no start or stop
         cds.get_start_indices.return_value = 20
         cds.get_stop_indices.return_value = 40
         self.test_mrna0.cds = cds
         strand = '+'
         self.assertFalse(self.test_mrna0.other_features)
-        self.test_mrna0.create_start_and_stop_if_necessary(seq_object, strand)
+        self.test_mrna0.create_start_and_stop_if_necessary(seq_helper, strand)
         self.assertFalse(self.test_mrna0.other_features)
 
     def test_to_tbl(self):
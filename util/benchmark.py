@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Times GAG's load, stats, filter, trim and output stages on synthetic
+# genomes of growing size, and writes the times and memory use as json.
+# The filters and trims are chosen to remove features, so the removal
+# paths and the stats on the modified genome are timed too.
+# Each scale runs in its own process so peak memory isn't carried over.
+# usage: python util/benchmark.py [--scales 1,10,100,1000] [--out results.json] [--compare old.json]
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.controller import Controller, DEFAULT_OUTPUTS, SEQUENCE_OUTPUTS
+from src.filter_report import FilterReport
+from synthetic_genome import write_genome
+
+# Genome parameters at 1x; the number of scaffolds is multiplied by the scale
+BASE_SCAFFOLDS = 1
+GENOME_ARGS = ["scaffold_length", "gene_density", "isoforms", "exons", "orphans"]
+# Synthetic CDSs are 300 to 1200 bp (three or four exons of 100 to 300
+# bp) and introns 80 to 500 bp, so each filter catches a good share
+FILTERS = [["cds_shorter_than", "700", "REMOVE"], ["intron_longer_than", "400", "FLAG"]]
+
+
+def git_version():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], stderr=open(os.devnull, 'w'),
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(args):
+    """Generates a genome at args.scale, runs each stage on it and returns the profiled stages."""
+    work_dir = tempfile.mkdtemp()
+    try:
+        fasta_path = os.path.join(work_dir, "genome.fasta")
+        gff_path = os.path.join(work_dir, "genome.gff")
+        with open(fasta_path, 'w') as fasta:
+            with open(gff_path, 'w') as gff:
+                write_genome(fasta, gff, BASE_SCAFFOLDS * args.scale, args.scaffold_length, args.gene_density,
+                             args.isoforms, args.exons, args.orphans)
+        out_dir = os.path.join(work_dir, "out")
+        os.mkdir(out_dir)
+
+        controller = Controller()
+        profiler = controller.profiler
+        profiler.enable()
+        profiler.begin("load")
+        controller.read_fasta(fasta_path)
+        controller.read_gff(gff_path, out_dir)
+        profiler.begin("stats")
+        for seq in controller.seqs:
+            controller.stats_mgr.update_ref_from_seq(seq)
+        profiler.begin("filter")
+        controller.filter_report = FilterReport()
+        controller.apply_filters([list(spec) for spec in FILTERS])
+        profiler.begin("trim")
+        # Trim every tenth scaffold from its start to the end of its first
+        # gene, so the gene is removed and the genes after it are moved
+        controller.trim_from_list([[seq.header, 1, seq.genes[0].indices[1]] for seq in controller.seqs[::10]
+                                   if seq.genes])
+        profiler.begin("output")
+        # Write what a default run writes: stats on the modified genome,
+        # the sequence files, and the removed features
+        for seq in controller.seqs:
+            controller.stats_mgr.update_alt_from_seq(seq)
+        controller.write_stats(out_dir)
+        files = [(name, open(os.path.join(out_dir, filename), 'w')) for name, filename in SEQUENCE_OUTPUTS
+                 if name in DEFAULT_OUTPUTS]
+        for seq in controller.seqs:
+            for name, output in files:
+                output.write(Controller.sequence_output(seq, name))
+        for name, output in files:
+            output.close()
+        with open(os.path.join(out_dir, "genome.removed.gff"), 'w') as removed:
+            for feature in controller.removed_features:
+                removed.write(feature.to_gff())
+        profiler.end()
+        return {"scale": args.scale,
+                "sequences": len(controller.seqs),
+                "bases": sum(len(seq.bases) for seq in controller.seqs),
+                "genes": sum(len(seq.genes) for seq in controller.seqs),
+                "removed_features": len(controller.removed_features),
+                "stages": profiler.stages}
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def compare(old, new):
+    """Returns lines comparing the wall time of each stage at each scale in two results files."""
+    lines = ["%-8s%-10s%12s%12s%10s\n" % ("Scale", "Stage", "Old (s)", "New (s)", "Ratio")]
+    old_results = dict((result["scale"], result) for result in old["results"])
+    for result in new["results"]:
+        if result["scale"] not in old_results:
+            continue
+        old_stages = dict((stage["stage"], stage) for stage in old_results[result["scale"]]["stages"])
+        for stage in result["stages"]:
+            if stage["stage"] not in old_stages:
+                continue
+            old_wall = old_stages[stage["stage"]]["wall_seconds"]
+            ratio = "%.2f" % (stage["wall_seconds"] / old_wall) if old_wall else "-"
+            lines.append("%-8s%-10s%12.3f%12.3f%10s\n" % (str(result["scale"]) + "x", stage["stage"], old_wall,
+                                                          stage["wall_seconds"], ratio))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GAG on synthetic genomes.")
+    parser.add_argument('--scales', default="1,10,100,1000", help="comma-separated multiples of the 1x genome")
+    parser.add_argument('--out', default="benchmark_results.json")
+    parser.add_argument('--compare', help="an earlier results file to compare against")
+    parser.add_argument('--scaffold_length', type=int, default=100000)
+    parser.add_argument('--gene_density', type=int, default=5, help="genes per 10 kb")
+    parser.add_argument('--isoforms', type=int, default=2)
+    parser.add_argument('--exons', type=int, default=4)
+    parser.add_argument('--orphans', action='store_true', help="write child features before their parents")
+    parser.add_argument('--scale', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--scale_result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scale is not None:
+        # Run one scale and hand the results back to the parent process;
+        # not on stdout, since GAG prints some messages there
+        result = run_scale(args)
+        with open(args.scale_result, 'w') as result_file:
+            json.dump(result, result_file)
+        return
+
+    genome_args = []
+    for name in GENOME_ARGS:
+        value = getattr(args, name)
+        if value is True:
+            genome_args.append("--" + name)
+        elif value is not False:
+            genome_args.extend(["--" + name, str(value)])
+    results = []
+    result_path = tempfile.mktemp(suffix=".json")
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        sys.stderr.write("Running %dx...\n" % scale)
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, os.path.abspath(__file__), "--scale", str(scale),
+                                   "--scale_result", result_path] + genome_args, stdout=devnull, stderr=devnull)
+        with open(result_path, 'r') as result_file:
+            result = json.load(result_file)
+        os.remove(result_path)
+        results.append(result)
+        sys.stderr.write("  %d genes kept, %d features removed\n" % (result["genes"], result["removed_features"]))
+        for stage in result["stages"]:
+            sys.stderr.write("  %-8s%10.3f s%10s MB\n" % (stage["stage"], stage["wall_seconds"], stage["peak_rss_mb"]))
+    report = {"version": git_version(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "base_scaffolds": BASE_SCAFFOLDS,
+              "parameters": dict((name, getattr(args, name)) for name in GENOME_ARGS),
+              "filters": FILTERS,
+              "results": results}
+    with open(args.out, 'w') as out:
+        json.dump(report, out, indent=1, sort_keys=True)
+    sys.stderr.write("Results written to " + args.out + "\n")
+    if args.compare:
+        with open(args.compare, 'r') as old:
+            for line in compare(json.load(old), report):
+                sys.stdout.write(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Runs genomes through GAG in each execution mode and checks that every
+# output file is the same as a plain run's, reporting differences by feature.
+# The walkthrough datasets are always run; synthetic genomes are added
+# with --synthetic. The plain run can use another copy of GAG with
+# --baseline, e.g. a checkout of the last release.
+# usage: python util/equivalence.py [--synthetic 10,100] [--baseline path/to/gag.py] [--modes a,b]
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+GAG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, GAG_DIR)
+
+from src.assembly_stats import AssemblyStats
+from synthetic_genome import write_genome
+
+
+def contig_stats():
+    """Returns the names of the assembly stats that need the bases, which --stats_only doesn't read."""
+    scanned = AssemblyStats()
+    scanned.add_sequence("A")
+    lengths_only = set(name for name, value in AssemblyStats().stats())
+    return [name for name, value in scanned.stats() if name not in lengths_only]
+
+
+OUTPUT_FILES = ["genome.fasta", "genome.gff", "genome.tbl", "genome.proteins.fasta", "genome.mrna.fasta",
+                "genome.removed.gff", "genome.stats"]
+# Edits applied to every genome, so the outputs cover modified features
+EDITS = ["--fix_start_stop", "--fix_terminal_ns", "-rcs", "150", "-fgl", "20000"]
+# Each mode is (name, extra arguments, whether edits apply, the files it
+# writes, stats it leaves out); a mode is compared with a plain run given
+# the same edits
+MODES = [("parallel_stats", ["--stats_processes", "2"], True, OUTPUT_FILES, []),
+         ("profile", ["--profile"], True, OUTPUT_FILES, []),
+         ("per_seq_stats", ["--per_seq_stats"], True, OUTPUT_FILES, []),
+         ("progress", ["--progress", "json"], True, OUTPUT_FILES, []),
+         ("outputs", ["--outputs", "gff,tbl,stats"], True, ["genome.gff", "genome.tbl", "genome.stats"], []),
+         ("stats_only", ["--stats_only"], False, ["genome.stats"], contig_stats())]
+# How many differing features are listed per file
+MAX_LISTED = 10
+
+
+def walkthrough_datasets():
+    """Returns (name, input arguments, edit arguments) for each walkthrough with a genome."""
+    datasets = []
+    walkthrough = os.path.join(GAG_DIR, "walkthrough")
+    for name in sorted(os.listdir(walkthrough)):
+        directory = os.path.join(walkthrough, name)
+        fasta = os.path.join(directory, "genome.fasta")
+        gff = os.path.join(directory, "genome.gff")
+        if not (os.path.isfile(fasta) and os.path.isfile(gff)):
+            continue
+        edits = []
+        if os.path.isfile(os.path.join(directory, "genome.annotations")):
+            edits.extend(["-a", os.path.join(directory, "genome.annotations")])
+        if os.path.isfile(os.path.join(directory, "trim.bed")):
+            edits.extend(["-t", os.path.join(directory, "trim.bed")])
+        datasets.append((name, ["-f", fasta, "-g", gff], edits))
+    return datasets
+
+
+def synthetic_dataset(work_dir, scaffolds):
+    """Writes a synthetic genome into work_dir; returns (name, input arguments, edit arguments)."""
+    name = "synthetic_" + str(scaffolds)
+    fasta_path = os.path.join(work_dir, name + ".fasta")
+    gff_path = os.path.join(work_dir, name + ".gff")
+    with open(fasta_path, 'w') as fasta:
+        with open(gff_path, 'w') as gff:
+            write_genome(fasta, gff, scaffolds=scaffolds, isoforms=2, orphans=True)
+    return name, ["-f", fasta_path, "-g", gff_path], []
+
+
+def run_gag(gag, args, out_dir):
+    """Runs gag.py with args, writing to out_dir; returns False if it failed."""
+    with open(os.devnull, 'w') as devnull:
+        return subprocess.call([sys.executable, gag] + args + ["-o", out_dir], stdout=devnull, stderr=devnull) == 0
+
+
+def read_text(path):
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r') as text_file:
+        return text_file.read()
+
+
+def add_record(records, key, text):
+    """Adds text to records under key, numbering repeated keys so none are lost."""
+    unique_key = key
+    count = 1
+    while unique_key in records:
+        count += 1
+        unique_key = key + " #" + str(count)
+    records[unique_key] = text
+
+
+def fasta_records(text):
+    records = {}
+    for entry in text.split("\n>"):
+        header, _, bases = entry.lstrip(">").partition("\n")
+        add_record(records, header, bases)
+    return records
+
+
+def gff_records(text):
+    """Returns gff lines by feature ID; lines without one are keyed by their text."""
+    records = {}
+    for line in text.splitlines():
+        fields = line.split("\t")
+        key = line
+        if len(fields) == 9:
+            for attribute in fields[8].split(";"):
+                if attribute.startswith("ID="):
+                    key = fields[0] + " " + fields[2] + " " + attribute[3:]
+        add_record(records, key, line)
+    return records
+
+
+def tbl_records(text):
+    """Returns tbl entries by sequence, feature type and locus tag or protein id."""
+    records = {}
+    seq_name = ""
+    entry = []
+
+    def finish():
+        if not entry:
+            return
+        key = seq_name + " " + entry[0].split("\t")[-1]
+        for line in entry:
+            qualifier = line.strip().split("\t")
+            if qualifier[0] in ("locus_tag", "protein_id"):
+                key += " " + qualifier[-1]
+                break
+        add_record(records, key, "\n".join(entry))
+        del entry[:]
+
+    for line in text.splitlines():
+        if line.startswith(">Feature"):
+            finish()
+            seq_name = line.split()[-1]
+        elif line.startswith("\t") or (entry and len(line.split("\t")) == 2):
+            # A qualifier, or another pair of coordinates
+            entry.append(line)
+        else:
+            finish()
+            entry.append(line)
+    finish()
+    return records
+
+
+def stats_records(text, left_out=()):
+    """Returns stats lines by stat name, leaving out the named stats."""
+    records = {}
+    for line in text.splitlines():
+        name = re.split(r"\s{2,}", line.strip())[0]
+        if line.strip() and name not in left_out:
+            add_record(records, name, line)
+    return records
+
+
+def records_for(filename, text, left_out=()):
+    if filename.endswith(".fasta"):
+        return fasta_records(text)
+    elif filename.endswith(".gff"):
+        return gff_records(text)
+    elif filename.endswith(".tbl"):
+        return tbl_records(text)
+    return stats_records(text, left_out)
+
+
+def feature_differences(filename, expected, actual, left_out=()):
+    """Returns a list of descriptions of the features that differ between two versions of an output file.
+
+    Stats named in left_out are only expected in the first version.
+    """
+    if expected == actual:
+        return []
+    if expected is None or actual is None:
+        return ["file " + ("not expected" if expected is None else "missing")]
+    expected_records = records_for(filename, expected, left_out)
+    actual_records = records_for(filename, actual, left_out)
+    differences = []
+    for key in sorted(set(expected_records) | set(actual_records)):
+        if key not in actual_records:
+            differences.append("missing: " + key)
+        elif key not in expected_records:
+            differences.append("extra: " + key)
+        elif expected_records[key] != actual_records[key]:
+            differences.append("changed: " + key)
+    if not differences and not left_out:
+        differences.append("same features in a different order")
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that GAG's execution modes give the same outputs.")
+    parser.add_argument('--synthetic', default="", help="comma-separated scaffold counts of synthetic genomes")
+    parser.add_argument('--baseline', default=os.path.join(GAG_DIR, "gag.py"),
+                        help="the gag.py whose plain runs are the expected output")
+    parser.add_argument('--modes', help="comma-separated modes to check; all if not given")
+    args = parser.parse_args()
+
+    modes = MODES
+    if args.modes:
+        modes = [mode for mode in MODES if mode[0] in args.modes.split(",")]
+    gag = os.path.join(GAG_DIR, "gag.py")
+    work_dir = tempfile.mkdtemp()
+    mismatches = 0
+    try:
+        datasets = walkthrough_datasets()
+        for scaffolds in [int(count) for count in args.synthetic.split(",") if count]:
+            datasets.append(synthetic_dataset(work_dir, scaffolds))
+        for name, inputs, dataset_edits in datasets:
+            baselines = {}
+            for mode, mode_args, with_edits, files, left_out in modes:
+                dataset_args = inputs + dataset_edits if with_edits else inputs
+                edits = EDITS if with_edits else []
+                if with_edits not in baselines:
+                    baseline_dir = os.path.join(work_dir, name + ("_edited" if with_edits else "_plain"))
+                    if not run_gag(args.baseline, dataset_args + edits, baseline_dir):
+                        sys.stdout.write("%s: baseline run failed\n" % name)
+                        mismatches += 1
+                        break
+                    baselines[with_edits] = baseline_dir
+                mode_dir = os.path.join(work_dir, name + "_" + mode)
+                if not run_gag(gag, dataset_args + edits + mode_args, mode_dir):
+                    sys.stdout.write("%s, %s: run failed\n" % (name, mode))
+                    mismatches += 1
+                    continue
+                failed = False
+                for filename in files:
+                    differences = feature_differences(filename,
+                                                      read_text(os.path.join(baselines[with_edits], filename)),
+                                                      read_text(os.path.join(mode_dir, filename)), left_out)
+                    if differences:
+                        failed = True
+                        sys.stdout.write("%s, %s: %s differs in %d features\n" %
+                                         (name, mode, filename, len(differences)))
+                        for difference in differences[:MAX_LISTED]:
+                            sys.stdout.write("    " + difference + "\n")
+                        if len(differences) > MAX_LISTED:
+                            sys.stdout.write("    ...\n")
+                mismatches += failed
+                if not failed:
+                    sys.stdout.write("%s, %s: same\n" % (name, mode))
+                shutil.rmtree(mode_dir)
+    finally:
+        shutil.rmtree(work_dir)
+    if mismatches:
+        sys.stdout.write(str(mismatches) + " runs differ from the baseline\n")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Times the innermost functions GAG calls for every feature, on fixed
+# inputs, and compares the times against an earlier run.
+# usage: python util/microbenchmarks.py [--out results.json] [--compare old.json] [--fail_over 1.2] [names...]
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import translator
+from src.gene_part import GenePart, write_tbl_entry
+from src.gff_reader import GFFReader
+from src.seq_helper import SeqHelper
+
+# Each repeat runs the function for at least this many seconds
+MIN_REPEAT_SECONDS = 0.2
+REPEATS = 5
+
+
+def random_bases(length, seed=1):
+    rng = random.Random(seed)
+    return "".join(rng.choice("ACGT") for _ in xrange(length))
+
+
+def segments(count, start=1001, exon_length=150, intron_length=200):
+    """Returns count index pairs, like the exons of one mRNA."""
+    result = []
+    for _ in xrange(count):
+        result.append([start, start + exon_length - 1])
+        start += exon_length + intron_length
+    return result
+
+
+def translate_plus():
+    cds = random_bases(3000)
+    return lambda: translator.translate(cds, '+')
+
+
+def translate_minus():
+    cds = random_bases(3000)
+    return lambda: translator.translate(cds, '-')
+
+
+def reverse_complement():
+    bases = random_bases(10000)
+    return lambda: translator.reverse_complement(bases)
+
+
+def parse_attributes():
+    attributes = "ID=BDOR_007864-RA:cds:3;Parent=BDOR_007864-RA;Name=BDOR_007864-RA;" \
+                 "Dbxref=PFAM:PF00001,InterPro:IPR000276;Ontology_term=GO:0004930,GO:0007186\n"
+    return lambda: GFFReader.parse_attributes(attributes)
+
+
+def validate_line():
+    line = "scaffold00080\tmaker\tCDS\t106509\t106749\t.\t+\t2\t" \
+           "ID=BDOR_007864-RA:cds:1;Parent=BDOR_007864-RA\n"
+    return lambda: GFFReader.validate_line(line)
+
+
+def gene_part_to_gff():
+    part = GenePart(feature_type='exon', parent_id="BDOR_007864-RA")
+    for i, index_pair in enumerate(segments(8)):
+        part.add_indices(index_pair)
+        part.add_identifier("BDOR_007864-RA:exon:" + str(i))
+        part.add_score(0.9)
+    return lambda: part.to_gff("scaffold00080", "maker")
+
+
+def tbl_entry():
+    indices = segments(8)
+    return lambda: write_tbl_entry(indices, '-', True, False, "CDS", 2)
+
+
+def get_sequence_from_indices():
+    helper = SeqHelper(random_bases(1000000))
+    indices = segments(8, start=500001)
+    return lambda: helper.get_sequence_from_indices('-', indices)
+
+
+BENCHMARKS = [("translator.translate(+)", translate_plus),
+              ("translator.translate(-)", translate_minus),
+              ("translator.reverse_complement", reverse_complement),
+              ("GFFReader.parse_attributes", parse_attributes),
+              ("GFFReader.validate_line", validate_line),
+              ("GenePart.to_gff", gene_part_to_gff),
+              ("write_tbl_entry", tbl_entry),
+              ("SeqHelper.get_sequence_from_indices", get_sequence_from_indices)]
+
+
+def time_function(function):
+    """Returns the best and median time per call in microseconds over REPEATS repeats."""
+    timer = timeit.Timer(function)
+    loops = 1
+    while timer.timeit(loops) < MIN_REPEAT_SECONDS:
+        loops *= 10
+    times = sorted(1e6 * total / loops for total in timer.repeat(REPEATS, loops))
+    return {"loops": loops, "best_us": round(times[0], 3), "median_us": round(times[len(times) // 2], 3)}
+
+
+def compare(old, new, fail_over):
+    """Returns lines comparing best times in two results files, and the names that slowed past fail_over."""
+    lines = ["%-40s%12s%12s%10s\n" % ("Benchmark", "Old (us)", "New (us)", "Ratio")]
+    slower = []
+    for name, result in sorted(new["results"].items()):
+        if name not in old["results"]:
+            continue
+        old_best = old["results"][name]["best_us"]
+        ratio = result["best_us"] / old_best if old_best else 1.0
+        flag = ""
+        if fail_over and ratio > fail_over:
+            slower.append(name)
+            flag = "  slower"
+        lines.append("%-40s%12.3f%12.3f%10.2f%s\n" % (name, old_best, result["best_us"], ratio, flag))
+    return lines, slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time GAG's innermost functions.")
+    parser.add_argument('names', nargs='*', help="benchmarks to run; all if none are given")
+    parser.add_argument('--out', default="microbenchmark_results.json")
+    parser.add_argument('--compare', help="an earlier results file to compare against")
+    parser.add_argument('--fail_over', type=float,
+                        help="with --compare, exit with an error if any benchmark's time grows by more than this ratio")
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in BENCHMARKS:
+        if args.names and name not in args.names:
+            continue
+        results[name] = time_function(setup())
+        sys.stderr.write("%-40s%12.3f us\n" % (name, results[name]["best_us"]))
+    report = {"python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+    with open(args.out, 'w') as out:
+        json.dump(report, out, indent=1, sort_keys=True)
+    sys.stderr.write("Results written to " + args.out + "\n")
+    if args.compare:
+        with open(args.compare, 'r') as old:
+            lines, slower = compare(json.load(old), report, args.fail_over)
+        for line in lines:
+            sys.stdout.write(line)
+        if slower:
+            sys.stderr.write(str(len(slower)) + " benchmarks slowed by more than " + str(args.fail_over) + "x\n")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
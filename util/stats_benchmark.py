@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Times Sequence.stats, which fills every stat from one StatsAccumulator
+# pass, against the old computation from the per-feature helper methods,
+# and checks that they agree. Uses walkthrough/basic by default.
+# usage: python util/stats_benchmark.py [genome.fasta genome.gff] [--repeats 20]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.controller import Controller
+from test.stats_accumulator_tests import stats_from_helpers
+
+BASIC = os.path.join(ROOT, "walkthrough", "basic")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time one-pass sequence stats against the per-helper stats.")
+    parser.add_argument('fasta', nargs='?', default=os.path.join(BASIC, "genome.fasta"))
+    parser.add_argument('gff', nargs='?', default=os.path.join(BASIC, "genome.gff"))
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        controller = Controller()
+        controller.read_fasta(args.fasta)
+        controller.read_gff(args.gff, work_dir)
+    finally:
+        shutil.rmtree(work_dir)
+    seqs = controller.seqs
+
+    for seq in seqs:
+        if seq.stats() != stats_from_helpers(seq):
+            sys.stderr.write("Mismatch on " + seq.header + "\n")
+            sys.exit(1)
+
+    helpers = min(timeit.repeat(lambda: [stats_from_helpers(seq) for seq in seqs], number=1, repeat=args.repeats))
+    one_pass = min(timeit.repeat(lambda: [seq.stats() for seq in seqs], number=1, repeat=args.repeats))
+    print("per-feature helpers: %.4f s" % helpers)
+    print("stats (one pass):    %.4f s" % one_pass)
+    print("speedup:             %.1fx" % (helpers / one_pass))
+
+
+if __name__ == '__main__':
+    main()
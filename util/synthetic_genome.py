@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Writes a synthetic genome (fasta and gff) for benchmarking.
+# The same arguments always give the same files.
+# usage: python util/synthetic_genome.py <out.fasta> <out.gff> [options]
+
+import argparse
+import random
+
+BASES = "ACGT"
+LINE_WIDTH = 60
+# Scaffolds are pieced together from random slices of a pool of random
+# bases, which is much faster than drawing every base
+POOL_LENGTH = 65536
+PIECE_LENGTH = 1000
+
+
+def scaffold_bases(rng, pool, length, gap_every):
+    """Returns random bases with a run of 100 Ns about every gap_every bases (never, if 0)."""
+    pieces = []
+    for _ in xrange(0, length, PIECE_LENGTH):
+        offset = rng.randint(0, len(pool) - PIECE_LENGTH)
+        pieces.append(pool[offset:offset + PIECE_LENGTH])
+    bases = "".join(pieces)[:length]
+    if gap_every:
+        for position in xrange(gap_every, length - 100, gap_every):
+            bases = bases[:position] + "N" * 100 + bases[position + 100:]
+    return bases
+
+
+def gene_lines(rng, seq_name, gene_number, start, strand, isoforms, exons):
+    """Returns the gff lines for one gene starting at start, parents first, and the gene's last base."""
+    gene_id = "SYN_%06d" % gene_number
+    # Lay out the exons; every isoform but the first skips one inner exon
+    exon_indices = []
+    position = start
+    for _ in xrange(exons):
+        length = rng.randint(100, 300)
+        exon_indices.append([position, position + length - 1])
+        position += length + rng.randint(80, 500)
+    end = exon_indices[-1][1]
+    lines = ["\t".join([seq_name, "synthetic", "gene", str(start), str(end), ".", strand, ".",
+                        "ID=" + gene_id]) + "\n"]
+    for isoform in xrange(isoforms):
+        mrna_id = gene_id + "-R" + chr(ord("A") + isoform % 26) + ("" if isoform < 26 else str(isoform // 26))
+        kept = exon_indices
+        if isoform > 0 and exons > 2:
+            skipped = (isoform - 1) % (exons - 2) + 1
+            kept = exon_indices[:skipped] + exon_indices[skipped + 1:]
+        lines.append("\t".join([seq_name, "synthetic", "mRNA", str(start), str(end), ".", strand, ".",
+                                "ID=" + mrna_id + ";Parent=" + gene_id]) + "\n")
+        for i, (exon_start, exon_end) in enumerate(kept):
+            lines.append("\t".join([seq_name, "synthetic", "exon", str(exon_start), str(exon_end), ".", strand, ".",
+                                    "ID=" + mrna_id + ":exon:" + str(i) + ";Parent=" + mrna_id]) + "\n")
+        # CDS phases follow the segments in transcription order
+        cds_order = kept if strand == "+" else list(reversed(kept))
+        phases = []
+        coding = 0
+        for exon_start, exon_end in cds_order:
+            phases.append((3 - coding % 3) % 3)
+            coding += exon_end - exon_start + 1
+        if strand == "-":
+            phases.reverse()
+        for i, (exon_start, exon_end) in enumerate(kept):
+            lines.append("\t".join([seq_name, "synthetic", "CDS", str(exon_start), str(exon_end), ".", strand,
+                                    str(phases[i]), "ID=" + mrna_id + ":cds:" + str(i) + ";Parent=" + mrna_id]) +
+                         "\n")
+    return lines, end
+
+
+def write_genome(fasta, gff, scaffolds=10, scaffold_length=100000, gene_density=5, isoforms=1, exons=4,
+                 orphans=False, gap_every=20000, seed=1):
+    """Writes scaffolds to fasta and their genes to gff.
+
+    Args:
+        gene_density: genes per 10 kb of scaffold, at most; genes never overlap
+        orphans: if True, each gene's lines are written children first, so
+            every child feature comes before its parent
+        gap_every: a run of Ns is put about every gap_every bases
+        seed: seed for the random numbers used for bases and feature lengths
+    """
+    rng = random.Random(seed)
+    pool = "".join(rng.choice(BASES) for _ in xrange(POOL_LENGTH))
+    spacing = 10000 // gene_density if gene_density else 0
+    gene_number = 0
+    gff.write("##gff-version 3\n")
+    for scaffold in xrange(1, scaffolds + 1):
+        seq_name = "scaffold%05d" % scaffold
+        bases = scaffold_bases(rng, pool, scaffold_length, gap_every)
+        fasta.write(">" + seq_name + "\n")
+        for i in xrange(0, len(bases), LINE_WIDTH):
+            fasta.write(bases[i:i + LINE_WIDTH] + "\n")
+        if not spacing:
+            continue
+        position = rng.randint(1, spacing)
+        while True:
+            gene_number += 1
+            strand = "+" if gene_number % 2 else "-"
+            lines, end = gene_lines(rng, seq_name, gene_number, position, strand, isoforms, exons)
+            if end > scaffold_length:
+                gene_number -= 1
+                break
+            if orphans:
+                lines.reverse()
+            gff.writelines(lines)
+            position = max(end + 100, position + spacing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic genome for benchmarking.")
+    parser.add_argument('fasta')
+    parser.add_argument('gff')
+    parser.add_argument('--scaffolds', type=int, default=10)
+    parser.add_argument('--scaffold_length', type=int, default=100000)
+    parser.add_argument('--gene_density', type=int, default=5, help="genes per 10 kb")
+    parser.add_argument('--isoforms', type=int, default=1)
+    parser.add_argument('--exons', type=int, default=4)
+    parser.add_argument('--orphans', action='store_true', help="write child features before their parents")
+    parser.add_argument('--gap_every', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    with open(args.fasta, 'w') as fasta:
+        with open(args.gff, 'w') as gff:
+            write_genome(fasta, gff, args.scaffolds, args.scaffold_length, args.gene_density, args.isoforms,
+                         args.exons, args.orphans, args.gap_every, args.seed)
+
+
+if __name__ == '__main__':
+    main()